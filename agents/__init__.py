@@ -1,3 +1,7 @@
 """
 Agents package for handling different data formats
-""" 
\ No newline at end of file
+""" 
+
+# Bump whenever classification or extraction output changes so cached
+# results produced by older agent logic are no longer served
+PIPELINE_VERSION = "6"
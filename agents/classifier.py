@@ -1,66 +1,170 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 import json
 import os
+from agents.json_stream import JSONSummary, summarize_json
+from agents.keywords import MATCHER, KeywordHits, EMAIL_MARKERS, CLASSIFIER_INTENT_RULES
+
+# Characters a JSON document can start with; anything else cannot parse
+JSON_START_CHARS = frozenset('{["-0123456789tfn')
+
+NOT_PARSED = object()
+
+JSON_RESULT = {
+    "format": "JSON",
+    "intent": "data_processing",
+    "confidence": "high"
+}
+
+class ClassificationResult:
+    """
+    Outcome of classifying a document, plus the work done to get there
+
+    Agents receive the artifacts so nothing is parsed or lowercased twice.
+
+    Attributes:
+        result: Dict with format, intent and confidence
+        parsed: Parsed JSON value, or NOT_PARSED if the content was not JSON
+        lowered: Lowercased content, if it was computed
+        hits: Keyword hits over the lowercased content, if it was scanned
+        header_end: Offset of the first non-header line for email content
+        summary: Streaming summary of NDJSON content, which has no single parsed value
+    """
+
+    def __init__(self, result: Dict[str, str], parsed: Any = NOT_PARSED, lowered: Optional[str] = None, hits: Optional[KeywordHits] = None, header_end: Optional[int] = None, summary: Optional[JSONSummary] = None):
+        self.result = result
+        self.parsed = parsed
+        self.summary = summary
+        self.lowered = lowered
+        self.hits = hits
+        self.header_end = header_end
+
+    @property
+    def format(self) -> str:
+        return self.result["format"]
+
+def find_header_end(content: str) -> int:
+    """
+    Find where an email's header block ends
+
+    Headers are the leading ``Key: value`` lines (after any blank lines)
+    plus indented continuation lines without a colon. The block ends at the
+    first blank line or at the first line that is neither, so only the
+    header block itself is ever scanned.
+
+    Args:
+        content: Email content
+
+    Returns:
+        Offset of the first body line, or len(content) if there is none
+    """
+    offset = 0
+    length = len(content)
+    started = False
+    while offset < length:
+        newline = content.find('\n', offset)
+        end = length if newline == -1 else newline
+        line = content[offset:end]
+        if not line.strip():
+            if started:
+                return offset
+        elif ':' not in line:
+            if not (started and line[:1] in (' ', '\t')):
+                return offset
+        else:
+            started = True
+        offset = end + 1
+    return length
+
+def filename_hints(filename: Optional[str]) -> Tuple[str, ...]:
+    """
+    Reduce a filename to the parts that influence classification
+
+    Args:
+        filename: Optional filename
+
+    Returns:
+        ("PDF", intent) for PDF filenames, otherwise an empty tuple
+    """
+    filename_lower = filename.lower() if filename else None
+    if not filename_lower or not filename_lower.endswith('.pdf'):
+        return ()
+
+    intent = "document"
+    if any(word in filename_lower for word in ["invoice", "bill", "payment"]):
+        intent = "billing"
+    elif any(word in filename_lower for word in ["contract", "agreement"]):
+        intent = "legal"
+    return ("PDF", intent)
 
 class ClassifierAgent:
     """
     Agent responsible for classifying input data into different formats
     """
-    
+
     def classify_input(self, content: str, filename: str = None) -> Dict[str, str]:
         """
         Classify the input content and determine its format and intent
-        
+
         Args:
             content: Content to classify
             filename: Optional filename to help with classification
-            
+
         Returns:
             Dict with format and intent classification
         """
+        return self.classify(content, filename).result
+
+    def classify(self, content: str, filename: str = None) -> ClassificationResult:
+        """
+        Classify the input content, keeping reusable parse artifacts
+
+        Args:
+            content: Content to classify
+            filename: Optional filename to help with classification
+
+        Returns:
+            ClassificationResult with the classification and parse artifacts
+        """
         # Check filename for PDF
-        if filename and filename.lower().endswith('.pdf'):
-            intent = "document"
-            if any(word in filename.lower() for word in ["invoice", "bill", "payment"]):
-                intent = "billing"
-            elif any(word in filename.lower() for word in ["contract", "agreement"]):
-                intent = "legal"
-            
-            return {
+        hints = filename_hints(filename)
+        if hints:
+            return ClassificationResult({
                 "format": "PDF",
-                "intent": intent,
+                "intent": hints[1],
                 "confidence": "high"
-            }
-            
-        # Try to determine if it's JSON
-        try:
-            json.loads(content)
-            return {
-                "format": "JSON",
-                "intent": "data_processing",
-                "confidence": "high"
-            }
-        except json.JSONDecodeError:
-            pass
-        
+            })
+
+        # Try to determine if it's JSON, skipping the parse when it cannot succeed
+        head = content[:64].lstrip()
+        if not head and content:
+            head = content.lstrip()[:1]
+        if head[:1] in JSON_START_CHARS:
+            try:
+                parsed = json.loads(content)
+                return ClassificationResult(dict(JSON_RESULT), parsed=parsed)
+            except json.JSONDecodeError as e:
+                # Several values on separate lines: try it as NDJSON
+                if e.msg == "Extra data":
+                    try:
+                        return ClassificationResult(dict(JSON_RESULT), summary=summarize_json(content))
+                    except json.JSONDecodeError:
+                        pass
+
         # Check for email characteristics
-        email_markers = ["from:", "to:", "subject:", "dear", "sincerely", "regards"]
-        if any(marker in content.lower() for marker in email_markers):
-            intent = "communication"
-            if any(word in content.lower() for word in ["order", "purchase", "buy", "quote"]):
-                intent = "procurement"
-            elif any(word in content.lower() for word in ["invoice", "payment", "amount", "due"]):
-                intent = "billing"
-                
-            return {
+        lowered = content.lower()
+        hits = MATCHER.scan(lowered)
+        if hits.any(EMAIL_MARKERS):
+            intent = hits.first_rule(CLASSIFIER_INTENT_RULES, "communication")
+
+            return ClassificationResult({
                 "format": "EMAIL",
                 "intent": intent,
                 "confidence": "medium"
-            }
-        
+            }, lowered=lowered, hits=hits, header_end=find_header_end(content))
+
         # Default classification
-        return {
+        return ClassificationResult({
             "format": "TEXT",
             "intent": "unknown",
             "confidence": "low"
-        }
\ No newline at end of file
+        }, lowered=lowered, hits=hits)
@@ -1,69 +1,83 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import re
 from datetime import datetime
+from itertools import islice
+from agents.classifier import find_header_end
+from agents.keywords import MATCHER, KeywordHits, URGENT_WORDS, EMAIL_INTENT_RULES, EMAIL_ACTION_RULES
+
+PHONE_PATTERN = re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+# A body line whose first non-blank character is a bullet; group 1 is the rest of the line
+BULLET_PATTERN = re.compile(r'^[^\S\n]*[-•](.*)$', re.M)
+
+# Default caps on what one email returns
+MAX_CONTACTS = 50
+MAX_ITEMS = 100
+
+# The preview is built from at most this much body text
+PREVIEW_CHARS = 200
+PREVIEW_SCAN_CHARS = 64 * 1024
 
 class EmailAgent:
     """
     Agent responsible for processing email data
     """
     
-    def extract_email_data(self, content: str) -> Dict[str, Any]:
+    def extract_email_data(
+        self,
+        content: str,
+        hits: Optional[KeywordHits] = None,
+        header_end: Optional[int] = None,
+        max_contacts: int = MAX_CONTACTS,
+        max_items: int = MAX_ITEMS
+    ) -> Dict[str, Any]:
         """
         Process email content with enhanced formatting
         
+        Only the header block, a bounded prefix of the body and as many
+        pattern matches as are returned are looked at, so the work does not
+        grow with the size of the message body.
+        
         Args:
             content: Email content to process
+            hits: Keyword hits for the content, if the caller already scanned it
+            header_end: Offset of the first body line, if already known
+            max_contacts: Most phone numbers and addresses to collect
+            max_items: Most bulleted items to collect
             
         Returns:
             Dict containing processed results with nice formatting
         """
-        # Extract email headers and body
-        headers = {}
-        body_lines = []
-        in_headers = True
+        if hits is None:
+            hits = MATCHER.scan(content.lower())
+        if header_end is None:
+            header_end = find_header_end(content)
         
-        for line in content.split('\n'):
-            line = line.strip()
-            if in_headers and line:
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    headers[key.lower()] = value.strip()
-                else:
-                    in_headers = False
-            if not in_headers and line:
-                body_lines.append(line)
+        # Extract email headers
+        headers = self._parse_headers(content[:header_end])
         
         # Determine urgency based on content
-        urgency = "NORMAL"
-        urgent_words = ["urgent", "asap", "emergency", "immediate", "priority"]
-        if any(word in content.lower() for word in urgent_words):
-            urgency = "HIGH"
-        
-        # Extract contact information
-        contact_info = []
-        phone_pattern = r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        urgency = "HIGH" if hits.any(URGENT_WORDS) else "NORMAL"
         
-        phones = re.findall(phone_pattern, content)
-        emails = re.findall(email_pattern, content)
-        
-        if phones:
-            contact_info.extend(phones)
-        if emails:
-            contact_info.extend(emails)
+        # Extract contact information, phone numbers first
+        contact_info = [match.group() for match in islice(PHONE_PATTERN.finditer(content), max_contacts)]
+        if len(contact_info) < max_contacts:
+            contact_info.extend(
+                match.group() for match in islice(EMAIL_PATTERN.finditer(content), max_contacts - len(contact_info))
+            )
         
         # Identify key items/requests
-        items = []
-        for line in body_lines:
-            if line.strip().startswith('-') or line.strip().startswith('•'):
-                items.append(line.strip()[1:].strip())
+        items = [
+            match.group(1).strip()
+            for match in islice(BULLET_PATTERN.finditer(content, header_end), max_items)
+        ]
         
         # Format the output
         return {
             "summary": {
                 "status": "✅ PROCESSED SUCCESSFULLY",
                 "document_type": "EMAIL",
-                "intent": self._determine_intent(content),
+                "intent": self._determine_intent(hits),
                 "sender": headers.get('from', 'Unknown'),
                 "urgency": urgency,
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -72,37 +86,44 @@ class EmailAgent:
                 "subject": headers.get('subject', 'No Subject'),
                 "key_requests": items if items else ["No specific items listed"],
                 "contact_info": contact_info if contact_info else ["No contact information found"],
-                "body_preview": " ".join(body_lines)[:200] + "..."
+                "body_preview": self._body_preview(content, header_end) + "..."
             },
-            "suggested_action": self._suggest_action(content)
+            "suggested_action": self._suggest_action(hits)
         }
     
-    def _determine_intent(self, content: str) -> str:
-        """Determine the intent of the email"""
-        content_lower = content.lower()
-        
-        if any(word in content_lower for word in ["quote", "price", "cost", "rfq"]):
-            return "REQUEST FOR QUOTE"
-        elif any(word in content_lower for word in ["order", "purchase", "buy"]):
-            return "PURCHASE ORDER"
-        elif any(word in content_lower for word in ["invoice", "payment", "bill"]):
-            return "BILLING INQUIRY"
-        elif any(word in content_lower for word in ["support", "help", "issue"]):
-            return "SUPPORT REQUEST"
-        else:
-            return "GENERAL INQUIRY"
+    def _parse_headers(self, block: str) -> Dict[str, str]:
+        """Parse a header block, joining indented continuation lines onto their header"""
+        headers = {}
+        key = None
+        for line in block.split('\n'):
+            if not line.strip():
+                continue
+            if key is not None and line[:1] in (' ', '\t') and ':' not in line:
+                headers[key] = f"{headers[key]} {line.strip()}".strip()
+                continue
+            key, value = line.strip().split(':', 1)
+            key = key.lower()
+            headers[key] = value.strip()
+        return headers
     
-    def _suggest_action(self, content: str) -> str:
-        """Suggest an action based on the email content"""
-        content_lower = content.lower()
-        
-        if "quote" in content_lower or "price" in content_lower:
-            return "📋 Forward to Sales Team"
-        elif "order" in content_lower or "purchase" in content_lower:
-            return "🛒 Process Purchase Order"
-        elif "support" in content_lower or "help" in content_lower:
-            return "🔧 Create Support Ticket"
-        elif "invoice" in content_lower or "payment" in content_lower:
-            return "💰 Forward to Accounting"
-        else:
-            return "📥 Review and Assign"
\ No newline at end of file
+    def _body_preview(self, content: str, header_end: int) -> str:
+        """The first PREVIEW_CHARS of the body's non-blank lines, joined by spaces"""
+        lines: List[str] = []
+        length = 0
+        window = content[header_end:header_end + PREVIEW_SCAN_CHARS]
+        for line in window.split('\n'):
+            line = line.strip()
+            if line:
+                lines.append(line)
+                length += len(line) + 1
+                if length > PREVIEW_CHARS:
+                    break
+        return " ".join(lines)[:PREVIEW_CHARS]
+    
+    def _determine_intent(self, hits: KeywordHits) -> str:
+        """Determine the intent of the email from its keyword hits"""
+        return hits.first_rule(EMAIL_INTENT_RULES, "GENERAL INQUIRY")
+    
+    def _suggest_action(self, hits: KeywordHits) -> str:
+        """Suggest an action based on the email's keyword hits"""
+        return hits.first_rule(EMAIL_ACTION_RULES, "📥 Review and Assign")
\ No newline at end of file
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+import re
+
+_AMOUNT = r"\$?\s*(-?[\d,]+(?:\.\d{1,2})?)"
+
+INVOICE_NUMBER = re.compile(r"invoice\s*(?:number|no\.?|num\.?|#)\s*[:#]?\s*([A-Za-z0-9][\w\-/]*)", re.I)
+DATE = re.compile(r"^\s*(?:invoice\s+)?date\s*[:\-]\s*(.+?)\s*$", re.I | re.M)
+SUBTOTAL = re.compile(r"^\s*sub-?\s*total\s*:?\s*" + _AMOUNT, re.I | re.M)
+TAX = re.compile(r"^\s*(?:sales\s+)?tax\b[^:\n]*:\s*" + _AMOUNT, re.I | re.M)
+TOTAL = re.compile(
+    r"^\s*(?:grand\s+|invoice\s+)?total(?:\s+due|\s+amount)?\s*(?:\([^)\n]*\))?\s*:?\s*" + _AMOUNT + r"\s*$",
+    re.I | re.M
+)
+LINE_ITEM = re.compile(
+    r"^\s*(?:\d+[.)]\s+)?(?P<description>[^\n$]*?[A-Za-z][^\n$]*?)\s+[-–]\s+\$\s*(?P<amount>-?[\d,]+\.\d{2})\s*$",
+    re.M
+)
+
+def _amount(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+def extract_invoice_fields(pages: List[str], max_items: int = 100) -> Dict[str, Any]:
+    """
+    Capture invoice fields from page text
+
+    Each page is scanned on its own so multi-invoice documents (one invoice
+    per page) are summed rather than only reporting the first one.
+
+    Args:
+        pages: Text of each page
+        max_items: Most line items to return
+
+    Returns:
+        Dict with invoice_numbers, date, subtotal, tax, totals and line_items
+    """
+    invoice_numbers: List[str] = []
+    date = None
+    subtotals: List[float] = []
+    taxes: List[float] = []
+    totals: List[float] = []
+    line_items: List[Dict[str, Any]] = []
+    line_item_count = 0
+    line_item_sum = 0.0
+
+    for text in pages:
+        for match in INVOICE_NUMBER.finditer(text):
+            if match.group(1) not in invoice_numbers:
+                invoice_numbers.append(match.group(1))
+        if date is None:
+            match = DATE.search(text)
+            if match:
+                date = match.group(1)
+        for pattern, values in ((SUBTOTAL, subtotals), (TAX, taxes), (TOTAL, totals)):
+            match = pattern.search(text)
+            if match and _amount(match.group(1)) is not None:
+                values.append(_amount(match.group(1)))
+        for match in LINE_ITEM.finditer(text):
+            amount = _amount(match.group("amount"))
+            if amount is None:
+                continue
+            line_item_count += 1
+            line_item_sum += amount
+            if len(line_items) < max_items:
+                line_items.append({"description": match.group("description").strip(), "amount": amount})
+
+    return {
+        "invoice_numbers": invoice_numbers,
+        "date": date,
+        "subtotal": sum(subtotals) if subtotals else None,
+        "tax": sum(taxes) if taxes else None,
+        "totals": totals,
+        "line_items": line_items,
+        "line_item_count": line_item_count,
+        "line_item_sum": round(line_item_sum, 2)
+    }
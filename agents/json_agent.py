@@ -1,66 +1,95 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
 from datetime import datetime
+from agents.classifier import NOT_PARSED
+from agents.json_columns import fits_float
+from agents.json_stream import JSONSummary, summarize_json
+from agents.keywords import JSON_DOCUMENT_TYPE_RULES, JSON_MONEY_TERMS, JSON_STATUS_TERMS, JSON_DATE_TERMS
 
 class JSONAgent:
     """
     Agent responsible for processing JSON data
     """
     
-    def extract_json_data(self, content: str) -> Dict[str, Any]:
+    def extract_json_data(self, content: str, parsed: Any = NOT_PARSED) -> Dict[str, Any]:
         """
         Process JSON content with enhanced formatting
         
         Args:
             content: JSON content to process
+            parsed: Already-parsed JSON value, to skip parsing ``content`` again
             
         Returns:
             Dict containing processed results with nice formatting
         """
         try:
-            data = json.loads(content)
-            
-            # Determine document type based on content
-            doc_type = self._determine_document_type(data)
-            
-            # Extract key metrics
-            metrics = self._extract_key_metrics(data)
-            
-            return {
-                "summary": {
-                    "status": "✅ PROCESSED SUCCESSFULLY",
-                    "document_type": f"JSON ({doc_type})",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "size": f"{len(content):,} bytes"
-                },
-                "structure": {
-                    "total_fields": len(data) if isinstance(data, dict) else len(data) if isinstance(data, list) else 1,
-                    "data_type": type(data).__name__,
-                    "key_fields": list(data.keys()) if isinstance(data, dict) else []
-                },
-                "metrics": metrics,
-                "suggested_action": self._suggest_action(doc_type)
-            }
+            data = json.loads(content) if parsed is NOT_PARSED else parsed
+            return self._build_result(JSONSummary.from_value(data), len(content))
         except json.JSONDecodeError as e:
-            return {
-                "status": "❌ PROCESSING FAILED",
-                "error": f"Invalid JSON: {str(e)}",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+            return self.failure(e)
+    
+    def extract_json_stream(self, source: Any, summary: Optional[JSONSummary] = None) -> Dict[str, Any]:
+        """
+        Process a JSON or NDJSON document without loading it whole
+        
+        Args:
+            source: JSON text, or UTF-8 bytes (bytes, memoryview or mmap)
+            summary: Summary already gathered from ``source``, to skip reading it again
+            
+        Returns:
+            Dict containing processed results with nice formatting
+        """
+        try:
+            if summary is None:
+                summary = summarize_json(source)
+            return self._build_result(summary, len(source))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return self.failure(e)
+    
+    def _build_result(self, summary: JSONSummary, size: int) -> Dict[str, Any]:
+        """Format a document summary as the agent's result"""
+        # Determine document type based on content
+        doc_type = self._determine_document_type(summary.value)
+        
+        # Extract key metrics
+        metrics = self._extract_key_metrics(summary.value)
+        metrics.update(self._line_item_metrics(summary))
+        
+        result = {
+            "summary": {
+                "status": "✅ PROCESSED SUCCESSFULLY",
+                "document_type": f"JSON ({doc_type})",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "size": f"{size:,} bytes"
+            },
+            "structure": {
+                "total_fields": summary.length,
+                "data_type": summary.data_type,
+                "key_fields": list(summary.value.keys()) if summary.value is not None else []
+            },
+            "metrics": metrics,
+            "suggested_action": self._suggest_action(doc_type)
+        }
+        if summary.columns:
+            result["columns"] = {path: group.aggregates() for path, group in summary.columns.items()}
+        return result
+    
+    def failure(self, error: ValueError) -> Dict[str, Any]:
+        """Build the result returned for invalid JSON or JSON bytes that are not UTF-8"""
+        return {
+            "status": "❌ PROCESSING FAILED",
+            "error": f"Invalid JSON: {str(error)}",
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
     
     def _determine_document_type(self, data: Any) -> str:
         """Determine the type of JSON document based on its content"""
         if isinstance(data, dict):
-            keys = [k.lower() for k in data.keys()]
+            keys = {k.lower() for k in data.keys()}
             
-            if any(k in keys for k in ["invoice", "bill", "payment"]):
-                return "INVOICE"
-            elif any(k in keys for k in ["order", "purchase"]):
-                return "PURCHASE ORDER"
-            elif any(k in keys for k in ["product", "item", "sku"]):
-                return "PRODUCT DATA"
-            elif any(k in keys for k in ["user", "customer", "client"]):
-                return "CUSTOMER DATA"
+            for doc_type, names in JSON_DOCUMENT_TYPE_RULES:
+                if not keys.isdisjoint(names):
+                    return doc_type
         
         return "GENERAL DATA"
     
@@ -71,21 +100,52 @@ class JSONAgent:
         if isinstance(data, dict):
             # Look for monetary values
             for key, value in data.items():
-                if isinstance(value, (int, float)) and any(term in key.lower() for term in ["total", "amount", "price", "cost"]):
-                    metrics[key] = f"${value:,.2f}"
+                if isinstance(value, (int, float)) and any(term in key.lower() for term in JSON_MONEY_TERMS):
+                    # Integers beyond float range cannot take the .2f format
+                    metrics[key] = f"${value:,.2f}" if fits_float(value) else f"${value:,}"
             
             # Look for status fields
-            status_keys = [k for k in data.keys() if "status" in k.lower()]
+            status_keys = [k for k in data.keys() if any(term in k.lower() for term in JSON_STATUS_TERMS)]
             if status_keys:
                 metrics["Status"] = data[status_keys[0]]
             
             # Look for dates
-            date_keys = [k for k in data.keys() if any(term in k.lower() for term in ["date", "time", "created", "updated"])]
+            date_keys = [k for k in data.keys() if any(term in k.lower() for term in JSON_DATE_TERMS)]
             if date_keys:
                 metrics["Date"] = data[date_keys[0]]
         
         return metrics
     
+    def _line_item_metrics(self, summary: JSONSummary) -> Dict[str, Any]:
+        """Total the first record array with line amounts and check it against the document total"""
+        for group in summary.columns.values():
+            line_total = group.line_total()
+            if line_total is None:
+                continue
+            metrics = {
+                "Line Items": group.records,
+                "Line Items Total": f"${line_total:,.2f}"
+            }
+            document_total = self._document_total(summary.value)
+            if document_total is not None:
+                difference = document_total - line_total
+                if abs(difference) < 0.005:
+                    metrics["Total Check"] = "✅ Matches line items"
+                else:
+                    metrics["Total Check"] = f"⚠️ Differs from line items by ${difference:,.2f}"
+            return metrics
+        return {}
+    
+    def _document_total(self, data: Optional[Dict[str, Any]]) -> Optional[float]:
+        """The document's subtotal (line items exclude tax), else its first numeric total field"""
+        if not data:
+            return None
+        totals = [(key.lower(), value) for key, value in data.items() if "total" in key.lower() and type(value) in (int, float) and fits_float(value)]
+        for name, value in totals:
+            if name in ("subtotal", "sub_total"):
+                return value
+        return totals[0][1] if totals else None
+    
     def _suggest_action(self, doc_type: str) -> str:
         """Suggest an action based on the document type"""
         if doc_type == "INVOICE":
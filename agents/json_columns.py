@@ -0,0 +1,192 @@
+from typing import Any, Dict, List, Optional
+import math
+import operator
+from array import array
+from agents.keywords import LINE_QUANTITY_FIELDS, LINE_PRICE_FIELDS, LINE_AMOUNT_FIELDS
+
+# Distinct values tracked per field before the count is reported as a lower bound
+MAX_DISTINCT = 10000
+
+# Records buffered before they are split into columns
+BATCH_SIZE = 4096
+
+_MISSING = float("nan")
+_NUMERIC = frozenset((int, float))
+_CATEGORICAL = frozenset((str, bool))
+
+def fits_float(value: Any) -> bool:
+    """Whether a JSON number converts to a float (huge ints overflow)"""
+    try:
+        float(value)
+    except OverflowError:
+        return False
+    return True
+
+class RecordColumns:
+    """
+    Column buffers for an array of JSON records
+
+    Records are buffered and split into columns a batch at a time, so each
+    field is gathered with one comprehension per batch rather than per-record
+    branching. Numeric fields go into ``array('d')`` buffers aligned by
+    record (NaN marks a record without the field), so aggregates run as
+    single C-level passes over each column. Strings and booleans are tracked
+    as categorical counts and distinct sets. Distinct sets of both kinds stop
+    growing at MAX_DISTINCT, so they stay bounded however long the array is.
+    Integers too large for a float (valid JSON, e.g. a 400-digit number) are
+    left out of the numeric column and counted as out of range.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.skipped = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._numeric: Dict[str, array] = {}
+        self._integer: Dict[str, bool] = {}
+        self._present: Dict[str, int] = {}
+        self._numeric_distinct: Dict[str, set] = {}
+        self._out_of_range: Dict[str, int] = {}
+        self._category_counts: Dict[str, int] = {}
+        self._categories: Dict[str, set] = {}
+
+    def add(self, record: Any) -> None:
+        """Append one array element; anything but an object is only counted"""
+        if not isinstance(record, dict):
+            self.skipped += 1
+            return
+        self.records += 1
+        self._pending.append(record)
+        if len(self._pending) >= BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Move pending records into the column buffers, one field at a time"""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        row = self.records - len(batch)
+        # Records in an export almost always share one key order, so this set is tiny
+        keys = dict.fromkeys(key for schema in set(map(tuple, batch)) for key in schema)
+        for key in keys:
+            values = [record.get(key) for record in batch]
+            kinds = set(map(type, values))
+            if kinds <= _NUMERIC:
+                self._extend_numeric(key, row, values, len(values), float in kinds)
+                continue
+            if kinds & _NUMERIC:
+                numbers = [value if type(value) in _NUMERIC else _MISSING for value in values]
+                present = sum(1 for value in values if type(value) in _NUMERIC)
+                self._extend_numeric(key, row, numbers, present, float in kinds)
+            if kinds & _CATEGORICAL:
+                if not kinds <= _CATEGORICAL:
+                    values = [value for value in values if type(value) in _CATEGORICAL]
+                self._category_counts[key] = self._category_counts.get(key, 0) + len(values)
+                distinct = self._categories.setdefault(key, set())
+                if len(distinct) < MAX_DISTINCT:
+                    distinct.update(values)
+
+    def _extend_numeric(self, key: str, row: int, values: List[Any], present: int, has_float: bool) -> None:
+        """Append one batch of a numeric field, ``present`` of which are real values"""
+        column = self._numeric.get(key)
+        if column is None:
+            column = self._numeric[key] = array("d")
+            self._integer[key] = True
+            self._present[key] = 0
+            self._numeric_distinct[key] = set()
+            self._out_of_range[key] = 0
+        if len(column) < row:
+            column.extend(array("d", [_MISSING]) * (row - len(column)))
+        filled = len(column)
+        try:
+            column.extend(values)
+        except OverflowError:
+            # An int beyond float range; it is left out rather than failing the document
+            del column[filled:]
+            values = [value if fits_float(value) else _MISSING for value in values]
+            out_of_range = sum(1 for value in values if value is _MISSING) - (len(values) - present)
+            self._out_of_range[key] += out_of_range
+            present -= out_of_range
+            column.extend(values)
+        self._present[key] += present
+        if has_float:
+            self._integer[key] = False
+        distinct = self._numeric_distinct[key]
+        if len(distinct) < MAX_DISTINCT:
+            distinct.update(values if present == len(values) else (value for value in values if value is not _MISSING))
+
+    def _column(self, key: str) -> array:
+        """A numeric column padded to one entry per record"""
+        self._flush()
+        column = self._numeric[key]
+        if len(column) < self.records:
+            column.extend(array("d", [_MISSING]) * (self.records - len(column)))
+        return column
+
+    def _values(self, key: str) -> array:
+        """A numeric column without the gaps of records that lack the field"""
+        if self._present[key] == self.records:
+            return self._column(key)
+        return array("d", (value for value in self._column(key) if value == value))
+
+    def _field(self, names) -> Optional[str]:
+        """The first numeric field whose lowercased name is in ``names``"""
+        self._flush()
+        by_name = {key.lower(): key for key in self._numeric}
+        for name in names:
+            if name in by_name:
+                return by_name[name]
+        return None
+
+    def line_total(self) -> Optional[float]:
+        """
+        Sum of the records' line totals
+
+        Uses quantity × price when both fields exist, otherwise an amount
+        field such as ``line_total`` or ``amount``.
+        """
+        quantity, price = self._field(LINE_QUANTITY_FIELDS), self._field(LINE_PRICE_FIELDS)
+        if quantity and price:
+            products = map(operator.mul, self._column(quantity), self._column(price))
+            if self._present[quantity] < self.records or self._present[price] < self.records:
+                products = (value for value in products if value == value)
+            return round(math.fsum(products), 2)
+        amount = self._field(LINE_AMOUNT_FIELDS)
+        if amount:
+            return round(math.fsum(self._values(amount)), 2)
+        return None
+
+    def aggregates(self) -> Dict[str, Any]:
+        """
+        Count, sum, min, max and distinct per field
+
+        Returns:
+            Dict with the record count and per-field statistics
+        """
+        self._flush()
+        fields: Dict[str, Dict[str, Any]] = {}
+        for key in self._numeric:
+            values = self._values(key)
+            cast = int if self._integer[key] else float
+            distinct = len(self._numeric_distinct[key])
+            fields[key] = {
+                "type": "numeric",
+                "count": len(values),
+                "sum": cast(math.fsum(values)),
+                "min": cast(min(values)) if values else None,
+                "max": cast(max(values)) if values else None,
+                "distinct": distinct
+            }
+            if distinct >= MAX_DISTINCT:
+                fields[key]["distinct_capped"] = True
+            if self._out_of_range[key]:
+                fields[key]["out_of_range"] = self._out_of_range[key]
+        for key, count in self._category_counts.items():
+            distinct = len(self._categories[key])
+            stats = {"type": "categorical", "count": count, "distinct": distinct}
+            if distinct >= MAX_DISTINCT:
+                stats["distinct_capped"] = True
+            if key in fields:
+                fields[key]["categorical"] = stats
+            else:
+                fields[key] = stats
+        return {"records": self.records, "skipped": self.skipped, "fields": fields}
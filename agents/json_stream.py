@@ -0,0 +1,283 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import codecs
+import json
+import re
+from agents.json_columns import RecordColumns
+from agents.keywords import JSON_METRIC_TERMS
+
+# Characters decoded per read from a bytes source
+CHUNK_CHARS = 1024 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_WHITESPACE_CHARS = frozenset(" \t\n\r")
+_VALUE_END = frozenset(",:]}") | _WHITESPACE_CHARS
+_DECODER = json.JSONDecoder()
+
+def is_metric_key(key: str) -> bool:
+    """Whether JSONAgent reads the value of a top-level ``key`` for its metrics"""
+    lowered = key.lower()
+    return any(term in lowered for term in JSON_METRIC_TERMS)
+
+class JSONStream:
+    """
+    Incremental reader over a JSON text
+
+    Bytes-like sources (bytes, memoryview, mmap) are decoded as UTF-8 one
+    chunk at a time and the consumed prefix is dropped, so only the value
+    under the cursor is ever held in memory. Containers can be walked one
+    element at a time with ``items()`` and ``members()``; leaves are decoded
+    with the C scanner behind ``json.loads``.
+    """
+
+    def __init__(self, source: Any, chunk_size: int = CHUNK_CHARS):
+        self.chunk_size = chunk_size
+        self.pos = 0
+        self.newline = False
+        if isinstance(source, str):
+            self.text = source
+            self.eof = True
+            self._source = None
+        else:
+            self.text = ""
+            self.eof = False
+            self._source = source
+            self._offset = 0
+            self._decode = codecs.getincrementaldecoder("utf-8")("strict").decode
+
+    def _fill(self, minimum: int) -> bool:
+        """Append at least ``minimum`` more characters to the window; False at EOF"""
+        if self.eof:
+            return False
+        parts = [self.text[self.pos:]]
+        added = 0
+        while added < minimum and not self.eof:
+            chunk = self._source[self._offset:self._offset + self.chunk_size]
+            self._offset += len(chunk)
+            self.eof = self._offset >= len(self._source)
+            decoded = self._decode(chunk, self.eof)
+            parts.append(decoded)
+            added += len(decoded)
+        self.text = "".join(parts)
+        self.pos = 0
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        """Build a decode error at the cursor"""
+        return json.JSONDecodeError(message, self.text, self.pos)
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character ("" at EOF)
+
+        Sets ``newline`` when the skipped whitespace contained a line break.
+        """
+        self.newline = False
+        if self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char not in _WHITESPACE_CHARS:
+                return char
+        while True:
+            end = _WHITESPACE.match(self.text, self.pos).end()
+            if not self.newline and self.text.find("\n", self.pos, end) != -1:
+                self.newline = True
+            self.pos = end
+            if end < len(self.text):
+                return self.text[end]
+            if not self._fill(1):
+                return ""
+
+    def value(self) -> Any:
+        """Decode the whole value under the cursor"""
+        self.peek()
+        wanted = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # A number cut by the window edge ("12" of "12.5e3") parses but is
+                # not followed by a delimiter; read on until it is
+                if self.eof or (end < len(self.text) and self.text[end] in _VALUE_END):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(wanted)
+            wanted *= 2
+
+    def skip(self, stream_depth: int = 1) -> None:
+        """
+        Step over the value under the cursor
+
+        Containers within ``stream_depth`` levels are walked element by
+        element; deeper ones are decoded one element at a time and dropped.
+        """
+        char = self.peek()
+        if stream_depth > 0 and char == "[":
+            for _ in self.items():
+                self.skip(stream_depth - 1)
+        elif stream_depth > 0 and char == "{":
+            for _ in self.members():
+                self.skip(stream_depth - 1)
+        else:
+            self.value()
+
+    def items(self) -> Iterator[int]:
+        """
+        Walk the array under the cursor
+
+        Yields each index with the cursor on the element, which the caller
+        must consume with ``value()`` or ``skip()`` before advancing.
+        """
+        self._expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            if char == "]":
+                self.pos += 1
+                return
+            if char != ",":
+                raise self.error("Expecting ',' delimiter")
+            self.pos += 1
+
+    def members(self) -> Iterator[str]:
+        """
+        Walk the object under the cursor
+
+        Yields each key with the cursor on its value, which the caller must
+        consume with ``value()`` or ``skip()`` before advancing.
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self.error("Expecting property name enclosed in double quotes")
+            key = self.value()
+            self._expect(":")
+            yield key
+            char = self.peek()
+            if char == "}":
+                self.pos += 1
+                return
+            if char != ",":
+                raise self.error("Expecting ',' delimiter")
+            self.pos += 1
+
+    def _expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+class JSONSummary:
+    """
+    Everything JSONAgent reports about a document
+
+    Attributes:
+        data_type: Python type name of the top-level value ("list" for NDJSON)
+        length: Number of keys, elements or NDJSON lines (1 for scalars)
+        value: Top-level object with only its metric values kept, or None
+        ndjson: Whether the document was newline-delimited JSON
+        columns: Column buffers per record array, keyed by path ("$" for the
+            top-level array or NDJSON lines, "$.items" for a top-level key)
+    """
+
+    def __init__(self, data_type: str, length: int, value: Optional[Dict[str, Any]] = None, ndjson: bool = False, columns: Optional[Dict[str, RecordColumns]] = None):
+        self.data_type = data_type
+        self.length = length
+        self.value = value
+        self.ndjson = ndjson
+        self.columns = {path: group for path, group in (columns or {}).items() if group.records}
+
+    @classmethod
+    def from_value(cls, data: Any) -> "JSONSummary":
+        """Summarize an already-parsed value"""
+        columns: Dict[str, RecordColumns] = {}
+        if isinstance(data, list):
+            columns["$"] = _columns_of(data)
+        elif isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(value, list):
+                    columns[f"$.{key}"] = _columns_of(value)
+        return cls(
+            type(data).__name__,
+            len(data) if isinstance(data, (dict, list)) else 1,
+            data if isinstance(data, dict) else None,
+            columns=columns
+        )
+
+def _columns_of(records: List[Any]) -> RecordColumns:
+    group = RecordColumns()
+    for record in records:
+        group.add(record)
+    return group
+
+def summarize_json(source: Any, keep: Callable[[str], bool] = is_metric_key) -> JSONSummary:
+    """
+    Summarize a JSON or NDJSON document in one bounded-memory pass
+
+    Top-level arrays are consumed one element at a time. For a top-level
+    object every key is recorded but only scalars and the values of keys
+    accepted by ``keep`` are decoded; other containers are skipped, except
+    arrays, whose records are fed one at a time into column buffers.
+    Several top-level values separated by line breaks are read as NDJSON.
+
+    Args:
+        source: JSON text, or UTF-8 bytes (bytes, memoryview or mmap)
+        keep: Predicate choosing which top-level object values to decode
+
+    Returns:
+        JSONSummary of the document
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON or NDJSON
+        UnicodeDecodeError: If a bytes source is not valid UTF-8
+    """
+    stream = JSONStream(source)
+    columns: Dict[str, RecordColumns] = {}
+    char = stream.peek()
+    if char == "[":
+        group = columns["$"] = RecordColumns()
+        for _ in stream.items():
+            group.add(stream.value())
+        summary = JSONSummary("list", group.records + group.skipped, columns=columns)
+    elif char == "{":
+        value: Dict[str, Any] = {}
+        for key in stream.members():
+            char = stream.peek()
+            wanted = keep(key)
+            if wanted or char not in ("[", "{"):
+                decoded = stream.value()
+                value[key] = decoded if wanted else None
+                if isinstance(decoded, list):
+                    columns[f"$.{key}"] = _columns_of(decoded)
+            elif char == "[":
+                group = columns[f"$.{key}"] = RecordColumns()
+                for _ in stream.items():
+                    group.add(stream.value())
+                value[key] = None
+            else:
+                stream.skip()
+                value[key] = None
+        summary = JSONSummary("dict", len(value), value, columns=columns)
+    else:
+        summary = JSONSummary.from_value(stream.value())
+
+    lines = None
+    while stream.peek():
+        if not stream.newline:
+            raise stream.error("Extra data")
+        if lines is None:
+            lines = RecordColumns()
+            # The first line was only partly decoded above; it is a single
+            # NDJSON record, so read it again from the start in full
+            lines.add(JSONStream(source).value())
+        lines.add(stream.value())
+    if lines is not None:
+        return JSONSummary("list", lines.records + lines.skipped, ndjson=True, columns={"$": lines})
+    return summary
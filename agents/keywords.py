@@ -0,0 +1,148 @@
+"""
+Keyword rule tables shared by the classifier and the agents
+
+MATCHER compiles the vocabulary of every text rule into one regex and
+scans each document once; the rules then check the resulting KeywordHits.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+import re
+
+# Ordered keyword rules; the first rule with a hit wins
+EMAIL_MARKERS = ("from:", "to:", "subject:", "dear", "sincerely", "regards")
+
+CLASSIFIER_INTENT_RULES = [
+    ("procurement", ("order", "purchase", "buy", "quote")),
+    ("billing", ("invoice", "payment", "amount", "due")),
+]
+
+URGENT_WORDS = ("urgent", "asap", "emergency", "immediate", "priority")
+
+EMAIL_INTENT_RULES = [
+    ("REQUEST FOR QUOTE", ("quote", "price", "cost", "rfq")),
+    ("PURCHASE ORDER", ("order", "purchase", "buy")),
+    ("BILLING INQUIRY", ("invoice", "payment", "bill")),
+    ("SUPPORT REQUEST", ("support", "help", "issue")),
+]
+
+EMAIL_ACTION_RULES = [
+    ("📋 Forward to Sales Team", ("quote", "price")),
+    ("🛒 Process Purchase Order", ("order", "purchase")),
+    ("🔧 Create Support Ticket", ("support", "help")),
+    ("💰 Forward to Accounting", ("invoice", "payment")),
+]
+
+# JSON document types are decided by exact (lowercased) key names
+JSON_DOCUMENT_TYPE_RULES = [
+    ("INVOICE", ("invoice", "bill", "payment")),
+    ("PURCHASE ORDER", ("order", "purchase")),
+    ("PRODUCT DATA", ("product", "item", "sku")),
+    ("CUSTOMER DATA", ("user", "customer", "client")),
+]
+
+# JSON key metrics are read from top-level keys containing these substrings
+JSON_MONEY_TERMS = ("total", "amount", "price", "cost")
+JSON_STATUS_TERMS = ("status",)
+JSON_DATE_TERMS = ("date", "time", "created", "updated")
+JSON_METRIC_TERMS = JSON_MONEY_TERMS + JSON_STATUS_TERMS + JSON_DATE_TERMS
+
+# Record fields used to compute line totals, by exact (lowercased) name in preference order
+LINE_QUANTITY_FIELDS = ("quantity", "qty", "units", "count")
+LINE_PRICE_FIELDS = ("unit_price", "price", "unit_cost", "rate", "cost")
+LINE_AMOUNT_FIELDS = ("line_total", "amount", "total", "subtotal", "extended_price")
+
+class KeywordHits:
+    """
+    The vocabulary keywords found in one document
+
+    Attributes:
+        found: Every vocabulary keyword that occurs in the document
+    """
+
+    def __init__(self, found: FrozenSet[str]):
+        self.found = found
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self.found
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        """Whether any of ``keywords`` occurs in the document"""
+        return any(keyword in self.found for keyword in keywords)
+
+    def first_rule(self, rules: Sequence[Tuple[str, Sequence[str]]], default: Optional[str] = None) -> Optional[str]:
+        """Return the label of the first rule with a hit, or ``default``"""
+        for label, keywords in rules:
+            if self.any(keywords):
+                return label
+        return default
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    A regex alternation of ``words`` factored by common prefix
+
+    The factored form lets the regex engine reject most positions on their
+    first character instead of trying every keyword there.
+    """
+    tree: Dict[str, dict] = {}
+    for word in words:
+        node = tree
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: the longest keyword starting at a position wins
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(tree)
+
+class KeywordMatcher:
+    """
+    Multi-pattern matcher over the keyword vocabulary of every rule table
+
+    All keywords are compiled into one prefix-factored regex, so a document
+    is scanned once however many keywords the rules use. Matching resumes
+    one character after each match start, so overlapping keywords are found
+    too, and a match also counts every shorter keyword contained in it.
+    """
+
+    def __init__(self, *keyword_groups: Iterable[str]):
+        vocabulary = list(dict.fromkeys(keyword for group in keyword_groups for keyword in group))
+        self.pattern = re.compile(_trie_pattern(vocabulary))
+        # Keywords implied by a match, e.g. "bill" inside a matched "billing"
+        self._contained = {
+            keyword: frozenset(other for other in vocabulary if other in keyword) for keyword in vocabulary
+        }
+
+    def scan(self, lowered: str) -> KeywordHits:
+        """
+        Find every vocabulary keyword in a document in one pass
+
+        Args:
+            lowered: Lowercased document text
+
+        Returns:
+            KeywordHits for the document
+        """
+        found = set()
+        search = self.pattern.search
+        match = search(lowered)
+        while match is not None:
+            found |= self._contained[match.group()]
+            match = search(lowered, match.start() + 1)
+        return KeywordHits(frozenset(found))
+
+def _rule_keywords(rules: Sequence[Tuple[str, Sequence[str]]]) -> List[str]:
+    return [keyword for _, keywords in rules for keyword in keywords]
+
+# Built once at import time and shared by every agent
+MATCHER = KeywordMatcher(
+    EMAIL_MARKERS,
+    _rule_keywords(CLASSIFIER_INTENT_RULES),
+    URGENT_WORDS,
+    _rule_keywords(EMAIL_INTENT_RULES),
+    _rule_keywords(EMAIL_ACTION_RULES),
+)
@@ -0,0 +1,136 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import re
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesFeedParser
+from agents.pipeline import run_pipeline
+
+# mbox "From " separator lines; a body line starting with "From " is quoted as ">From "
+_FROM_LINE = re.compile(rb"^From [^\n]*\n", re.M)
+# Quoted body lines (mboxrd: any number of ">" before "From "), unquoted by one level
+_QUOTED_FROM = re.compile(rb"^>(>*From )", re.M)
+_TAGS = re.compile(r"<[^>]+>")
+
+# Headers rendered in front of the body, in the layout EmailAgent expects
+MESSAGE_HEADERS = ("From", "To", "Cc", "Subject", "Date")
+
+def is_mbox(buffer: Any) -> bool:
+    """Whether ``buffer`` starts like an mbox file rather than a single RFC 822 message"""
+    return bytes(buffer[:5]) == b"From "
+
+def iter_messages(buffer: Any) -> Iterator[bytes]:
+    """
+    Lazily split a mailbox into raw messages
+
+    Only the separator lines are searched for, so a memory-mapped mbox of any
+    size is walked without loading it; each message is copied out on its own.
+
+    Args:
+        buffer: mbox or single-message (.eml) content as bytes, memoryview or mmap
+
+    Yields:
+        The raw bytes of each message, without the mbox "From " line and
+        with one ">" removed from its quoted ">From " lines
+    """
+    if not is_mbox(buffer):
+        if len(buffer):
+            yield bytes(buffer)
+        return
+
+    start = None
+    for match in _FROM_LINE.finditer(buffer):
+        if start is not None:
+            yield _unquote(bytes(buffer[start:match.start()]))
+        start = match.end()
+    if start is not None and start < len(buffer):
+        yield _unquote(bytes(buffer[start:]))
+
+def _unquote(message: bytes) -> bytes:
+    """Remove one level of ">" quoting from the message's ">From " lines"""
+    if b">From " not in message:
+        return message
+    return _QUOTED_FROM.sub(rb"\1", message)
+
+def message_text(raw: bytes) -> Tuple[str, Dict[str, str]]:
+    """
+    Parse one RFC 822 message into the text layout EmailAgent reads
+
+    Args:
+        raw: Raw message bytes
+
+    Returns:
+        Tuple of (header lines + blank line + body text, header values)
+    """
+    # The compat32 policy skips the header registry, which costs several times the parse itself
+    parser = BytesFeedParser()
+    parser.feed(raw)
+    message = parser.close()
+
+    headers = {}
+    for name in MESSAGE_HEADERS:
+        value = message.get(name)
+        if value is not None:
+            headers[name] = " ".join(_decode_header(value).split())
+
+    body = ""
+    part = _find_body(message)
+    if part is not None:
+        payload = part.get_payload(decode=True) or b""
+        try:
+            body = payload.decode(part.get_content_charset() or "utf-8", "replace")
+        except LookupError:
+            body = payload.decode("utf-8", "replace")
+        if part.get_content_subtype() == "html":
+            body = _TAGS.sub(" ", body)
+
+    lines = [f"{name}: {value}" for name, value in headers.items()]
+    return "\n".join(lines) + "\n\n" + body, headers
+
+def _decode_header(value: Any) -> str:
+    """Decode RFC 2047 encoded words, keeping the raw value if they are malformed"""
+    if "=?" not in str(value):
+        return str(value)
+    try:
+        return str(make_header(decode_header(str(value))))
+    except (LookupError, UnicodeError, ValueError):
+        return str(value)
+
+def _find_body(message: Message) -> Optional[Message]:
+    """The first text/plain part, else the first text/html part, skipping attachments"""
+    html = None
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_maintype() != "text":
+            continue
+        if (part.get("Content-Disposition") or "").lower().startswith("attachment"):
+            continue
+        subtype = part.get_content_subtype()
+        if subtype == "plain":
+            return part
+        if subtype == "html" and html is None:
+            html = part
+    return html
+
+def process_messages(messages: List[bytes]) -> List[Dict[str, Any]]:
+    """
+    Worker entry point: run a chunk of raw messages through the pipeline
+
+    Args:
+        messages: Raw message bytes
+
+    Returns:
+        One dict per message with status, headers, classification and extracted_data
+    """
+    results = []
+    for raw in messages:
+        try:
+            text, headers = message_text(raw)
+            classification, extracted_data = run_pipeline(text)
+            results.append({
+                "status": "success",
+                "headers": headers,
+                "classification": classification,
+                "extracted_data": extracted_data
+            })
+        except Exception as e:
+            results.append({"status": "error", "message": str(e)})
+    return results
@@ -0,0 +1,675 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import base64
+import binascii
+import os
+import re
+import zlib
+from collections import namedtuple
+
+PDFRef = namedtuple("PDFRef", "num gen")
+
+class PDFError(Exception):
+    """Raised when a PDF's structure cannot be read"""
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+
+_SKIP = re.compile(rb"(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_NAME = re.compile(rb"/([^\x00\t\n\x0c\r ()<>\[\]{}/%]*)")
+_KEYWORD = re.compile(rb"[A-Za-z'\"*]+")
+_REF = re.compile(rb"(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?![A-Za-z])")
+_OBJ_HEADER = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj")
+_OBJ_SCAN = re.compile(rb"(?<![0-9])(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj(?![A-Za-z])")
+_XREF_SUBSECTION = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)[ \t]*(?:\r\n|\r|\n)")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_STRING_SPECIAL = re.compile(rb"[()\\]")
+_HEX_CLEAN = re.compile(rb"[^0-9A-Fa-f]")
+_NAME_ESCAPE = re.compile(r"#([0-9A-Fa-f]{2})")
+# Largest decoded stream accepted; a few KB of Flate data can inflate to gigabytes
+MAX_STREAM_BYTES = int(os.getenv("PDF_MAX_STREAM_BYTES", 256 * 1024 * 1024))
+
+_STRING_ESCAPES = {
+    ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+    ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"
+}
+
+class PDFStream:
+    """
+    A stream object whose data stays in the underlying buffer until needed
+
+    Attributes:
+        dict: The stream dictionary
+    """
+
+    def __init__(self, doc: "PDFDocument", stream_dict: Dict[str, Any], buffer: Any, data_start: int):
+        self.dict = stream_dict
+        self._doc = doc
+        self._buffer = buffer
+        self._data_start = data_start
+
+    @property
+    def length(self) -> int:
+        length = self._doc.resolve(self.dict.get("Length"))
+        if not isinstance(length, int) or length < 0:
+            end = self._buffer.find(b"endstream", self._data_start)
+            if end < 0:
+                raise PDFError("Unterminated stream")
+            length = end - self._data_start
+        return length
+
+    def raw(self) -> bytes:
+        """Return the stream's encoded bytes"""
+        return bytes(self._buffer[self._data_start:self._data_start + self.length])
+
+    def decode(self, limit: Optional[int] = None) -> bytes:
+        """
+        Return the stream's data with its filters applied
+
+        Args:
+            limit: Most bytes the decoded data may take (defaults to MAX_STREAM_BYTES)
+
+        Raises:
+            PDFError: If a filter is unsupported or the data decodes beyond ``limit``
+        """
+        if limit is None:
+            limit = MAX_STREAM_BYTES
+        filters = self._doc.resolve(self.dict.get("Filter"))
+        params = self._doc.resolve(self.dict.get("DecodeParms"))
+        data = self.raw()
+        if filters is not None:
+            if not isinstance(filters, list):
+                filters = [filters]
+                params = [params]
+            elif not isinstance(params, list):
+                params = [params] * len(filters)
+            for name, param in zip(filters, params):
+                data = decode_filter(self._doc.resolve(name), data, self._doc.resolve(param) or {}, limit)
+        if len(data) > limit:
+            raise PDFError(f"Stream decodes beyond {limit} bytes")
+        return data
+
+def decode_filter(name: str, data: bytes, params: Dict[str, Any], limit: Optional[int] = None) -> bytes:
+    """
+    Apply one PDF stream filter
+
+    Args:
+        name: Filter name (without the leading slash)
+        data: Encoded data
+        params: The filter's DecodeParms dictionary
+        limit: Most bytes Flate data may inflate to (defaults to MAX_STREAM_BYTES)
+
+    Returns:
+        Decoded data
+
+    Raises:
+        PDFError: For an unsupported filter, or Flate data that inflates beyond ``limit``
+    """
+    if limit is None:
+        limit = MAX_STREAM_BYTES
+    if name in ("FlateDecode", "Fl"):
+        decompressor = zlib.decompressobj()
+        try:
+            # A max_length of 0 would mean "unlimited", so ask for at least one byte
+            data = decompressor.decompress(data, max(limit, 1))
+            if decompressor.unconsumed_tail or len(data) > limit:
+                raise PDFError(f"Stream inflates beyond {limit} bytes")
+        except zlib.error:
+            # Tolerate truncated or trailing-garbage streams, as readers commonly do
+            data = decompressor.flush() if not decompressor.unconsumed_tail else b""
+        return apply_predictor(data, params)
+    if name in ("ASCIIHexDecode", "AHx"):
+        data = data.split(b">", 1)[0]
+        data = _HEX_CLEAN.sub(b"", data)
+        if len(data) % 2:
+            data += b"0"
+        return binascii.unhexlify(data)
+    if name in ("ASCII85Decode", "A85"):
+        data = data.strip()
+        if data.startswith(b"<~"):
+            data = data[2:]
+        if not data.endswith(b"~>"):
+            data += b"~>"
+        return base64.a85decode(b"<~" + data, adobe=True, ignorechars=WHITESPACE)
+    raise PDFError(f"Unsupported stream filter: {name}")
+
+def apply_predictor(data: bytes, params: Dict[str, Any]) -> bytes:
+    """Undo PNG (10-15) row predictors used by Flate-encoded xref and image streams"""
+    predictor = params.get("Predictor", 1) if isinstance(params, dict) else 1
+    if predictor < 10:
+        return data
+
+    colors = params.get("Colors", 1)
+    bits = params.get("BitsPerComponent", 8)
+    columns = params.get("Columns", 1)
+    bpp = max(1, colors * bits // 8)
+    row_size = (colors * bits * columns + 7) // 8
+
+    out = bytearray()
+    previous = bytearray(row_size)
+    stride = row_size + 1
+    for start in range(0, len(data) - row_size, stride):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + stride])
+        if kind == 1:
+            for i in range(bpp, row_size):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(row_size):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 3:
+            for i in range(row_size):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(row_size):
+                left = row[i - bpp] if i >= bpp else 0
+                up = previous[i]
+                up_left = previous[i - bpp] if i >= bpp else 0
+                estimate = left + up - up_left
+                pa, pb, pc = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+                if pa <= pb and pa <= pc:
+                    row[i] = (row[i] + left) & 0xFF
+                elif pb <= pc:
+                    row[i] = (row[i] + up) & 0xFF
+                else:
+                    row[i] = (row[i] + up_left) & 0xFF
+        out += row
+        previous = row
+    return bytes(out)
+
+def decode_text_string(value: Any) -> Any:
+    """Decode a PDF text string (UTF-16BE with BOM, UTF-8 with BOM or PDFDocEncoding)"""
+    if not isinstance(value, bytes):
+        return value
+    if value.startswith(b"\xfe\xff"):
+        return value[2:].decode("utf-16-be", "replace")
+    if value.startswith(b"\xef\xbb\xbf"):
+        return value[3:].decode("utf-8", "replace")
+    return value.decode("latin-1")
+
+class PDFParser:
+    """
+    Parser for PDF objects in any bytes-like buffer (bytes, memoryview or mmap)
+
+    Names are returned as ``str``, strings as ``bytes``, indirect references
+    as PDFRef, dictionaries as ``dict`` and arrays as ``list``.
+    """
+
+    def __init__(self, buffer: Any, doc: Optional["PDFDocument"] = None):
+        self.buffer = buffer
+        self.doc = doc
+        self.size = len(buffer)
+
+    def skip(self, pos: int) -> int:
+        return _SKIP.match(self.buffer, pos).end()
+
+    def parse(self, pos: int) -> Tuple[Any, int]:
+        """
+        Parse one object starting at ``pos``
+
+        Returns:
+            Tuple of (value, position after the value)
+        """
+        pos = self.skip(pos)
+        if pos >= self.size:
+            raise PDFError("Unexpected end of data")
+        lead = self.buffer[pos:pos + 2]
+
+        if lead == b"<<":
+            return self._parse_dict(pos + 2)
+        if lead[:1] == b"[":
+            return self._parse_array(pos + 1)
+        if lead[:1] == b"/":
+            match = _NAME.match(self.buffer, pos)
+            return self._decode_name(match.group(1)), match.end()
+        if lead[:1] == b"(":
+            return self._parse_literal_string(pos + 1)
+        if lead[:1] == b"<":
+            end = self.buffer.find(b">", pos)
+            if end < 0:
+                raise PDFError("Unterminated hex string")
+            digits = _HEX_CLEAN.sub(b"", bytes(self.buffer[pos + 1:end]))
+            if len(digits) % 2:
+                digits += b"0"
+            return binascii.unhexlify(digits), end + 1
+
+        match = _REF.match(self.buffer, pos)
+        if match:
+            return PDFRef(int(match.group(1)), int(match.group(2))), match.end()
+        match = _NUMBER.match(self.buffer, pos)
+        if match:
+            token = match.group()
+            if b"." in token:
+                return float(token), match.end()
+            return int(token), match.end()
+        match = _KEYWORD.match(self.buffer, pos)
+        if match:
+            word = match.group()
+            if word == b"true":
+                return True, match.end()
+            if word == b"false":
+                return False, match.end()
+            if word == b"null":
+                return None, match.end()
+            raise PDFError(f"Unexpected keyword {word!r} at offset {pos}")
+        raise PDFError(f"Unexpected byte {lead[:1]!r} at offset {pos}")
+
+    def _parse_dict(self, pos: int) -> Tuple[Any, int]:
+        result = {}
+        while True:
+            pos = self.skip(pos)
+            if self.buffer[pos:pos + 2] == b">>":
+                pos += 2
+                break
+            match = _NAME.match(self.buffer, pos)
+            if not match:
+                raise PDFError(f"Expected a name key at offset {pos}")
+            key = self._decode_name(match.group(1))
+            value, pos = self.parse(match.end())
+            result[key] = value
+
+        # A dictionary followed by "stream" is a stream object
+        after = self.skip(pos)
+        if self.doc is not None and self.buffer[after:after + 6] == b"stream":
+            data_start = after + 6
+            if self.buffer[data_start:data_start + 2] == b"\r\n":
+                data_start += 2
+            elif self.buffer[data_start:data_start + 1] in (b"\n", b"\r"):
+                data_start += 1
+            return PDFStream(self.doc, result, self.buffer, data_start), data_start
+        return result, pos
+
+    def _parse_array(self, pos: int) -> Tuple[Any, int]:
+        result = []
+        while True:
+            pos = self.skip(pos)
+            if self.buffer[pos:pos + 1] == b"]":
+                return result, pos + 1
+            value, pos = self.parse(pos)
+            result.append(value)
+
+    def _parse_literal_string(self, pos: int) -> Tuple[bytes, int]:
+        out = bytearray()
+        depth = 1
+        while True:
+            match = _STRING_SPECIAL.search(self.buffer, pos)
+            if match is None:
+                raise PDFError("Unterminated string")
+            start = match.start()
+            out += self.buffer[pos:start]
+            char = self.buffer[start:start + 1]
+            if char == b"\\":
+                escaped = self.buffer[start + 1:start + 2]
+                pos = start + 2
+                if escaped and escaped[0] in _STRING_ESCAPES:
+                    out += _STRING_ESCAPES[escaped[0]]
+                elif escaped.isdigit() and escaped < b"8":
+                    digits = escaped
+                    while len(digits) < 3 and self.buffer[pos:pos + 1].isdigit() and self.buffer[pos:pos + 1] < b"8":
+                        digits += self.buffer[pos:pos + 1]
+                        pos += 1
+                    out.append(int(digits, 8) & 0xFF)
+                elif escaped == b"\r":
+                    if self.buffer[pos:pos + 1] == b"\n":
+                        pos += 1
+                elif escaped != b"\n":
+                    out += escaped
+                continue
+            pos = start + 1
+            if char == b"(":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return bytes(out), pos
+            out += char
+
+    @staticmethod
+    def _decode_name(raw: bytes) -> str:
+        name = raw.decode("latin-1")
+        if "#" in name:
+            name = _NAME_ESCAPE.sub(lambda m: chr(int(m.group(1), 16)), name)
+        return name
+
+class _XrefTable:
+    """A classic xref subsection whose entries are read on demand"""
+
+    def __init__(self, buffer: Any, first: int, count: int, base: int, entry_size: int):
+        self.buffer = buffer
+        self.first = first
+        self.count = count
+        self.base = base
+        self.entry_size = entry_size
+
+    def lookup(self, num: int) -> Optional[Tuple[int, int, int]]:
+        index = num - self.first
+        if not 0 <= index < self.count:
+            return None
+        offset = self.base + index * self.entry_size
+        match = _XREF_ENTRY.match(self.buffer, offset)
+        if not match:
+            return None
+        if match.group(3) == b"f":
+            return (0, 0, 0)
+        return (1, int(match.group(1)), int(match.group(2)))
+
+class _XrefStream:
+    """Decoded rows of a cross-reference stream, unpacked on demand"""
+
+    def __init__(self, data: bytes, widths: List[int], index: List[int]):
+        self.data = data
+        self.widths = widths
+        self.row_size = sum(widths)
+        self.ranges = []
+        row = 0
+        for i in range(0, len(index) - 1, 2):
+            self.ranges.append((index[i], index[i + 1], row))
+            row += index[i + 1]
+
+    def lookup(self, num: int) -> Optional[Tuple[int, int, int]]:
+        for first, count, row in self.ranges:
+            if first <= num < first + count:
+                offset = (row + num - first) * self.row_size
+                if offset + self.row_size > len(self.data):
+                    return None
+                fields = []
+                for width in self.widths:
+                    fields.append(int.from_bytes(self.data[offset:offset + width], "big") if width else None)
+                    offset += width
+                kind = 1 if fields[0] is None else fields[0]
+                return (kind, fields[1] or 0, fields[2] or 0)
+        return None
+
+class PDFDocument:
+    """
+    Lazy, index-based reader for PDF structure
+
+    Only the trailer, cross-reference sections and the objects that are
+    actually requested are read; the rest of the file is never touched, so
+    memory-mapped files of any size open in constant memory.
+    """
+
+    def __init__(self, buffer: Any):
+        """
+        Open a PDF
+
+        Args:
+            buffer: bytes, memoryview or mmap holding the whole file
+
+        Raises:
+            PDFError: If the data is not a readable PDF
+        """
+        if isinstance(buffer, (memoryview, bytearray)):
+            # Only in-memory uploads arrive as views; they are small enough to copy
+            buffer = bytes(buffer)
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.parser = PDFParser(buffer, self)
+        self.repaired = False
+
+        header = bytes(buffer[:1024])
+        marker = header.find(b"%PDF-")
+        if marker < 0:
+            raise PDFError("Missing %PDF header")
+        self.header_version = header[marker + 5:marker + 8].decode("latin-1", "replace")
+
+        self._sections: List[Any] = []
+        self._objects: Dict[int, Any] = {}
+        self._object_streams: Dict[int, Tuple[bytes, Dict[int, int]]] = {}
+        self._scanned: Optional[Dict[int, int]] = None
+        try:
+            self.trailer = self._read_xref_chain(self._find_startxref())
+        except (PDFError, ValueError, IndexError, zlib.error):
+            self.trailer = self._rebuild_index()
+            self.repaired = True
+
+    def _find_startxref(self) -> int:
+        tail_start = max(0, self.size - 2048)
+        tail = bytes(self.buffer[tail_start:])
+        at = tail.rfind(b"startxref")
+        if at < 0:
+            raise PDFError("Missing startxref")
+        match = _NUMBER.search(tail, at + 9)
+        if not match:
+            raise PDFError("Malformed startxref")
+        return int(match.group())
+
+    def _read_xref_chain(self, offset: int) -> Dict[str, Any]:
+        """Read every xref section from newest to oldest, returning the newest trailer"""
+        trailer: Optional[Dict[str, Any]] = None
+        seen = set()
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            if not 0 <= offset < self.size:
+                raise PDFError(f"xref offset {offset} out of range")
+            pos = self.parser.skip(offset)
+            if self.buffer[pos:pos + 4] == b"xref":
+                section_trailer = self._read_xref_table(pos + 4)
+                # Hybrid files point at an additional xref stream
+                hybrid = section_trailer.get("XRefStm")
+                if isinstance(hybrid, int) and hybrid not in seen:
+                    seen.add(hybrid)
+                    self._read_xref_stream(hybrid)
+            else:
+                section_trailer = self._read_xref_stream(pos)
+            if trailer is None:
+                trailer = section_trailer
+            prev = section_trailer.get("Prev")
+            offset = prev if isinstance(prev, int) else None
+        if trailer is None or "Root" not in trailer:
+            raise PDFError("Trailer has no Root")
+        return trailer
+
+    def _read_xref_table(self, pos: int) -> Dict[str, Any]:
+        while True:
+            pos = self.parser.skip(pos)
+            if self.buffer[pos:pos + 7] == b"trailer":
+                trailer, _ = self.parser.parse(pos + 7)
+                if not isinstance(trailer, dict):
+                    raise PDFError("Malformed trailer")
+                return trailer
+            match = _XREF_SUBSECTION.match(self.buffer, pos)
+            if not match:
+                raise PDFError(f"Malformed xref subsection at offset {pos}")
+            first, count = int(match.group(1)), int(match.group(2))
+            base = match.end()
+            entry_size = 20
+            if count > 1 and not _XREF_ENTRY.match(self.buffer, base + entry_size):
+                for candidate in (19, 21):
+                    if _XREF_ENTRY.match(self.buffer, base + candidate):
+                        entry_size = candidate
+                        break
+            self._sections.append(_XrefTable(self.buffer, first, count, base, entry_size))
+            pos = base + count * entry_size
+
+    def _read_xref_stream(self, pos: int) -> Dict[str, Any]:
+        match = _OBJ_HEADER.match(self.buffer, pos)
+        if not match:
+            raise PDFError(f"No xref at offset {pos}")
+        stream, _ = self.parser.parse(match.end())
+        if not isinstance(stream, PDFStream) or stream.dict.get("Type") != "XRef":
+            raise PDFError(f"Object at offset {pos} is not an xref stream")
+        widths = stream.dict.get("W")
+        size = stream.dict.get("Size", 0)
+        index = stream.dict.get("Index", [0, size])
+        self._sections.append(_XrefStream(stream.decode(), widths, index))
+        return stream.dict
+
+    def _rebuild_index(self) -> Dict[str, Any]:
+        """Recover a damaged file by scanning for object headers"""
+        self._sections = []
+        self._scanned = {}
+        for match in _OBJ_SCAN.finditer(self.buffer):
+            self._scanned[int(match.group(1))] = match.start()
+
+        trailer: Dict[str, Any] = {}
+        at = self.buffer.rfind(b"trailer")
+        if at >= 0:
+            try:
+                value, _ = self.parser.parse(at + 7)
+                if isinstance(value, dict):
+                    trailer = value
+            except PDFError:
+                pass
+        if "Root" not in trailer:
+            for num in self._scanned:
+                value = self.get_object(num)
+                if isinstance(value, dict) and value.get("Type") == "Catalog":
+                    trailer["Root"] = PDFRef(num, 0)
+                    break
+        if "Root" not in trailer:
+            raise PDFError("Could not locate the document catalog")
+        return trailer
+
+    def _lookup(self, num: int) -> Optional[Tuple[int, int, int]]:
+        if self._scanned is not None:
+            offset = self._scanned.get(num)
+            return None if offset is None else (1, offset, 0)
+        for section in self._sections:
+            entry = section.lookup(num)
+            if entry is not None:
+                return entry
+        return None
+
+    def get_object(self, num: int) -> Any:
+        """
+        Load an indirect object by number
+
+        Args:
+            num: Object number
+
+        Returns:
+            The object's value, or None if it does not exist
+        """
+        if num in self._objects:
+            return self._objects[num]
+
+        entry = self._lookup(num)
+        value = None
+        if entry is not None and entry[0] == 1:
+            match = _OBJ_HEADER.match(self.buffer, entry[1])
+            if match and int(match.group(1)) == num:
+                value, _ = self.parser.parse(match.end())
+        elif entry is not None and entry[0] == 2:
+            value = self._get_compressed_object(entry[1], entry[2], num)
+
+        self._objects[num] = value
+        return value
+
+    def _get_compressed_object(self, stream_num: int, index: int, num: int) -> Any:
+        cached = self._object_streams.get(stream_num)
+        if cached is None:
+            stream = self.get_object(stream_num)
+            if not isinstance(stream, PDFStream):
+                return None
+            data = stream.decode()
+            first = self.resolve(stream.dict.get("First"))
+            count = self.resolve(stream.dict.get("N"))
+            header = PDFParser(data)
+            offsets = {}
+            pos = 0
+            for _ in range(count):
+                obj_num, pos = header.parse(pos)
+                obj_offset, pos = header.parse(pos)
+                offsets[obj_num] = first + obj_offset
+            cached = self._object_streams[stream_num] = (data, offsets)
+
+        data, offsets = cached
+        if num not in offsets:
+            return None
+        value, _ = PDFParser(data, self).parse(offsets[num])
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        """Follow indirect references until a direct value is reached"""
+        depth = 0
+        while isinstance(value, PDFRef) and depth < 32:
+            value = self.get_object(value.num)
+            depth += 1
+        return value
+
+    @property
+    def catalog(self) -> Dict[str, Any]:
+        catalog = self.resolve(self.trailer.get("Root"))
+        if not isinstance(catalog, dict):
+            raise PDFError("Document catalog is missing")
+        return catalog
+
+    @property
+    def version(self) -> str:
+        """PDF version, taking a catalog /Version override into account"""
+        override = self.resolve(self.catalog.get("Version"))
+        if isinstance(override, str) and override > self.header_version:
+            return override
+        return self.header_version
+
+    @property
+    def encrypted(self) -> bool:
+        return "Encrypt" in self.trailer
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages, from the page tree's /Count or by counting leaves"""
+        pages = self.resolve(self.catalog.get("Pages"))
+        if not isinstance(pages, dict):
+            return 0
+        count = self.resolve(pages.get("Count"))
+        if isinstance(count, int) and count >= 0:
+            return count
+        return sum(1 for _ in self.iter_page_refs())
+
+    def iter_page_refs(self) -> Iterator[Any]:
+        """Yield each page object's reference in document order"""
+        root = self.catalog.get("Pages")
+        stack = [root]
+        seen = set()
+        while stack:
+            node_ref = stack.pop()
+            if isinstance(node_ref, PDFRef):
+                if node_ref.num in seen:
+                    continue
+                seen.add(node_ref.num)
+            node = self.resolve(node_ref)
+            if not isinstance(node, dict):
+                continue
+            kids = self.resolve(node.get("Kids"))
+            if node.get("Type") == "Pages" or isinstance(kids, list):
+                stack.extend(reversed(kids or []))
+            else:
+                yield node_ref
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """Document information dictionary with text strings decoded"""
+        info = self.resolve(self.trailer.get("Info"))
+        if not isinstance(info, dict) or self.encrypted:
+            return {}
+        result = {}
+        for key, value in info.items():
+            value = self.resolve(value)
+            if isinstance(value, (bytes, str, int, float, bool)):
+                result[key] = decode_text_string(value)
+        return result
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Summary of the catalog's XMP metadata stream, if any"""
+        stream = self.resolve(self.catalog.get("Metadata"))
+        if not isinstance(stream, PDFStream):
+            return {}
+        try:
+            xmp = stream.decode()
+        except PDFError:
+            return {"xmp_bytes": stream.length}
+        result: Dict[str, Any] = {"xmp_bytes": len(xmp)}
+        for field, pattern in (
+            ("title", rb"<dc:title>.*?<rdf:li[^>]*>(.*?)</rdf:li>"),
+            ("creator_tool", rb"<xmp:CreatorTool>(.*?)</xmp:CreatorTool>"),
+            ("create_date", rb"<xmp:CreateDate>(.*?)</xmp:CreateDate>"),
+            ("producer", rb"<pdf:Producer>(.*?)</pdf:Producer>"),
+        ):
+            match = re.search(pattern, xmp, re.S)
+            if match:
+                result[field] = match.group(1).decode("utf-8", "replace").strip()
+        return result
@@ -0,0 +1,298 @@
+from typing import Any, Dict, List, Optional
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from agents.pdf_index import MAX_STREAM_BYTES, PDFDocument, PDFError, PDFParser, PDFRef, PDFStream
+
+_OPERATOR = re.compile(rb"[^\x00\t\n\x0c\r ()<>\[\]{}/%]+")
+_INLINE_IMAGE_END = re.compile(rb"[\x00\t\n\x0c\r ]EI(?=[\x00\t\n\x0c\r ]|$)")
+_CMAP_SECTION = re.compile(rb"begin(bfchar|bfrange)(.*?)endbf\1", re.S)
+_CODESPACE = re.compile(rb"begincodespacerange\s*<([0-9A-Fa-f]+)>", re.S)
+_CMAP_TOKEN = re.compile(rb"<[0-9A-Fa-f]*>|\[|\]")
+_NUMBER_START = b"+-.0123456789"
+
+# Pages below this count are extracted in-process; the pool only pays off for larger files
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 32))
+PAGE_WORKERS = int(os.getenv("PDF_TEXT_WORKERS", os.cpu_count() or 1))
+# Most bytes one page's content streams may decode to, all streams together
+MAX_PAGE_BYTES = int(os.getenv("PDF_MAX_PAGE_BYTES", MAX_STREAM_BYTES))
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+def iter_operations(data: bytes):
+    """
+    Tokenize a content stream into (operator, operands) pairs
+
+    Inline image data (BI ... ID ... EI) is skipped.
+    """
+    parser = PDFParser(data)
+    size = len(data)
+    pos = 0
+    operands: List[Any] = []
+    while True:
+        pos = parser.skip(pos)
+        if pos >= size:
+            return
+        char = data[pos:pos + 1]
+        if char in (b"/", b"(", b"[", b"<") or char in _NUMBER_START:
+            try:
+                value, pos = parser.parse(pos)
+            except PDFError:
+                return
+            operands.append(value)
+            continue
+        match = _OPERATOR.match(data, pos)
+        if not match:
+            # Stray delimiter such as ")" or "]"; skip it
+            pos += 1
+            continue
+        operator = match.group()
+        pos = match.end()
+        if operator == b"ID":
+            end = _INLINE_IMAGE_END.search(data, pos)
+            pos = end.end() if end else size
+            operands = []
+            continue
+        if operator in (b"true", b"false", b"null"):
+            operands.append({b"true": True, b"false": False, b"null": None}[operator])
+            continue
+        yield operator, operands
+        operands = []
+
+class FontDecoder:
+    """
+    Maps a font's string bytes to text
+
+    Uses the font's ToUnicode CMap when present, WinAnsi for fonts that
+    declare it, and Latin-1 otherwise.
+    """
+
+    def __init__(self, doc: Optional[PDFDocument] = None, font: Any = None):
+        self.code_length = 1
+        self.mapping: Dict[int, str] = {}
+        self.encoding = "latin-1"
+
+        font = doc.resolve(font) if doc is not None else None
+        if not isinstance(font, dict):
+            return
+        if font.get("Subtype") == "Type0":
+            self.code_length = 2
+        if doc.resolve(font.get("Encoding")) == "WinAnsiEncoding":
+            self.encoding = "cp1252"
+
+        to_unicode = doc.resolve(font.get("ToUnicode"))
+        if isinstance(to_unicode, PDFStream):
+            try:
+                self._load_cmap(to_unicode.decode())
+            except (PDFError, ValueError):
+                self.mapping = {}
+
+    def _load_cmap(self, cmap: bytes) -> None:
+        codespace = _CODESPACE.search(cmap)
+        if codespace:
+            self.code_length = max(1, len(codespace.group(1)) // 2)
+        for kind, body in _CMAP_SECTION.findall(cmap):
+            tokens = _CMAP_TOKEN.findall(body)
+            if kind == b"bfchar":
+                for src, dst in zip(tokens[0::2], tokens[1::2]):
+                    self.mapping[_hex_int(src)] = _utf16(dst)
+                continue
+            i = 0
+            while i + 2 < len(tokens):
+                low, high, target = _hex_int(tokens[i]), _hex_int(tokens[i + 1]), tokens[i + 2]
+                if target == b"[":
+                    i += 3
+                    code = low
+                    while i < len(tokens) and tokens[i] != b"]":
+                        self.mapping[code] = _utf16(tokens[i])
+                        code += 1
+                        i += 1
+                    i += 1
+                else:
+                    digits = target[1:-1]
+                    base = _hex_int(target)
+                    for offset in range(min(high - low, 0xFFFF) + 1):
+                        self.mapping[low + offset] = _utf16(b"<%0*X>" % (len(digits), base + offset))
+                    i += 3
+
+    def decode(self, data: bytes) -> str:
+        if not self.mapping:
+            if self.code_length == 2:
+                return data.decode("utf-16-be", "replace")
+            return data.decode(self.encoding, "replace")
+        step = self.code_length
+        chars = []
+        for i in range(0, len(data) - step + 1, step):
+            chars.append(self.mapping.get(int.from_bytes(data[i:i + step], "big"), ""))
+        return "".join(chars)
+
+def _hex_int(token: bytes) -> int:
+    return int(token[1:-1] or b"0", 16)
+
+def _utf16(token: bytes) -> str:
+    try:
+        return bytes.fromhex(token[1:-1].decode("ascii")).decode("utf-16-be", "replace")
+    except ValueError:
+        return ""
+
+def _page_resources(doc: PDFDocument, page: Dict[str, Any]) -> Dict[str, Any]:
+    """Find a page's resources, inheriting from ancestor page tree nodes"""
+    node = page
+    for _ in range(32):
+        resources = doc.resolve(node.get("Resources"))
+        if isinstance(resources, dict):
+            return resources
+        node = doc.resolve(node.get("Parent"))
+        if not isinstance(node, dict):
+            break
+    return {}
+
+def extract_page_text(doc: PDFDocument, page_ref: Any) -> str:
+    """
+    Extract the text layer of one page
+
+    Args:
+        doc: Open PDFDocument
+        page_ref: Reference to the page object
+
+    Returns:
+        The page's text, one output line per text line
+
+    Raises:
+        PDFError: If the page's content streams decode beyond MAX_PAGE_BYTES together
+    """
+    page = doc.resolve(page_ref)
+    if not isinstance(page, dict):
+        return ""
+
+    contents = doc.resolve(page.get("Contents"))
+    if not isinstance(contents, list):
+        contents = [contents]
+    # All of a page's content streams share one budget, so splitting a
+    # bomb across many streams does not multiply what may be inflated
+    budget = MAX_PAGE_BYTES
+    parts = []
+    for item in contents:
+        stream = doc.resolve(item)
+        if isinstance(stream, PDFStream):
+            parts.append(stream.decode(budget))
+            budget -= len(parts[-1])
+    data = b"\n".join(parts)
+
+    fonts = doc.resolve(_page_resources(doc, page).get("Font")) or {}
+    decoders: Dict[str, FontDecoder] = {}
+    decoder: Optional[FontDecoder] = None
+    lines: List[str] = []
+    line: List[str] = []
+
+    def new_line():
+        if line:
+            lines.append("".join(line).rstrip())
+            line.clear()
+
+    for operator, operands in iter_operations(data):
+        if operator == b"Tf" and operands and isinstance(operands[0], str):
+            name = operands[0]
+            if name not in decoders:
+                decoders[name] = FontDecoder(doc, fonts.get(name) if isinstance(fonts, dict) else None)
+            decoder = decoders[name]
+        elif operator in (b"Tj", b"'", b'"'):
+            if operator != b"Tj":
+                new_line()
+            if operands and isinstance(operands[-1], bytes):
+                line.append((decoder or _DEFAULT_DECODER).decode(operands[-1]))
+        elif operator == b"TJ" and operands and isinstance(operands[0], list):
+            for item in operands[0]:
+                if isinstance(item, bytes):
+                    line.append((decoder or _DEFAULT_DECODER).decode(item))
+                elif isinstance(item, (int, float)) and item < -150:
+                    line.append(" ")
+        elif operator in (b"Td", b"TD") and len(operands) == 2:
+            if operands[1] != 0:
+                new_line()
+            elif operands[0] and line and not line[-1].endswith(" "):
+                line.append(" ")
+        elif operator in (b"T*", b"ET", b"Tm"):
+            new_line()
+    new_line()
+    return "\n".join(lines)
+
+_DEFAULT_DECODER = FontDecoder()
+
+def _extract_range(source: Any, page_refs: List[PDFRef]) -> List[str]:
+    """Worker entry point: open ``source`` (a path or bytes) and extract the given pages"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                doc = PDFDocument(buffer)
+                return _extract_pages(doc, page_refs)
+    return _extract_pages(PDFDocument(source), page_refs)
+
+def _extract_pages(doc: PDFDocument, page_refs: List[Any]) -> List[str]:
+    texts = []
+    for page_ref in page_refs:
+        try:
+            texts.append(extract_page_text(doc, page_ref))
+        except (PDFError, ValueError):
+            texts.append("")
+    return texts
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            # The pool is first needed on a pipeline thread; forking a process
+            # that runs threads can copy held locks into the children, so the
+            # workers are started fresh instead
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _page_pool = ProcessPoolExecutor(max_workers=PAGE_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _page_pool
+
+def shutdown_page_pool() -> None:
+    """Stop the page extraction workers, if any were started"""
+    global _page_pool
+    with _page_pool_lock:
+        pool, _page_pool = _page_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+def extract_text(doc: PDFDocument, page_count: int, path: Optional[str] = None) -> List[str]:
+    """
+    Extract the text of every page, in parallel for large documents
+
+    Large documents are split into page ranges that worker processes
+    extract concurrently, each opening its own memory map of ``path`` and
+    reading only the page objects it was handed.
+
+    Args:
+        doc: Open PDFDocument
+        page_count: Number of pages in the document
+        path: File the document was opened from, if it is on disk
+
+    Returns:
+        List with one text string per page
+    """
+    page_refs = list(islice(doc.iter_page_refs(), page_count))
+    # Page dictionaries inlined in /Kids (invalid, but seen) cannot be looked up by a worker
+    if len(page_refs) < PARALLEL_MIN_PAGES or PAGE_WORKERS < 2 or not all(isinstance(ref, PDFRef) for ref in page_refs):
+        return _extract_pages(doc, page_refs)
+
+    # The page tree is walked once here; workers look each page up by object number.
+    # Workers re-open the file by path; in-memory documents are sent as bytes
+    source = path if path else bytes(doc.buffer)
+    chunk = max(8, -(-len(page_refs) // (PAGE_WORKERS * 2)))
+    pool = _get_page_pool()
+    futures = [
+        pool.submit(_extract_range, source, page_refs[start:start + chunk])
+        for start in range(0, len(page_refs), chunk)
+    ]
+
+    texts: List[str] = []
+    for future in futures:
+        texts.extend(future.result())
+    return texts
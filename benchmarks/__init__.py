@@ -0,0 +1,3 @@
+"""
+Benchmarks for the document processing agents
+"""
\ No newline at end of file
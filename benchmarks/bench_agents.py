@@ -0,0 +1,214 @@
+"""
+Per-agent throughput benchmarks
+
+Runs each agent over synthetic corpora of increasing size, reporting
+docs/sec, bytes/sec and peak traced memory, then measures end-to-end
+latency of the FastAPI endpoints in-process. Results are written as JSON
+so runs can be compared with ``--compare``.
+
+Usage:
+    python -m benchmarks.bench_agents [--quick] [--output FILE] [--compare FILE]
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks import corpus
+
+KB = 1024
+MB = 1024 * 1024
+
+def measure(fn: Callable[[], Any], size_bytes: int, min_time: float = 0.5, max_runs: int = 1000) -> Dict[str, Any]:
+    """
+    Time repeated calls of ``fn`` and trace the peak memory of one call
+
+    Args:
+        fn: Zero-argument callable processing one document
+        size_bytes: Size of the document, for bytes/sec
+        min_time: Keep repeating until this many seconds have elapsed
+        max_runs: Upper bound on repetitions
+
+    Returns:
+        Dict with runs, mean/best seconds, docs/sec, bytes/sec and peak memory
+    """
+    fn()  # warm up
+
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_runs and (not timings or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mean = statistics.mean(timings)
+    return {
+        "size_bytes": size_bytes,
+        "runs": len(timings),
+        "mean_s": mean,
+        "best_s": min(timings),
+        "docs_per_sec": 1 / mean if mean else None,
+        "bytes_per_sec": size_bytes / mean if mean else None,
+        "peak_memory_bytes": peak
+    }
+
+def build_corpora(quick: bool) -> Dict[str, List[Dict[str, Any]]]:
+    """Generate the documents for every agent"""
+    email_sizes = [1 * KB, 64 * KB, 1 * MB] if quick else [1 * KB, 64 * KB, 1 * MB, 10 * MB, 50 * MB]
+    record_counts = [10, 1000] if quick else [10, 1000, 100000]
+    wide_counts = [100] if quick else [100, 10000]
+    depths = [10, 100] if quick else [10, 100, 500]
+    page_counts = [1, 50] if quick else [1, 50, 1000]
+    mailbox_sizes = [100] if quick else [100, 5000]
+
+    emails = [{"name": f"email_{size // KB}kb", "content": corpus.make_email(size)} for size in email_sizes]
+    jsons = (
+        [{"name": f"json_records_{n}", "content": corpus.make_json_records(n)} for n in record_counts]
+        + [{"name": f"json_wide_{n}", "content": corpus.make_json_wide(n)} for n in wide_counts]
+        + [{"name": f"json_nested_{d}", "content": corpus.make_json_nested(d)} for d in depths]
+    )
+    pdfs = [{"name": f"pdf_{n}_pages", "content": corpus.make_pdf(n)} for n in page_counts]
+    mailboxes = [{"name": f"mbox_{n}", "content": corpus.make_mbox(n), "messages": n} for n in mailbox_sizes]
+    return {"EMAIL": emails, "JSON": jsons, "PDF": pdfs, "MBOX": mailboxes}
+
+def bench_agents(corpora: Dict[str, List[Dict[str, Any]]], min_time: float) -> Dict[str, Dict[str, Any]]:
+    """Benchmark the classifier and each format agent directly"""
+    from agents.classifier import ClassifierAgent
+    from agents.email_agent import EmailAgent
+    from agents.json_agent import JSONAgent
+    from agents.mailbox import iter_messages, process_messages
+    from agents.pdf_agent import PDFAgent
+
+    classifier = ClassifierAgent()
+    email_agent = EmailAgent()
+    json_agent = JSONAgent()
+    pdf_agent = PDFAgent()
+
+    results: Dict[str, Dict[str, Any]] = {"ClassifierAgent": {}, "EmailAgent": {}, "JSONAgent": {}, "PDFAgent": {}, "Mailbox": {}}
+    for doc in corpora["EMAIL"] + corpora["JSON"]:
+        content = doc["content"]
+        results["ClassifierAgent"][doc["name"]] = measure(lambda: classifier.classify_input(content), len(content), min_time)
+    for doc in corpora["PDF"]:
+        name = f"{doc['name']}.pdf"
+        results["ClassifierAgent"][doc["name"]] = measure(lambda: classifier.classify_input("", name), len(doc["content"]), min_time)
+
+    for doc in corpora["EMAIL"]:
+        content = doc["content"]
+        results["EmailAgent"][doc["name"]] = measure(lambda: email_agent.extract_email_data(content), len(content), min_time)
+    for doc in corpora["JSON"]:
+        content = doc["content"]
+        results["JSONAgent"][doc["name"]] = measure(lambda: json_agent.extract_json_data(content), len(content), min_time)
+    for doc in corpora["PDF"]:
+        content = doc["content"]
+        results["PDFAgent"][doc["name"]] = measure(lambda: pdf_agent.process_pdf(content), len(content), min_time)
+    for doc in corpora["MBOX"]:
+        content = doc["content"]
+        result = measure(lambda: process_messages(list(iter_messages(content))), len(content), min_time)
+        # One "doc" is the whole mailbox here, so also report per-message throughput
+        result["messages_per_sec"] = result["docs_per_sec"] * doc["messages"]
+        results["Mailbox"][doc["name"]] = result
+
+    for agent, docs in results.items():
+        for name, result in docs.items():
+            print(f"{agent:16} {name:22} {result['docs_per_sec']:12.1f} docs/s {result['bytes_per_sec'] / MB:10.2f} MB/s "
+                  f"peak {result['peak_memory_bytes'] / MB:8.2f} MB"
+                  + (f" {result['messages_per_sec']:10.1f} msgs/s" if "messages_per_sec" in result else ""))
+    return results
+
+def bench_endpoints(corpora: Dict[str, List[Dict[str, Any]]], min_time: float) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Measure end-to-end latency of the HTTP endpoints in-process"""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        print(f"Skipping endpoint benchmarks: {e}")
+        return None
+
+    workdir = tempfile.mkdtemp(prefix="intake-bench-")
+    os.environ["MEMORY_DB_PATH"] = os.path.join(workdir, "history.db")
+    os.environ["RESULT_CACHE_SIZE"] = "0"
+    import main
+
+    results: Dict[str, Dict[str, Any]] = {"/process-text": {}, "/process-file": {}, "/history": {}}
+    with TestClient(main.app) as client:
+        small = [corpora[group][0] for group in ("EMAIL", "JSON", "PDF")]
+        for doc in small:
+            if isinstance(doc["content"], str):
+                content = doc["content"]
+                results["/process-text"][doc["name"]] = measure(
+                    lambda: client.post("/process-text", data={"content": content}), len(content), min_time, 200
+                )
+        for doc in small:
+            content = doc["content"].encode("utf-8") if isinstance(doc["content"], str) else doc["content"]
+            filename = doc["name"] + (".pdf" if doc["name"].startswith("pdf") else ".txt")
+            results["/process-file"][doc["name"]] = measure(
+                lambda: client.post("/process-file", files={"file": (filename, content)}), len(content), min_time, 200
+            )
+        results["/history"]["recent_20"] = measure(lambda: client.get("/history"), 0, min_time, 500)
+        results["/history"]["summary_20"] = measure(lambda: client.get("/history?fields=summary"), 0, min_time, 500)
+        last_id = client.get("/history?fields=summary&limit=1").json()["history"][0]["id"]
+        results["/history"]["delta_empty"] = measure(lambda: client.get(f"/history?fields=summary&since={last_id}"), 0, min_time, 500)
+
+    for endpoint, docs in results.items():
+        for name, result in docs.items():
+            print(f"{endpoint:16} {name:22} {result['mean_s'] * 1000:10.3f} ms mean {result['best_s'] * 1000:10.3f} ms best")
+    return results
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """Print the docs/sec change of every benchmark shared with a saved run"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparison against {baseline_path}:")
+    for section in ("agents", "endpoints"):
+        for group, docs in (current.get(section) or {}).items():
+            for name, result in docs.items():
+                old = ((baseline.get(section) or {}).get(group) or {}).get(name)
+                if not old or not old.get("mean_s"):
+                    continue
+                change = old["mean_s"] / result["mean_s"] - 1
+                print(f"{group:16} {name:22} {change:+8.1%} throughput")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="use small corpora only")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per benchmark")
+    parser.add_argument("--skip-endpoints", action="store_true", help="do not benchmark the HTTP endpoints")
+    parser.add_argument("--output", help="where to write results (default bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    corpora = build_corpora(args.quick)
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "agents": bench_agents(corpora, args.min_time),
+        "endpoints": None if args.skip_endpoints else bench_endpoints(corpora, args.min_time)
+    }
+
+    output = args.output or os.path.join("bench_results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
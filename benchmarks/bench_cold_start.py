@@ -0,0 +1,198 @@
+"""
+Cold-start benchmark
+
+Starts fresh interpreters that import the app, run its lifespan startup
+and serve one ``/process-text`` request, measuring how long that takes.
+The median over several runs is compared against a budget and/or a saved
+run, and the exit status is non-zero on a regression, so it can guard
+startup time in CI.
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs N] [--max-ms MS] [--compare FILE] [--tolerance 0.2]
+"""
+import time
+
+# Taken before any other import so the child's measurement covers them all
+STARTED = time.perf_counter()
+
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_EMAIL = (
+    "From: alice@example.com\n"
+    "Subject: Invoice overdue\n\n"
+    "Hi, please send the updated invoice urgently. Thanks, Alice"
+)
+
+async def _request(app: Any, method: str, path: str, body: bytes = b"", headers: Optional[List[tuple]] = None) -> Dict[str, Any]:
+    """Send one HTTP request straight to an ASGI app, without a server or HTTP client"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+        "headers": [(b"content-length", str(len(body)).encode())] + (headers or [])
+    }
+    sent = False
+    response: Dict[str, Any] = {"status": None, "body": b""}
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+async def _cold_start() -> Dict[str, Any]:
+    """Import the app, start it and serve the first request, timing each step"""
+    sys.path.insert(0, ROOT)
+    import main
+    imported = time.perf_counter()
+
+    events: asyncio.Queue = asyncio.Queue()
+    started = asyncio.Event()
+    await events.put({"type": "lifespan.startup"})
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"].startswith("lifespan.startup."):
+            started.set()
+
+    lifespan = asyncio.ensure_future(main.app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, events.get, send))
+    await started.wait()
+    ready = time.perf_counter()
+
+    body = urlencode({"content": SAMPLE_EMAIL}).encode()
+    response = await _request(main.app, "POST", "/process-text", body, [(b"content-type", b"application/x-www-form-urlencoded")])
+    responded = time.perf_counter()
+
+    report = await _request(main.app, "GET", "/debug/startup")
+    await events.put({"type": "lifespan.shutdown"})
+    await lifespan
+    return {
+        "status": response["status"],
+        "import_ms": (imported - STARTED) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "first_request_ms": (responded - ready) * 1000,
+        "first_response_ms": (responded - STARTED) * 1000,
+        "startup_report": json.loads(report["body"]) if report["status"] == 200 else None
+    }
+
+def run_child(workdir: str) -> Dict[str, Any]:
+    """Run one cold start in a fresh interpreter"""
+    env = dict(os.environ, MEMORY_DB_PATH=os.path.join(workdir, f"history-{time.time_ns()}.db"))
+    env.pop("JOB_DB_PATH", None)
+    launched = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", "--child"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    # Interpreter startup and teardown included
+    result["process_ms"] = (time.perf_counter() - launched) * 1000
+    return result
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of every timing over the runs, plus the last run's startup report"""
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_ms", "startup_ms", "first_request_ms", "first_response_ms", "process_ms")
+    }
+    summary["runs"] = len(runs)
+    summary["startup_report"] = runs[-1]["startup_report"]
+    return summary
+
+def check(summary: Dict[str, Any], max_ms: Optional[float], baseline_path: Optional[str], tolerance: float) -> List[str]:
+    """
+    Compare the median time to first response with the budget and a saved run
+
+    Returns:
+        Failure messages (empty when within both)
+    """
+    failures = []
+    current = summary["first_response_ms"]
+    if max_ms is not None and current > max_ms:
+        failures.append(f"first response after {current:.1f} ms exceeds the {max_ms:.1f} ms budget")
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)["cold_start"]["first_response_ms"]
+        change = current / baseline - 1
+        print(f"Compared with {baseline_path}: {baseline:.1f} ms -> {current:.1f} ms ({change:+.1%})")
+        if change > tolerance:
+            failures.append(f"first response is {change:.1%} slower than {baseline_path} (tolerance {tolerance:.0%})")
+    return failures
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to take the median of")
+    parser.add_argument("--max-ms", type=float, help="fail if the median time to first response exceeds this")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against --compare (0.2 = 20%%)")
+    parser.add_argument("--output", help="where to write results (default bench_results/cold-start-<timestamp>.json)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_cold_start())))
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix="intake-cold-start-")
+    run_child(workdir)  # warm up: compile bytecode and fill the OS file cache
+    runs = []
+    for _ in range(args.runs):
+        run = run_child(workdir)
+        if run["status"] != 200:
+            print(f"/process-text answered {run['status']}")
+            return 1
+        runs.append(run)
+        print(f"import {run['import_ms']:8.1f} ms  startup {run['startup_ms']:6.1f} ms  "
+              f"first request {run['first_request_ms']:6.1f} ms  first response {run['first_response_ms']:8.1f} ms  "
+              f"process {run['process_ms']:8.1f} ms")
+
+    summary = summarize(runs)
+    print(f"\nMedian time to first response: {summary['first_response_ms']:.1f} ms "
+          f"({summary['process_ms']:.1f} ms including interpreter startup)")
+    report = summary["startup_report"] or {"phases": [], "lazy_init_ms": {}}
+    for phase in report["phases"]:
+        print(f"  {phase['phase']:20} {phase['ms']:8.1f} ms")
+    for name, ms in report["lazy_init_ms"].items():
+        print(f"  agent {name:14} {ms:8.1f} ms (on first use)")
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cold_start": summary
+    }
+    output = args.output or os.path.join("bench_results", "cold-start-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    failures = check(summary, args.max_ms, args.compare, args.tolerance)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Synthetic corpora for agent benchmarks
+
+Documents are grown from the samples in ``data/`` so they keep the shape
+the agents are written for, just at controlled sizes.
+"""
+from typing import Any, Dict, List, Optional
+import json
+import os
+import random
+import zlib
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def _read_sample(name: str) -> str:
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def make_email(size: int, seed: int = 0) -> str:
+    """
+    Build an email of roughly ``size`` characters from data/sample_email.txt
+
+    The sample's headers are kept; its body is repeated with varied bullets,
+    phone numbers and addresses until the target size is reached.
+    """
+    rng = random.Random(seed)
+    sample = _read_sample("sample_email.txt")
+    headers, _, body = sample.partition("\n\n")
+    parts = [headers, "\n\n", body]
+    length = len(headers) + 2 + len(body)
+    while length < size:
+        chunk = (
+            f"\n- {rng.randint(1, 999)} units of item {rng.randint(1000, 9999)}"
+            f"\nPlease contact ops{rng.randint(1, 99)}@company.com or ({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}"
+            "\nThank you for the continued support with this order.\n"
+        )
+        parts.append(chunk)
+        length += len(chunk)
+    return "".join(parts)[:max(size, len(sample))]
+
+def make_mbox(messages: int, seed: int = 0) -> bytes:
+    """
+    Build an mbox export of ``messages`` emails based on data/sample_email.txt
+
+    Messages alternate between plain-text and HTML bodies and vary their
+    subject, sender and bullets.
+    """
+    rng = random.Random(seed)
+    sample = _read_sample("sample_email.txt")
+    _, _, body = sample.partition("\n\n")
+    subjects = ["Urgent RFQ for Office Supplies", "Invoice 2024-{n} payment", "Support issue #{n}", "Purchase order {n}"]
+    parts = []
+    for index in range(messages):
+        subject = rng.choice(subjects).format(n=rng.randint(100, 999))
+        bullets = "".join(f"- {rng.randint(1, 500)} units of item {rng.randint(1000, 9999)}\n" for _ in range(rng.randint(1, 5)))
+        text = body.replace("From ", ">From ") + "\n" + bullets
+        if index % 2:
+            content_type = "text/html; charset=utf-8"
+            text = "<html><body><p>" + text.replace("\n", "<br>\n") + "</p></body></html>"
+        else:
+            content_type = "text/plain; charset=utf-8"
+        parts.append(
+            f"From sender{index}@company.com Mon Jan 15 09:00:00 2024\n"
+            f"From: Sender {index} <sender{index}@company.com>\n"
+            f"To: procurement@example.com\n"
+            f"Subject: {subject}\n"
+            f"Date: Mon, 15 Jan 2024 09:00:00 +0000\n"
+            f"Message-ID: <{index}@company.com>\n"
+            f"MIME-Version: 1.0\n"
+            f"Content-Type: {content_type}\n\n"
+            f"{text}\n"
+        )
+    return "".join(parts).encode("utf-8")
+
+def make_json_records(items: int, seed: int = 0) -> str:
+    """Build an invoice like data/sample_data.json with ``items`` line items"""
+    rng = random.Random(seed)
+    data = json.loads(_read_sample("sample_data.json"))
+    line_items = [
+        {"name": f"Widget {i}", "quantity": rng.randint(1, 20), "price": round(rng.uniform(1, 100), 2)}
+        for i in range(items)
+    ]
+    data["items"] = line_items
+    data["total"] = round(sum(item["quantity"] * item["price"] for item in line_items), 2)
+    return json.dumps(data)
+
+def make_json_wide(keys: int, seed: int = 0) -> str:
+    """Build a flat JSON object with ``keys`` top-level fields"""
+    rng = random.Random(seed)
+    data: Dict[str, Any] = json.loads(_read_sample("sample_data.json"))
+    for i in range(keys):
+        data[f"field_{i}_amount" if i % 10 == 0 else f"field_{i}"] = rng.randint(0, 10 ** 6)
+    return json.dumps(data)
+
+def make_json_nested(depth: int) -> str:
+    """Build a JSON object nested ``depth`` levels deep around the sample invoice"""
+    data: Dict[str, Any] = json.loads(_read_sample("sample_data.json"))
+    for level in range(depth):
+        data = {"level": level, "status": "nested", "child": data}
+    return json.dumps(data)
+
+def make_pdf(pages: int, compress: bool = True, seed: int = 0) -> bytes:
+    """
+    Build a valid PDF with ``pages`` pages of invoice text
+
+    Each page carries the text of data/sample_invoice.pdf.txt in a content
+    stream (Flate-compressed when ``compress`` is true) and the file ends
+    with a classic xref table and trailer.
+    """
+    rng = random.Random(seed)
+    lines = [line for line in _read_sample("sample_invoice.pdf.txt").splitlines() if line.strip()]
+    objects: List[Optional[bytes]] = [None, None]  # 1: catalog, 2: page tree
+    page_ids = []
+
+    font_id = len(objects) + 1
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for page in range(pages):
+        text = ["BT", "/F1 11 Tf", "14 TL", "72 760 Td"]
+        for line in lines:
+            line = line.replace("INV-2024-001", f"INV-2024-{page + 1:03d}")
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            text.append(f"({escaped}) Tj T*")
+        text.append(f"(Reference {rng.randint(10 ** 5, 10 ** 6)}) Tj")
+        text.append("ET")
+        stream = "\n".join(text).encode("latin-1", "replace")
+        if compress:
+            stream = zlib.compress(stream)
+            header = b"<< /Length %d /Filter /FlateDecode >>" % len(stream)
+        else:
+            header = b"<< /Length %d >>" % len(stream)
+        objects.append(header + b"\nstream\n" + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+
+    info_id = len(objects) + 1
+    objects.append(b"<< /Title (Synthetic Invoice Batch) /Author (Benchmark Corpus) /Producer (benchmarks.corpus) >>")
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, info_id, xref_offset
+    )
+    return bytes(out)
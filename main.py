@@ -1,20 +1,53 @@
+from utils.startup import StartupReport, find_dotenv
+startup = StartupReport()
+
 import os
-from agents.classifier import ClassifierAgent
-from agents.email_agent import EmailAgent
-from agents.json_agent import JSONAgent
-from agents.pdf_agent import PDFAgent
-from memory.memory_store import MemoryStore
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import json
-from datetime import datetime
-
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv()
-
-app = FastAPI(title="Multi-Format Intake Agent")
+import hashlib
+import time
+import zlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+startup.mark("import fastapi")
+
+from agents import PIPELINE_VERSION
+from agents.classifier import filename_hints
+from agents.pipeline import agent_init_seconds, close_agents, format_group, run_pipeline_timed, streams_json
+from memory.job_store import JobStore
+from memory.memory_store import MemoryStore, render_fragment
+from memory.result_cache import ResultCache
+from memory.search_index import RANK_WINDOW
+from utils.compression import CompressionMiddleware
+from utils.executor import PipelineExecutor, ExecutorSaturated, parse_workers
+from utils.jobs import Job, JobQueue, JobQueueFull
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, StageTimer
+from utils.profiling import ProfileStore, profile_call
+from utils.static_assets import IMMUTABLE, REVALIDATE, StaticAssets
+from utils.upload import MULTIPART_OVERHEAD, MalformedUpload, UploadTooLarge, content_length_exceeds, receive_uploads
+startup.mark("import app modules")
+
+# Load environment variables (python-dotenv is only imported when there is a .env file)
+DOTENV_PATH = find_dotenv(os.path.dirname(os.path.abspath(__file__)))
+if DOTENV_PATH:
+    from dotenv import load_dotenv
+    load_dotenv(DOTENV_PATH)
+startup.mark("load .env")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resume jobs persisted by a previous run before serving requests
+    await jobs.start()
+    startup.mark_ready()
+    yield
+    await jobs.stop()
+    # Let running documents finish, then stop the worker pools
+    await asyncio.to_thread(executor.shutdown)
+    await asyncio.to_thread(close_agents)
+
+app = FastAPI(title="Multi-Format Intake Agent", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -25,926 +58,1020 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress API responses of at least this many bytes (0 disables)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+if COMPRESS_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+startup.mark("create app")
+
+# Upload limits
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 1024 * 1024))
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", 1000))
+MAX_MAILBOX_BYTES = int(os.getenv("MAX_MAILBOX_BYTES", 4 * 1024 * 1024 * 1024))
+MAILBOX_CHUNK_SIZE = int(os.getenv("MAILBOX_CHUNK_SIZE", 200))
+MAX_HISTORY_PAGE = int(os.getenv("MAX_HISTORY_PAGE", 100))
+# Seconds between keep-alive comments on the server-sent event streams
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", 15))
+# Profiling exposes code paths and document-derived data, so it is off unless enabled
+PROFILING = os.getenv("PROFILING", "").strip().lower() in ("1", "true", "yes", "on")
+# Request header asking for a profiled run; empty disables header-triggered profiling
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+
 # Initialize components
-classifier = ClassifierAgent()
-email_agent = EmailAgent()
-json_agent = JSONAgent()
-pdf_agent = PDFAgent()
 memory = MemoryStore()
+static_assets = StaticAssets(os.getenv("STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")))
+executor = PipelineExecutor(
+    workers=parse_workers(os.getenv("PIPELINE_WORKERS", "PDF=2,JSON=4,TEXT=4")),
+    process_groups=[g for g in os.getenv("PIPELINE_PROCESS_FORMATS", "MAILBOX").upper().split(",") if g],
+    queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", 64)),
+    queue_timeout=float(os.getenv("PIPELINE_QUEUE_TIMEOUT", 5))
+)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", 3600)),
+    version=PIPELINE_VERSION
+)
+profiles = ProfileStore(
+    max_profiles=int(os.getenv("PROFILE_STORE_SIZE", 50)),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+)
+
+# Prometheus metrics, rendered by /metrics; gauges are read when scraped
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "intake_stage_seconds",
+    "Time spent in each processing stage (read, decode, classify, extract, store)",
+    ("stage", "format", "intent")
+)
+documents_total = metrics.counter(
+    "intake_documents", "Documents processed", ("source", "format", "intent", "cache")
+)
+bytes_total = metrics.counter(
+    "intake_bytes_processed", "Bytes of documents processed", ("source", "format")
+)
+errors_total = metrics.counter(
+    "intake_errors", "Documents that could not be processed", ("source", "reason")
+)
+# Read without refreshing, so a scrape never waits on the history writer
+metrics.gauge("intake_history_records", "Records in the processing history", lambda: memory.stats(refresh=False)["total_records"])
+metrics.gauge("intake_history_resident_bytes", "Bytes of history held in memory", lambda: memory.stats(refresh=False)["resident_bytes"])
+metrics.gauge("intake_result_cache_entries", "Results held by the result cache", lambda: result_cache.stats()["entries"])
+metrics.gauge(
+    "intake_pipeline_in_flight", "Documents queued or running per worker pool",
+    lambda: {(group,): stats["in_flight"] for group, stats in executor.stats().items()}, ("group",)
+)
+metrics.gauge("intake_jobs_queued", "Async jobs waiting for a worker", lambda: jobs.stats()["queued"])
+metrics.gauge("intake_jobs_running", "Async jobs being processed", lambda: jobs.stats()["running"])
+startup.mark("init components")
+
+def record_document(source: str, timer: StageTimer, classification: dict, size: int, cache_hit: bool) -> None:
+    """Observe a processed document's stage timings and counters"""
+    labels = (classification["format"], classification["intent"])
+    timer.observe(stage_seconds, *labels)
+    documents_total.inc(source, *labels, "hit" if cache_hit else "miss")
+    bytes_total.inc(source, labels[0], amount=size)
+
+async def run_cached_pipeline(digest: str, content_str: str, filename: str = None, raw=None, path: str = None, timer: StageTimer = None, profile_id: str = None) -> tuple:
+    """
+    Run the classify/extract pipeline unless an identical document was seen recently
+
+    Args:
+        digest: SHA-256 hex digest of the document
+        content_str: Decoded text content
+        filename: Optional filename
+        raw: Raw bytes view for binary formats
+        path: Spool file backing ``raw``, if the upload was written to disk
+        timer: Receives the classify and extract stage timings on a cache miss
+        profile_id: Profile the run (skipping the cache lookup) and store it under this id
+
+    Returns:
+        Tuple of (classification, extracted_data, cache_hit)
+    """
+    key = result_cache.key(digest, filename_hints(filename))
+    cached = result_cache.get(key) if profile_id is None else None
+    if cached is not None:
+        return cached[0], cached[1], True
+
+    group = format_group(content_str, filename, raw)
+    if profile_id is not None:
+        (classification, extracted_data, timings), profile = await executor.submit(
+            group, profile_call, run_pipeline_timed, content_str, filename, raw, path
+        )
+        profiles.put(
+            profile_id, profile,
+            filename=filename, format=classification["format"], intent=classification["intent"], stages=timings
+        )
+        # Profiler overhead would skew the stage histograms
+        timer = None
+    else:
+        classification, extracted_data, timings = await executor.submit(
+            group, run_pipeline_timed, content_str, filename, raw, path
+        )
+    if timer is not None:
+        for stage, seconds in timings.items():
+            timer.add(stage, seconds)
+    result_cache.put(key, (classification, extracted_data))
+    return classification, extracted_data, False
+
+def text_digest(content: str) -> str:
+    """SHA-256 hex digest of text content"""
+    return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def saturated_response(e: ExecutorSaturated) -> JSONResponse:
+    """Build the response returned when a pipeline queue is full"""
+    return JSONResponse({
+        "status": "error",
+        "message": str(e)
+    }, status_code=503, headers={"Retry-After": "1"})
 
 @app.get("/", response_class=HTMLResponse)
-async def main_page():
-    return '''
-    <html>
-        <head>
-            <title>Smart Document Processing Assistant</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-            <style>
-                :root {
-                    --primary-color: #4F46E5;
-                    --primary-hover: #4338CA;
-                    --secondary-color: #10B981;
-                    --background-color: #F3F4F6;
-                    --surface-color: #FFFFFF;
-                    --text-primary: #111827;
-                    --text-secondary: #6B7280;
-                    --border-color: #E5E7EB;
-                    --success-color: #059669;
-                    --error-color: #DC2626;
-                }
-
-                * {
-                    margin: 0;
-                    padding: 0;
-                    box-sizing: border-box;
-                }
-
-                body {
-                    font-family: 'Inter', sans-serif;
-                    background-color: var(--background-color);
-                    color: var(--text-primary);
-                    line-height: 1.6;
-                    min-height: 100vh;
-                }
-
-                .app-container {
-                    display: flex;
-                    min-height: 100vh;
-                }
-
-                .sidebar {
-                    width: 320px;
-                    background-color: var(--surface-color);
-                    border-right: 1px solid var(--border-color);
-                    padding: 2rem;
-                    height: 100vh;
-                    position: fixed;
-                    overflow-y: auto;
-                }
-
-                .main-content {
-                    flex: 1;
-                    margin-left: 320px;
-                    padding: 2rem 3rem;
-                }
-
-                .content-wrapper {
-                    max-width: 1200px;
-                    margin: 0 auto;
-                }
-
-                h1 {
-                    font-size: 2rem;
-                    font-weight: 700;
-                    color: var(--primary-color);
-                    margin-bottom: 2rem;
-                }
-
-                h2 {
-                    font-size: 1.5rem;
-                    font-weight: 600;
-                    color: var(--text-primary);
-                    margin-bottom: 1rem;
-                }
-
-                .feature-grid {
-                    display: grid;
-                    grid-template-columns: repeat(3, 1fr);
-                    gap: 2rem;
-                    margin-bottom: 3rem;
-                }
-
-                .feature-card {
-                    background: var(--surface-color);
-                    padding: 2rem;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                    transition: all 0.3s ease;
-                }
-
-                .feature-card:hover {
-                    transform: translateY(-5px);
-                    box-shadow: 0 8px 12px -1px rgba(0, 0, 0, 0.15);
-                }
-
-                .feature-icon {
-                    font-size: 2.5rem;
-                    margin-bottom: 1rem;
-                }
-
-                .feature-title {
-                    font-size: 1.25rem;
-                    font-weight: 600;
-                    margin-bottom: 0.75rem;
-                    color: var(--text-primary);
-                }
-
-                .feature-description {
-                    color: var(--text-secondary);
-                    font-size: 1rem;
-                }
-
-                .main-sections {
-                    display: grid;
-                    grid-template-columns: repeat(2, 1fr);
-                    gap: 2rem;
-                }
-
-                .upload-section, .text-section {
-                    background: var(--surface-color);
-                    padding: 2rem;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                }
-
-                .section-title {
-                    display: flex;
-                    align-items: center;
-                    margin-bottom: 1.5rem;
-                }
-
-                .section-title .icon {
-                    font-size: 1.5rem;
-                    margin-right: 0.75rem;
-                }
-
-                input[type="file"] {
-                    width: 100%;
-                    padding: 1.5rem;
-                    border: 2px dashed var(--border-color);
-                    border-radius: 8px;
-                    margin: 1rem 0;
-                    cursor: pointer;
-                    transition: border-color 0.3s ease;
-                }
-
-                input[type="file"]:hover {
-                    border-color: var(--primary-color);
-                }
-
-                textarea {
-                    width: 100%;
-                    padding: 1rem;
-                    border: 2px solid var(--border-color);
-                    border-radius: 8px;
-                    margin: 1rem 0;
-                    min-height: 200px;
-                    font-family: inherit;
-                    font-size: 1rem;
-                    resize: vertical;
-                    transition: border-color 0.3s ease;
-                }
-
-                textarea:focus {
-                    outline: none;
-                    border-color: var(--primary-color);
-                }
-
-                button {
-                    background: var(--primary-color);
-                    color: white;
-                    border: none;
-                    padding: 0.875rem 1.75rem;
-                    border-radius: 8px;
-                    font-weight: 500;
-                    font-size: 1rem;
-                    cursor: pointer;
-                    transition: all 0.3s ease;
-                    width: 100%;
-                }
-
-                button:hover {
-                    background: var(--primary-hover);
-                    transform: translateY(-1px);
-                }
-
-                .results-box {
-                    display: none;
-                    background: var(--surface-color);
-                    border-radius: 12px;
-                    padding: 2rem;
-                    margin: 2rem 0;
-                    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                }
-
-                .results-box.success {
-                    border-left: 4px solid var(--success-color);
-                }
-
-                .results-box.error {
-                    border-left: 4px solid var(--error-color);
-                }
-
-                .results-header {
-                    display: flex;
-                    align-items: center;
-                    margin-bottom: 1.5rem;
-                    padding-bottom: 1rem;
-                    border-bottom: 1px solid var(--border-color);
-                }
-
-                .results-header h3 {
-                    font-size: 1.25rem;
-                    font-weight: 600;
-                    color: var(--text-primary);
-                }
-
-                .results-content {
-                    font-family: 'Monaco', monospace;
-                    font-size: 0.9rem;
-                    line-height: 1.6;
-                    white-space: pre-wrap;
-                    background: var(--background-color);
-                    padding: 1.5rem;
-                    border-radius: 8px;
-                }
-
-                .history-section {
-                    margin-top: 2rem;
-                }
-
-                .history-box {
-                    background: var(--surface-color);
-                    border-radius: 12px;
-                    overflow: hidden;
-                }
-
-                .history-item {
-                    padding: 1rem;
-                    border-bottom: 1px solid var(--border-color);
-                    cursor: pointer;
-                    transition: background-color 0.3s ease;
-                }
-
-                .history-item:hover {
-                    background-color: var(--background-color);
-                }
-
-                .history-item .title {
-                    font-weight: 600;
-                    color: var(--text-primary);
-                    margin-bottom: 0.5rem;
-                }
-
-                .history-item .time {
-                    font-size: 0.875rem;
-                    color: var(--text-secondary);
-                }
-
-                .history-item .summary {
-                    display: none;
-                    margin-top: 1rem;
-                    padding: 1rem;
-                    background: var(--background-color);
-                    border-radius: 8px;
-                    font-family: 'Monaco', monospace;
-                    font-size: 0.875rem;
-                }
-
-                .loading {
-                    display: none;
-                    text-align: center;
-                    padding: 2rem;
-                }
-
-                .loading:after {
-                    content: "⚙️ Processing...";
-                    font-size: 1.2rem;
-                    color: var(--text-secondary);
-                }
-
-                .scroll-to-results {
-                    position: fixed;
-                    bottom: 2rem;
-                    right: 2rem;
-                    background: var(--secondary-color);
-                    color: white;
-                    width: 3.5rem;
-                    height: 3.5rem;
-                    border-radius: 50%;
-                    display: none;
-                    align-items: center;
-                    justify-content: center;
-                    font-size: 1.5rem;
-                    cursor: pointer;
-                    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                    transition: all 0.3s ease;
-                }
-
-                .scroll-to-results:hover {
-                    transform: translateY(-2px);
-                    background: var(--success-color);
-                    box-shadow: 0 6px 8px -1px rgba(0, 0, 0, 0.15);
-                }
-
-                /* Responsive Design */
-                @media (max-width: 1024px) {
-                    .app-container {
-                        display: block;
-                    }
-
-                    .sidebar {
-                        position: static;
-                        width: 100%;
-                        height: auto;
-                        border-right: none;
-                        border-bottom: 1px solid var(--border-color);
-                        padding: 1.5rem;
-                    }
-
-                    .main-content {
-                        margin-left: 0;
-                        padding: 1.5rem;
-                    }
-
-                    .content-wrapper {
-                        max-width: 900px;
-                    }
-
-                    .feature-grid {
-                        grid-template-columns: repeat(3, 1fr);
-                        gap: 1.5rem;
-                    }
-
-                    .main-sections {
-                        grid-template-columns: 1fr 1fr;
-                        gap: 1.5rem;
-                    }
-                }
-
-                @media (max-width: 768px) {
-                    .feature-grid {
-                        grid-template-columns: repeat(2, 1fr);
-                        gap: 1rem;
-                    }
-
-                    .main-sections {
-                        grid-template-columns: 1fr;
-                        gap: 1.5rem;
-                    }
-
-                    .feature-card {
-                        padding: 1.5rem;
-                    }
-
-                    .feature-icon {
-                        font-size: 2rem;
-                    }
-
-                    h1 {
-                        font-size: 1.75rem;
-                    }
-
-                    h2 {
-                        font-size: 1.25rem;
-                    }
-
-                    .upload-section, .text-section {
-                        padding: 1.5rem;
-                    }
-                }
-
-                @media (max-width: 480px) {
-                    body {
-                        font-size: 14px;
-                    }
-
-                    .sidebar {
-                        padding: 1rem;
-                    }
-
-                    .main-content {
-                        padding: 1rem;
-                    }
-
-                    .feature-grid {
-                        grid-template-columns: 1fr;
-                        gap: 1rem;
-                    }
-
-                    .feature-card {
-                        padding: 1.25rem;
-                    }
-
-                    .feature-icon {
-                        font-size: 1.75rem;
-                        margin-bottom: 0.75rem;
-                    }
-
-                    .feature-title {
-                        font-size: 1.1rem;
-                    }
-
-                    .upload-section, .text-section {
-                        padding: 1.25rem;
-                    }
-
-                    input[type="file"] {
-                        padding: 1rem;
-                    }
-
-                    textarea {
-                        min-height: 150px;
-                    }
-
-                    button {
-                        padding: 0.75rem 1.5rem;
-                    }
-
-                    .results-box {
-                        padding: 1.25rem;
-                        margin: 1rem 0;
-                    }
-
-                    .results-content {
-                        padding: 1rem;
-                        font-size: 0.85rem;
-                    }
-
-                    .history-item {
-                        padding: 0.75rem;
-                    }
-
-                    .history-item .title {
-                        font-size: 0.9rem;
-                    }
-
-                    .history-item .time {
-                        font-size: 0.8rem;
-                    }
-
-                    .scroll-to-results {
-                        width: 3rem;
-                        height: 3rem;
-                        font-size: 1.25rem;
-                        bottom: 1rem;
-                        right: 1rem;
-                    }
-                }
-
-                /* Handle very small screens */
-                @media (max-width: 320px) {
-                    .sidebar {
-                        padding: 0.75rem;
-                    }
-
-                    .main-content {
-                        padding: 0.75rem;
-                    }
-
-                    h1 {
-                        font-size: 1.5rem;
-                        margin-bottom: 1rem;
-                    }
-
-                    .feature-card {
-                        padding: 1rem;
-                    }
-
-                    .upload-section, .text-section {
-                        padding: 1rem;
-                    }
-
-                    input[type="file"] {
-                        padding: 0.75rem;
-                    }
-
-                    button {
-                        padding: 0.5rem 1rem;
-                    }
-                }
-
-                /* Handle landscape orientation on mobile */
-                @media (max-width: 900px) and (orientation: landscape) {
-                    .sidebar {
-                        padding: 1rem;
-                    }
-
-                    .feature-grid {
-                        grid-template-columns: repeat(3, 1fr);
-                        gap: 1rem;
-                    }
-
-                    .main-sections {
-                        grid-template-columns: 1fr 1fr;
-                        gap: 1rem;
-                    }
-
-                    textarea {
-                        min-height: 120px;
-                    }
-                }
-
-                /* Handle high-DPI mobile screens */
-                @media (-webkit-min-device-pixel-ratio: 2), (min-resolution: 192dpi) {
-                    .feature-card, .upload-section, .text-section, .results-box {
-                        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.08);
-                    }
-
-                    input[type="file"], textarea {
-                        border-width: 1px;
-                    }
-                }
-
-                /* Improve touch targets on mobile */
-                @media (hover: none) and (pointer: coarse) {
-                    button, .history-item, input[type="file"] {
-                        min-height: 44px;
-                    }
-
-                    .feature-card {
-                        transform: none !important;
-                    }
-
-                    .scroll-to-results:active {
-                        transform: scale(0.95);
-                    }
-                }
-            </style>
-        </head>
-        <body>
-            <div class="app-container">
-                <aside class="sidebar">
-                    <h1>Document Processing Assistant</h1>
-                    <div class="history-section">
-                        <h2>📊 Processing History</h2>
-                        <div id="historyBox" class="history-box"></div>
-                    </div>
-                </aside>
-
-                <main class="main-content">
-                    <div class="content-wrapper">
-                        <div class="feature-grid">
-                            <div class="feature-card">
-                                <div class="feature-icon">📄</div>
-                                <div class="feature-title">Multiple Formats</div>
-                                <div class="feature-description">Process PDF, JSON, Email, and Text files with ease</div>
-                            </div>
-                            <div class="feature-card">
-                                <div class="feature-icon">🔍</div>
-                                <div class="feature-title">Smart Analysis</div>
-                                <div class="feature-description">Extract key information and classify content automatically</div>
-                            </div>
-                            <div class="feature-card">
-                                <div class="feature-icon">📊</div>
-                                <div class="feature-title">Organized Results</div>
-                                <div class="feature-description">Get clean summaries and structured data instantly</div>
-                            </div>
-                        </div>
-
-                        <div class="main-sections">
-                            <div class="upload-section">
-                                <div class="section-title">
-                                    <span class="icon">📁</span>
-                                    <h2>Upload Document</h2>
-                                </div>
-                                <p>Drag & drop or select a file to process (PDF, JSON, or text file)</p>
-                                <form id="uploadForm">
-                                    <input type="file" name="file" required>
-                                    <button type="submit">Process Document</button>
-                                </form>
-                            </div>
-
-                            <div class="text-section">
-                                <div class="section-title">
-                                    <span class="icon">📝</span>
-                                    <h2>Process Text</h2>
-                                </div>
-                                <p>Paste your email or text content below</p>
-                                <form id="textForm">
-                                    <textarea name="content" placeholder="Paste email or text content here..."></textarea>
-                                    <button type="submit">Process Text</button>
-                                </form>
-                            </div>
-                        </div>
-
-                        <div id="loading" class="loading"></div>
-                        
-                        <div id="resultsBox" class="results-box">
-                            <div class="results-header">
-                                <h3>Processing Results</h3>
-                            </div>
-                            <div id="resultsContent" class="results-content"></div>
-                        </div>
-                    </div>
-                </main>
-            </div>
-
-            <button id="scrollToResults" class="scroll-to-results" onclick="scrollToResults()" title="Scroll to Results">⬆️</button>
-
-            <script>
-                function formatResults(data) {
-                    if (data.status === "error") {
-                        return "❌ Error: " + data.message;
-                    }
-
-                    let output = [];
-                    
-                    if (data.summary) {
-                        output.push(data.summary.status);
-                        output.push("Document Type: " + data.summary.document_type);
-                        if (data.classification && data.classification.intent) {
-                            output.push("Intent: " + data.classification.intent);
-                        }
-                        if (data.summary.timestamp) {
-                            output.push("Processed: " + data.summary.timestamp);
-                        }
-                    }
-
-                    if (data.details) {
-                        if (data.details.subject) {
-                            output.push("\\nSubject: " + data.details.subject);
-                        }
-                        if (data.details.key_requests && data.details.key_requests.length > 0) {
-                            output.push("\\nKey Requests:");
-                            data.details.key_requests.forEach(req => {
-                                output.push("  • " + req);
-                            });
-                        }
-                        if (data.details.contact_info && data.details.contact_info.length > 0) {
-                            output.push("\\nContact Information:");
-                            data.details.contact_info.forEach(contact => {
-                                output.push("  • " + contact);
-                            });
-                        }
-                    }
-
-                    if (data.metrics) {
-                        output.push("\\nMetrics:");
-                        Object.entries(data.metrics).forEach(([key, value]) => {
-                            output.push("  • " + key + ": " + value);
-                        });
-                    }
-
-                    if (data.suggested_action) {
-                        output.push("\\n" + data.suggested_action);
-                    }
-
-                    return output.join("\\n");
-                }
-
-                function scrollToResults() {
-                    const resultsBox = document.getElementById("resultsBox");
-                    resultsBox.scrollIntoView({ behavior: "smooth" });
-                }
-
-                function getHistoryTitle(item) {
-                    const data = typeof item.extracted_data === 'string' 
-                        ? JSON.parse(item.extracted_data) 
-                        : item.extracted_data;
-                    
-                    if (item.input_type.toLowerCase() === 'email') {
-                        if (data.details && data.details.subject) {
-                            return `📧 ${data.details.subject}`;
-                        }
-                        return '📧 Email Document';
-                    } else if (item.input_type.toLowerCase() === 'pdf') {
-                        return `📄 ${item.source_info}`;
-                    } else if (item.input_type.toLowerCase() === 'json') {
-                        return '🔧 JSON Document';
-                    }
-                    return `📝 ${item.source_info}`;
-                }
-
-                function toggleSummary(itemId) {
-                    const summaryElement = document.getElementById(`summary-${itemId}`);
-                    const allSummaries = document.querySelectorAll('.summary');
-                    
-                    // Hide all other summaries
-                    allSummaries.forEach(summary => {
-                        if (summary.id !== `summary-${itemId}`) {
-                            summary.style.display = 'none';
-                        }
-                    });
-                    
-                    // Toggle clicked summary
-                    if (summaryElement) {
-                        summaryElement.style.display = 
-                            summaryElement.style.display === 'none' ? 'block' : 'none';
-                    }
-                }
-
-                async function updateHistory() {
-                    try {
-                        const response = await fetch("/history");
-                        const data = await response.json();
-                        const historyBox = document.getElementById("historyBox");
-                        
-                        if (data.history && data.history.length > 0) {
-                            const historyHtml = data.history.map(item => {
-                                const extractedData = typeof item.extracted_data === 'string' 
-                                    ? JSON.parse(item.extracted_data) 
-                                    : item.extracted_data;
-                                
-                                const title = getHistoryTitle(item);
-                                const formattedTime = new Date(item.timestamp).toLocaleString();
-                                
-                                return `
-                                    <div class="history-item" onclick="toggleSummary('${item.id}')">
-                                        <div class="title">${title}</div>
-                                        <div class="time">${formattedTime}</div>
-                                        <div id="summary-${item.id}" class="summary">
-${formatResults(extractedData)}
-                                        </div>
-                                    </div>
-                                `;
-                            }).join('');
-                            
-                            historyBox.innerHTML = historyHtml;
-                        } else {
-                            historyBox.innerHTML = "<p>No processing history yet</p>";
-                        }
-                    } catch (error) {
-                        console.error("Error loading history:", error);
-                        historyBox.innerHTML = "<p>❌ Error loading history</p>";
-                    }
-                }
-
-                async function handleFormSubmit(event, formId, endpoint) {
-                    event.preventDefault();
-                    
-                    const form = document.getElementById(formId);
-                    const loading = document.getElementById("loading");
-                    const resultsBox = document.getElementById("resultsBox");
-                    const resultsContent = document.getElementById("resultsContent");
-                    const scrollButton = document.getElementById("scrollToResults");
-
-                    loading.style.display = "block";
-                    resultsBox.style.display = "none";
-                    scrollButton.style.display = "none";
-
-                    try {
-                        const formData = new FormData(form);
-                        const response = await fetch(endpoint, {
-                            method: "POST",
-                            body: formData
-                        });
-                        
-                        const data = await response.json();
-                        
-                        loading.style.display = "none";
-                        resultsBox.style.display = "block";
-                        resultsBox.className = "results-box " + (data.status === "error" ? "error" : "success");
-                        resultsContent.textContent = formatResults(data);
-                        scrollButton.style.display = "block";
-                        scrollToResults();
-                        
-                        // Update history after processing
-                        updateHistory();
-                    } catch (error) {
-                        loading.style.display = "none";
-                        resultsBox.style.display = "block";
-                        resultsBox.className = "results-box error";
-                        resultsContent.textContent = "❌ Error: " + error.message;
-                        scrollButton.style.display = "block";
-                        scrollToResults();
-                    }
-                }
-
-                // Add event listeners
-                document.getElementById("uploadForm").addEventListener("submit", (e) => handleFormSubmit(e, "uploadForm", "/process-file"));
-                document.getElementById("textForm").addEventListener("submit", (e) => handleFormSubmit(e, "textForm", "/process-text"));
-                
-                // Load initial history
-                updateHistory();
-            </script>
-        </body>
-    </html>
-    '''
+async def main_page(request: Request):
+    return static_assets.index.response(request, REVALIDATE)
 
-@app.post("/process-file")
-async def process_file(file: UploadFile = File(...)):
-    """Process uploaded file"""
-    try:
-        content = await file.read()
-        
-        # For text-based files, decode content
-        if not file.filename.lower().endswith('.pdf'):
+@app.get("/static/{name}")
+async def static_asset(request: Request, name: str):
+    asset = static_assets.get(name)
+    if asset is None:
+        return JSONResponse({
+            "status": "error",
+            "message": "Asset not found"
+        }, status_code=404)
+    return asset.response(request, IMMUTABLE)
+
+async def analyze_upload(upload, profile: bool = False) -> tuple:
+    """
+    Run an ingested upload through the pipeline and record it in history
+
+    Args:
+        upload: IngestedUpload to process
+        profile: Profile the pipeline run (sampled runs are profiled too)
+
+    Returns:
+        Tuple of (response body, cache_hit)
+    """
+    timer = StageTimer()
+    timer.add("read", upload.read_seconds)
+    content = upload.view()
+    
+    # For text-based files, decode content (large JSON is parsed straight from the bytes)
+    with timer.stage("decode"):
+        if streams_json(content, upload.filename):
+            content_str = ""
+        elif not upload.filename.lower().endswith('.pdf'):
             try:
-                content_str = content.decode('utf-8')
+                content_str = upload.text()
             except UnicodeDecodeError:
-                return JSONResponse({
-                    "status": "error",
-                    "message": "Invalid file encoding"
-                })
+                raise ValueError("Invalid file encoding")
         else:
             content_str = "Binary PDF content"
-        
-        # Step 1: Classify
-        classification = classifier.classify_input(content_str, file.filename)
-        
-        # Step 2: Route to appropriate agent
-        if classification["format"].upper() == "JSON":
-            extracted_data = json_agent.extract_json_data(content_str)
-        elif classification["format"].upper() == "EMAIL":
-            extracted_data = email_agent.extract_email_data(content_str)
-        elif classification["format"].upper() == "PDF":
-            extracted_data = pdf_agent.process_pdf(content)
+    
+    # Step 1 + 2: Classify and route to the appropriate agent off the event loop
+    profile_id = new_profile_id(profile)
+    classification, extracted_data, cache_hit = await run_cached_pipeline(
+        upload.sha256, content_str, upload.filename, content, upload.path, timer, profile_id
+    )
+    
+    # Step 3: Store in memory (repeated documents are only recorded once)
+    if not cache_hit:
+        with timer.stage("store"):
+            memory.store_data(
+                input_type=classification["format"],
+                intent=classification["intent"],
+                extracted_data=extracted_data,
+                source_info=upload.filename,
+                size_bytes=upload.size
+            )
+    record_document("file", timer, classification, upload.size, cache_hit)
+    
+    # Add classification info to response
+    response_data = {
+        "status": "success",
+        "classification": classification,
+        "sha256": upload.sha256,
+        **extracted_data
+    }
+    if profile_id is not None:
+        response_data["profile_id"] = profile_id
+    return response_data, cache_hit
+
+async def analyze_text(content: str, profile: bool = False) -> tuple:
+    """
+    Run direct text input through the pipeline and record it in history
+
+    Args:
+        content: Text to process
+        profile: Profile the pipeline run (sampled runs are profiled too)
+
+    Returns:
+        Tuple of (response body, cache_hit)
+    """
+    timer = StageTimer()
+    # Step 1 + 2: Classify and route to the appropriate agent off the event loop
+    profile_id = new_profile_id(profile)
+    classification, extracted_data, cache_hit = await run_cached_pipeline(
+        text_digest(content), content, timer=timer, profile_id=profile_id
+    )
+    
+    # isascii() is O(1) on CPython, so the UTF-8 length is only computed for non-ASCII text
+    size = len(content) if content.isascii() else len(content.encode('utf-8', 'surrogatepass'))
+
+    # Step 3: Store in memory (repeated documents are only recorded once)
+    if not cache_hit:
+        with timer.stage("store"):
+            memory.store_data(
+                input_type=classification["format"],
+                intent=classification["intent"],
+                extracted_data=extracted_data,
+                source_info="Direct text input",
+                size_bytes=size
+            )
+    record_document("text", timer, classification, size, cache_hit)
+    
+    # Add classification info to response
+    response_data = {
+        "status": "success",
+        "classification": classification,
+        **extracted_data
+    }
+    if profile_id is not None:
+        response_data["profile_id"] = profile_id
+    return response_data, cache_hit
+
+async def run_job(job: Job, source) -> dict:
+    """Job queue handler: process a queued upload or text document"""
+    try:
+        if job.kind == "text":
+            response_data, _ = await analyze_text(source)
         else:
-            extracted_data = {
-                "summary": {
-                    "status": "✅ PROCESSED SUCCESSFULLY",
-                    "document_type": "TEXT",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                },
-                "details": {
-                    "content_preview": content_str[:200] + "..."
-                }
-            }
-        
-        # Step 3: Store in memory
-        memory.store_data(
-            input_type=classification["format"],
-            intent=classification["intent"],
-            extracted_data=extracted_data,
-            source_info=file.filename
-        )
-        
-        # Add classification info to response
-        response_data = {
-            "status": "success",
-            "classification": classification,
-            **extracted_data
-        }
-        
-        return JSONResponse(response_data)
+            response_data, _ = await analyze_upload(source)
+    except ExecutorSaturated:
+        # Retried by the queue
+        raise
+    except Exception:
+        errors_total.inc(job.kind, "job_failed")
+        raise
+    return response_data
+
+jobs = JobQueue(
+    run_job,
+    workers=int(os.getenv("JOB_WORKERS", 4)),
+    max_queued=int(os.getenv("JOB_QUEUE_SIZE", 1000)),
+    retention=int(os.getenv("JOB_RETENTION", 1000)),
+    store=JobStore(os.getenv("JOB_DB_PATH")) if os.getenv("JOB_DB_PATH") else None,
+    spool_dir=os.getenv("JOB_SPOOL_DIR", "job-spool"),
+    spool_bytes=UPLOAD_SPOOL_BYTES,
+    retry_on=(ExecutorSaturated,),
+    max_retries=int(os.getenv("JOB_MAX_RETRIES", 20))
+)
+
+async def enqueue_job(kind: str, source, filename: str = None) -> JSONResponse:
+    """Queue a document on the job queue and answer 202 with its job id"""
+    try:
+        job = await jobs.submit(kind, source, filename)
+    except JobQueueFull as e:
+        errors_total.inc(kind, "queue_full")
+        if kind == "file":
+            source.close()
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=503, headers={"Retry-After": "1"})
+    return JSONResponse({
+        "status": "accepted",
+        "job_id": job.id,
+        "job_url": f"/jobs/{job.id}"
+    }, status_code=202, headers={"Location": f"/jobs/{job.id}"})
+
+def profile_requested(request: Request) -> bool:
+    """Whether the client asked for this request's pipeline run to be profiled"""
+    return bool(PROFILE_HEADER) and request.headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+
+def new_profile_id(requested: bool) -> str:
+    """Id to profile a pipeline run under, or None when it is not profiled (always when PROFILING is off)"""
+    if PROFILING and (requested or profiles.sampled()):
+        return profiles.new_id()
+    return None
+
+def profiling_disabled() -> JSONResponse:
+    """404 for the /debug/profiles routes while PROFILING is off, as if they did not exist"""
+    return JSONResponse({
+        "status": "error",
+        "message": "Not Found"
+    }, status_code=404)
+
+async def receive_file(request: Request, max_bytes: int):
+    """
+    Receive the one "file" field of a multipart upload, enforcing ``max_bytes`` as it streams in
+
+    A declared Content-Length over the limit is rejected before any of the
+    body is read.
+
+    Raises:
+        UploadTooLarge: If the file is larger than ``max_bytes``
+        MalformedUpload: If the body is not multipart or has no "file" field
+    """
+    if content_length_exceeds(request.headers, max_bytes + MULTIPART_OVERHEAD):
+        raise UploadTooLarge(max_bytes)
+    uploads = await receive_uploads(
+        request.headers.get("content-type", ""), request.stream(), "file", max_bytes, UPLOAD_SPOOL_BYTES, max_files=1
+    )
+    if not uploads:
+        raise MalformedUpload("Missing 'file' upload")
+    return uploads[0]
+
+def analyzed_response(response_data: dict, cache_hit: bool) -> JSONResponse:
+    """Build the response for a processed document"""
+    headers = {"X-Cache": "HIT" if cache_hit else "MISS"}
+    if "profile_id" in response_data:
+        headers["X-Profile-Id"] = response_data["profile_id"]
+    return JSONResponse(response_data, headers=headers)
+
+@app.post("/process-file")
+async def process_file(request: Request, mode: str = "sync"):
+    """
+    Process uploaded file
+
+    With ``?mode=async`` the upload is queued and a job id is returned
+    right away; poll ``/jobs/{id}`` or listen on ``/jobs/events``.
+    """
+    try:
+        upload = await receive_file(request, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        errors_total.inc("file", "too_large")
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=413)
+    except MalformedUpload as e:
+        errors_total.inc("file", "error")
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=400)
+
+    if mode == "async":
+        return await enqueue_job("file", upload, upload.filename)
+
+    try:
+        response_data, cache_hit = await analyze_upload(upload, profile_requested(request))
+        return analyzed_response(response_data, cache_hit)
         
+    except ExecutorSaturated as e:
+        errors_total.inc("file", "saturated")
+        return saturated_response(e)
     except Exception as e:
+        errors_total.inc("file", "error")
         return JSONResponse({
             "status": "error",
             "message": str(e)
         })
+    finally:
+        upload.close()
 
 @app.post("/process-text")
-async def process_text(content: str = Form(...)):
-    """Process text content"""
+async def process_text(request: Request, content: str = Form(...), mode: str = "sync"):
+    """Process text content (``?mode=async`` queues it as a job)"""
+    if mode == "async":
+        return await enqueue_job("text", content)
+
     try:
-        # Step 1: Classify
-        classification = classifier.classify_input(content)
+        response_data, cache_hit = await analyze_text(content, profile_requested(request))
+        return analyzed_response(response_data, cache_hit)
         
-        # Step 2: Route to appropriate agent
-        if classification["format"].upper() == "EMAIL":
-            extracted_data = email_agent.extract_email_data(content)
-        elif classification["format"].upper() == "JSON":
-            extracted_data = json_agent.extract_json_data(content)
+    except ExecutorSaturated as e:
+        errors_total.inc("text", "saturated")
+        return saturated_response(e)
+    except Exception as e:
+        errors_total.inc("text", "error")
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        })
+
+async def process_batch_item(index: int, source: str, limit, content_str: str = None, upload=None) -> tuple:
+    """
+    Run one batch document through the pipeline
+
+    Args:
+        index: Position of the document in the batch
+        source: Filename or source label
+        limit: Returns the batch's semaphore for a worker pool group
+        content_str: Text document (NDJSON batches)
+        upload: IngestedUpload (multipart batches)
+
+    Returns:
+        Tuple of (NDJSON result line, history entry or None)
+    """
+    try:
+        filename = upload.filename if upload is not None else None
+        raw = path = None
+        if upload is not None:
+            digest = upload.sha256
+            size = upload.size
+            raw = upload.view()
+            path = upload.path
+            if streams_json(raw, filename):
+                content_str = ""
+            elif not filename.lower().endswith('.pdf'):
+                try:
+                    content_str = upload.text()
+                except UnicodeDecodeError:
+                    return {"index": index, "source": source, "status": "error", "message": "Invalid file encoding"}, None
+            else:
+                content_str = "Binary PDF content"
         else:
-            extracted_data = {
-                "summary": {
-                    "status": "✅ PROCESSED SUCCESSFULLY",
-                    "document_type": "TEXT",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                },
-                "details": {
-                    "content_preview": content[:200] + "..."
-                }
-            }
-        
-        # Step 3: Store in memory
-        memory.store_data(
-            input_type=classification["format"],
-            intent=classification["intent"],
-            extracted_data=extracted_data,
-            source_info="Direct text input"
-        )
-        
-        # Add classification info to response
-        response_data = {
-            "status": "success",
-            "classification": classification,
-            **extracted_data
+            digest = text_digest(content_str)
+            size = len(content_str) if content_str.isascii() else len(content_str.encode('utf-8', 'surrogatepass'))
+
+        async with limit(format_group(content_str, filename, raw)):
+            classification, extracted_data, cache_hit = await run_cached_pipeline(digest, content_str, filename, raw, path)
+    except Exception as e:
+        return {"index": index, "source": source, "status": "error", "message": str(e)}, None
+    finally:
+        if upload is not None:
+            upload.close()
+
+    entry = None
+    if not cache_hit:
+        entry = {
+            "input_type": classification["format"],
+            "intent": classification["intent"],
+            "extracted_data": extracted_data,
+            "source_info": source,
+            "size_bytes": size
         }
-        
-        return JSONResponse(response_data)
-        
+    line = {
+        "index": index,
+        "source": source,
+        "status": "success",
+        "cached": cache_hit,
+        "classification": classification,
+        **extracted_data
+    }
+    return line, entry
+
+async def read_ndjson_documents(request: Request) -> list:
+    """
+    Read an NDJSON body of text documents
+
+    Each line is either a JSON string or an object with a "content" key and
+    an optional "source" label.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > MAX_UPLOAD_BYTES:
+            raise UploadTooLarge(MAX_UPLOAD_BYTES)
+        body.extend(chunk)
+
+    documents = []
+    for line_no, line in enumerate(body.decode('utf-8').splitlines(), 1):
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if isinstance(item, str):
+            documents.append((f"Batch line {line_no}", item))
+        elif isinstance(item, dict) and isinstance(item.get("content"), str):
+            documents.append((item.get("source") or f"Batch line {line_no}", item["content"]))
+        else:
+            raise ValueError(f"Line {line_no}: expected a string or an object with a 'content' string")
+    return documents
+
+@app.post("/process-batch")
+async def process_batch(request: Request):
+    """
+    Process many documents in parallel, streaming NDJSON results as they finish
+
+    Accepts either multipart form data with one or more "files" fields, or an
+    application/x-ndjson body of text documents.
+    """
+    content_type = request.headers.get("content-type", "")
+    uploads = []
+    documents = []
+    try:
+        if content_type.startswith("multipart/form-data"):
+            uploads = await receive_uploads(
+                content_type, request.stream(), "files", MAX_UPLOAD_BYTES, UPLOAD_SPOOL_BYTES, max_files=MAX_BATCH_ITEMS
+            )
+        else:
+            documents = await read_ndjson_documents(request)
+            if len(documents) > MAX_BATCH_ITEMS:
+                raise ValueError(f"Batch exceeds {MAX_BATCH_ITEMS} documents")
+    except UploadTooLarge as e:
+        for upload in uploads:
+            upload.close()
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=413)
     except Exception as e:
+        for upload in uploads:
+            upload.close()
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+
+    # Items beyond what a pool can run only wait in its queue; capping them per
+    # group leaves queue slots for other requests instead of timing out there
+    limits = {}
+
+    def limit(group: str) -> asyncio.Semaphore:
+        if group not in limits:
+            workers = executor.workers.get(group, executor.default_workers)
+            limits[group] = asyncio.Semaphore(max(1, min(workers * 2, workers + executor.queue_size)))
+        return limits[group]
+
+    tasks = [
+        asyncio.ensure_future(process_batch_item(index, upload.filename, limit, upload=upload))
+        for index, upload in enumerate(uploads)
+    ] + [
+        asyncio.ensure_future(process_batch_item(index, source, limit, content_str=content))
+        for index, (source, content) in enumerate(documents)
+    ]
+
+    async def stream_results():
+        entries = []
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                line, entry = await next_result
+                if entry is not None:
+                    entries.append(entry)
+                yield json.dumps(line).encode('utf-8') + b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Record the whole batch in a single history write
+            memory.store_many(entries)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/process-mailbox")
+async def process_mailbox(request: Request):
+    """
+    Backfill history from an mbox export or a single .eml message
+
+    Messages are split lazily from the spooled upload and run through the
+    pipeline in chunks on the MAILBOX worker pool. Each finished chunk is
+    recorded in history with one bulk write and reported as an NDJSON
+    progress line; the last line carries the overall messages/sec.
+    """
+    try:
+        upload = await receive_file(request, MAX_MAILBOX_BYTES)
+    except UploadTooLarge as e:
         return JSONResponse({
             "status": "error",
             "message": str(e)
-        })
+        }, status_code=413)
+    except MalformedUpload as e:
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=400)
+
+    # Deferred: only mailbox backfills need the email parser
+    from agents.mailbox import iter_messages, process_messages
+
+    # Chunks queued beyond what the pool can run only hold memory
+    max_in_flight = executor.workers.get("MAILBOX", executor.default_workers) * 2
+
+    async def run_chunk(first: int, messages: list) -> tuple:
+        try:
+            return first, [len(raw) for raw in messages], await executor.submit("MAILBOX", process_messages, messages)
+        except ExecutorSaturated:
+            raise
+        except Exception as e:
+            # A crashed worker fails its whole chunk, not the backfill
+            return first, [], [{"status": "error", "message": str(e)}] * len(messages)
+
+    async def stream_progress():
+        started = time.perf_counter()
+        processed = failed = chunks = 0
+        pending = set()
+
+        def progress(task) -> bytes:
+            nonlocal processed, failed, chunks
+            first, sizes, results = task.result()
+            entries = []
+            for offset, result in enumerate(results):
+                if result["status"] != "success":
+                    failed += 1
+                    continue
+                entries.append({
+                    "input_type": result["classification"]["format"],
+                    "intent": result["classification"]["intent"],
+                    "extracted_data": result["extracted_data"],
+                    "source_info": f"{upload.filename}#{first + offset}",
+                    "size_bytes": sizes[offset]
+                })
+            memory.store_many(entries)
+            processed += len(results)
+            chunks += 1
+            elapsed = time.perf_counter() - started
+            return json.dumps({
+                "chunk": chunks,
+                "first_message": first,
+                "messages": len(results),
+                "processed": processed,
+                "failed": failed,
+                "messages_per_sec": round(processed / elapsed, 1) if elapsed else None
+            }).encode('utf-8') + b"\n"
+
+        try:
+            first = 0
+            chunk = []
+            for raw in iter_messages(upload.view()):
+                chunk.append(raw)
+                if len(chunk) < MAILBOX_CHUNK_SIZE:
+                    continue
+                if len(pending) >= max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield progress(task)
+                pending.add(asyncio.ensure_future(run_chunk(first, chunk)))
+                first += len(chunk)
+                chunk = []
+            if chunk:
+                pending.add(asyncio.ensure_future(run_chunk(first, chunk)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield progress(task)
+
+            elapsed = time.perf_counter() - started
+            yield json.dumps({
+                "status": "complete",
+                "messages": processed,
+                "failed": failed,
+                "chunks": chunks,
+                "elapsed_s": round(elapsed, 3),
+                "messages_per_sec": round(processed / elapsed, 1) if elapsed else None
+            }).encode('utf-8') + b"\n"
+        except ExecutorSaturated as e:
+            yield json.dumps({"status": "error", "message": str(e), "processed": processed}).encode('utf-8') + b"\n"
+        finally:
+            for task in pending:
+                task.cancel()
+            upload.close()
+
+    return StreamingResponse(stream_progress(), media_type="application/x-ndjson")
+
+@app.get("/jobs/events")
+async def job_events():
+    """
+    Server-sent events stream of finished jobs
+
+    Each event carries the same body as ``/jobs/{id}``; a comment line is
+    sent every EVENTS_KEEPALIVE seconds to keep proxies from closing an
+    idle stream.
+    """
+    subscriber = jobs.subscribe()
+
+    async def stream_events():
+        try:
+            while True:
+                try:
+                    job = await asyncio.wait_for(subscriber.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                data = json.dumps(job.as_dict())
+                yield f"id: {job.id}\nevent: {job.status}\ndata: {data}\n\n".encode('utf-8')
+        finally:
+            jobs.unsubscribe(subscriber)
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/stats")
+async def get_job_stats():
+    """Get async job queue depth, counters and latency"""
+    return JSONResponse(jobs.stats())
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get an async job's status, and its result once finished"""
+    job = await jobs.get(job_id)
+    if job is None:
+        return JSONResponse({
+            "status": "error",
+            "message": f"Unknown job {job_id}"
+        }, status_code=404)
+    return JSONResponse(job.as_dict())
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of stage latency histograms, counters and gauges"""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/debug/startup")
+async def get_startup_report():
+    """Where this process's startup time went, including agents created on first use"""
+    return JSONResponse(startup.as_dict(agent_init_seconds))
+
+@app.get("/debug/profiles")
+async def list_profiles():
+    """List captured pipeline profiles, newest first"""
+    if not PROFILING:
+        return profiling_disabled()
+    return JSONResponse({"profiles": profiles.list()})
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Get a profile's top functions, stage timings and allocation sites (overall and per agent)"""
+    if not PROFILING:
+        return profiling_disabled()
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return JSONResponse({
+            "status": "error",
+            "message": f"Unknown profile {profile_id}"
+        }, status_code=404)
+    return JSONResponse({key: value for key, value in profile.items() if key != "pstats"})
+
+@app.get("/debug/profiles/{profile_id}/download")
+async def download_profile(profile_id: str):
+    """Download a profile's raw cProfile data, readable with pstats or snakeviz"""
+    if not PROFILING:
+        return profiling_disabled()
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return JSONResponse({
+            "status": "error",
+            "message": f"Unknown profile {profile_id}"
+        }, status_code=404)
+    return Response(profile["pstats"], media_type="application/octet-stream", headers={
+        "Content-Disposition": f'attachment; filename="{profile_id}.prof"'
+    })
+
+async def history_etag(request: Request) -> str:
+    """
+    Entity tag of a /history response
+
+    History is append-only, so a response only changes when a record is
+    added; the tag combines the newest id with the query. Reading the
+    newest id can wait for the history writer (shared mode commits and
+    syncs first), so it runs off the event loop.
+    """
+    last_id = await asyncio.to_thread(lambda: memory.last_id)
+    return f'"{last_id}-{zlib.crc32(str(request.query_params).encode("utf-8")):08x}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names ``etag``"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
 
 @app.get("/history")
-async def get_history():
-    """Get processing history"""
+async def get_history(
+    request: Request,
+    limit: int = 20,
+    cursor: int = None,
+    since: int = None,
+    input_type: str = None,
+    intent: str = None,
+    start: str = None,
+    end: str = None,
+    fields: str = "full"
+):
+    """
+    Get processing history, newest first
+
+    Query parameters:
+        limit: Records per page (at most MAX_HISTORY_PAGE)
+        cursor: ``next_cursor`` of the previous page
+        since: Delta mode; only records newer than this id, oldest first
+        input_type, intent: Exact filters
+        start, end: ISO timestamps; start is inclusive, end exclusive
+        fields: "summary" leaves out each record's extracted_data
+
+    Every response has an ETag, and a matching If-None-Match is answered
+    with 304.
+    """
+    etag = await history_etag(request)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
     try:
-        history = memory.get_recent_data(20)
-        formatted_history = []
-        
-        for record in history:
-            formatted_history.append({
-                "id": record[0],
-                "input_type": record[1],
-                "intent": record[2],
-                "extracted_data": json.loads(record[3]),
-                "timestamp": record[4],
-                "source_info": record[5]
-            })
-        
-        return JSONResponse({"history": formatted_history})
-        
+        if not request.query_params:
+            payload = await asyncio.to_thread(memory.get_recent_payload, 20)
+            return Response(payload, media_type="application/json", headers={"ETag": etag})
+
+        if fields not in ("full", "summary"):
+            return JSONResponse({
+                "status": "error",
+                "message": "fields must be 'full' or 'summary'"
+            }, status_code=400)
+        limit = max(1, min(limit, MAX_HISTORY_PAGE))
+        # Store reads can wait for the writer's commit; keep them off the event loop
+        rows = await asyncio.to_thread(
+            memory.query_fragments,
+            limit,
+            before=cursor,
+            after=since,
+            input_type=input_type.upper() if input_type else None,
+            intent=intent,
+            start=start,
+            end=end,
+            summary=fields == "summary"
+        )
+
+        body = b'{"history":[' + b",".join(fragment for _, fragment in rows) + b"]"
+        if since is not None:
+            last_id = rows[-1][0] if rows else since
+            body += b',"last_id":%d,"has_more":%s' % (last_id, b"true" if len(rows) == limit else b"false")
+        else:
+            next_cursor = rows[-1][0] if len(rows) == limit else None
+            body += b',"next_cursor":' + json.dumps(next_cursor).encode("utf-8")
+        return Response(body + b"}", media_type="application/json", headers={"ETag": etag})
+
     except Exception as e:
         return JSONResponse({"status": "error", "message": str(e)})
 
+@app.get("/search")
+async def search_history(
+    request: Request,
+    q: str = "",
+    limit: int = 20,
+    offset: int = 0,
+    input_type: str = None,
+    intent: str = None,
+    start: str = None,
+    end: str = None
+):
+    """
+    Full-text search over processed documents, best matches first
+
+    Query parameters:
+        q: Search terms; "quoted phrases", prefix*, OR and column:term
+           (source, subject, body, requests, fields) are supported
+        limit: Results per page (at most MAX_HISTORY_PAGE)
+        offset: Results to skip
+        input_type, intent: Exact filters
+        start, end: ISO timestamps; start is inclusive, end exclusive
+
+    Results are summary projections with a BM25 "score". Only the newest
+    RANK_WINDOW matches are ranked; "truncated" is true when a query matched
+    more than that and older matches were left out. Like /history,
+    responses carry an ETag that changes when a record is added.
+    """
+    etag = await history_etag(request)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    started = time.perf_counter()
+    limit = max(1, min(limit, MAX_HISTORY_PAGE))
+    try:
+        rows, truncated = await asyncio.to_thread(
+            memory.search,
+            q,
+            limit,
+            max(offset, 0),
+            input_type=input_type.upper() if input_type else None,
+            intent=intent,
+            start=start,
+            end=end
+        )
+    except ValueError as e:
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=400)
+    except Exception as e:
+        return JSONResponse({"status": "error", "message": str(e)})
+
+    body = b'{"query":' + json.dumps(q).encode("utf-8") + b',"results":[' + b",".join(fragment for _, fragment in rows) + b"]"
+    next_offset = max(offset, 0) + limit if len(rows) == limit else None
+    body += b',"next_offset":%s,"truncated":%s,"ranked_window":%d,"took_ms":%.3f}' % (
+        json.dumps(next_offset).encode("utf-8"),
+        b"true" if truncated else b"false",
+        RANK_WINDOW,
+        (time.perf_counter() - started) * 1000
+    )
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+@app.get("/stats")
+async def get_stats(
+    request: Request,
+    start: str = None,
+    end: str = None,
+    resolution: str = None,
+    group_by: str = "",
+    input_type: str = None,
+    intent: str = None,
+    urgency: str = None
+):
+    """
+    Documents processed per minute, hour or day, with their mean size
+
+    Query parameters:
+        start, end: ISO timestamps; start is inclusive, end exclusive
+                    (defaults to the last 24 hours)
+        resolution: minute, hour or day (defaults to the finest one that
+                    still holds start, in at most 1440 buckets)
+        group_by: Comma-separated dimensions: input_type, intent, urgency
+        input_type, intent, urgency: Exact filters
+
+    Answered from counters updated as documents are stored, so the cost
+    depends on the number of buckets, not on the size of the history.
+    Buckets with no documents are left out. Buckets are aligned to UTC and
+    reported in UTC; naive start/end values are local time, as in /history.
+    """
+    etag = await history_etag(request)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    try:
+        stats = await asyncio.to_thread(
+            memory.rollups,
+            resolution,
+            start,
+            end,
+            tuple(name.strip() for name in group_by.split(",") if name.strip()),
+            input_type=input_type.upper() if input_type else None,
+            intent=intent,
+            urgency=urgency.upper() if urgency else None
+        )
+    except ValueError as e:
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=400)
+    except Exception as e:
+        return JSONResponse({"status": "error", "message": str(e)})
+    return JSONResponse(stats, headers={"ETag": etag})
+
+@app.get("/history/events")
+async def history_events(request: Request, since: int = None):
+    """
+    Server-sent events stream of new history records
+
+    Each "record" event carries a record's summary projection, with the
+    record id as the event id. Streams resume after ``Last-Event-ID`` (or
+    ``since``), replaying missed records first; without either they start
+    at the newest record.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    last_id = int(last_event_id) if last_event_id.isdigit() else since
+    if last_id is None:
+        last_id = await asyncio.to_thread(lambda: memory.last_id)
+
+    loop = asyncio.get_running_loop()
+    stored = asyncio.Event()
+
+    def on_store(added: list) -> None:
+        loop.call_soon_threadsafe(stored.set)
+
+    async def stream_records():
+        nonlocal last_id
+        memory.add_listener(on_store)
+        try:
+            while True:
+                stored.clear()
+                # Off the event loop: a read can wait for the writer, which would stall every other client
+                rows = await asyncio.to_thread(memory.query_fragments, MAX_HISTORY_PAGE, after=last_id, summary=True)
+                for record_id, fragment in rows:
+                    yield b"id: %d\nevent: record\ndata: %s\n\n" % (record_id, fragment)
+                    last_id = record_id
+                if len(rows) == MAX_HISTORY_PAGE:
+                    continue
+                try:
+                    await asyncio.wait_for(stored.wait(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            memory.remove_listener(on_store)
+
+    return StreamingResponse(stream_records(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/history/{record_id:int}")
+async def get_history_record(record_id: int):
+    """Get one history record with its full extracted_data"""
+    record = await asyncio.to_thread(memory.get_record, record_id)
+    if record is None:
+        return JSONResponse({
+            "status": "error",
+            "message": f"Unknown history record {record_id}"
+        }, status_code=404)
+    return Response(render_fragment(record), media_type="application/json")
+
+@app.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Get per-format worker pool queue and execution metrics"""
+    return JSONResponse(executor.stats())
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get result cache size and hit/miss counters"""
+    return JSONResponse(result_cache.stats())
+
+@app.post("/cache/invalidate")
+async def invalidate_cache():
+    """Drop every cached result, e.g. after deploying changed agent logic"""
+    removed = result_cache.invalidate()
+    return JSONResponse({"status": "success", "removed": removed})
+
+@app.get("/history/stats")
+async def get_history_stats():
+    """Get history memory-tier counters"""
+    return JSONResponse(await asyncio.to_thread(memory.stats))
+
+startup.mark("register routes")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,81 @@
+from typing import List, Optional
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    filename TEXT,
+    status TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    payload_path TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, submitted);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished);
+"""
+
+COLUMNS = "id, kind, filename, status, submitted, started, finished, payload_path, result, error"
+
+class JobStore:
+    """
+    SQLite table of async processing jobs
+
+    Every state change of a job is written through, so jobs that were queued
+    or running when the process stopped can be picked up again on restart.
+    Rows are plain tuples in ``COLUMNS`` order.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the job database
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def save(self, row: tuple) -> None:
+        """Insert or replace one job row"""
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT OR REPLACE INTO jobs ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def get(self, job_id: str) -> Optional[tuple]:
+        """Get one job row, or None if it does not exist"""
+        with self._lock:
+            return self._conn.execute(f"SELECT {COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def unfinished(self) -> List[tuple]:
+        """Get the rows of queued and running jobs, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {COLUMNS} FROM jobs WHERE status IN ('queued', 'running') ORDER BY submitted"
+            ).fetchall()
+
+    def prune(self, keep: int) -> int:
+        """
+        Delete all but the ``keep`` most recently finished jobs
+
+        Returns:
+            Number of rows removed
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE finished IS NOT NULL AND id NOT IN "
+                "(SELECT id FROM jobs WHERE finished IS NOT NULL ORDER BY finished DESC LIMIT ?)",
+                (keep,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
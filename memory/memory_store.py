@@ -1,50 +1,916 @@
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import atexit
+import itertools
 import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from collections import deque
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so a mode mix-up is not detected
+    fcntl = None
+
+from memory.rollups import (
+    UPSERT_ROLLUP, document_urgency, ensure_rollups, prune_rollups, query_rollups,
+    rollup_backfill_pending, rollup_backfill_step, rollup_increments
+)
+from memory.search_index import RANK_WINDOW, SEARCH_COLUMNS, backfill_pending, backfill_step, build_match, ensure_search_index, search_columns
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    input_type TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    extracted_data TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    source_info TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_input_type ON history (input_type, id);
+CREATE INDEX IF NOT EXISTS idx_history_intent ON history (intent, id);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+"""
+
+INSERT_SEARCH = f"INSERT INTO history_fts (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+# Rough per-record cost of the tuple and its small string fields
+RECORD_OVERHEAD = sys.getsizeof((0,) * 6) + 5 * sys.getsizeof("")
+
+def summarize_extracted(extracted_data: Any) -> Dict[str, Any]:
+    """
+    The small part of a result that history listings show
+
+    Returns:
+        Dict with the result's "summary" block (or its top-level status for
+        failures) and the email subject when there is one
+    """
+    if not isinstance(extracted_data, dict):
+        return {"summary": None}
+    summary = extracted_data.get("summary")
+    if summary is None and "status" in extracted_data:
+        summary = {"status": extracted_data["status"]}
+    projected = {"summary": summary}
+    details = extracted_data.get("details")
+    if isinstance(details, dict) and details.get("subject"):
+        projected["subject"] = details["subject"]
+    return projected
+
+def render_fragment(record: tuple) -> bytes:
+    """
+    Encode a history record as a JSON object fragment
+
+    The stored ``extracted_data`` is already JSON text, so it is spliced in
+    verbatim instead of being parsed and serialized again.
+    """
+    record_id, input_type, intent, extracted_data, timestamp, source_info = record
+    return (
+        '{"id":%d,"input_type":%s,"intent":%s,"extracted_data":%s,"timestamp":%s,"source_info":%s}' % (
+            record_id,
+            json.dumps(input_type),
+            json.dumps(intent),
+            extracted_data,
+            json.dumps(timestamp),
+            json.dumps(source_info)
+        )
+    ).encode("utf-8")
+
+def render_summary_fragment(record: tuple, summary: str) -> bytes:
+    """
+    Encode a history record's summary projection as a JSON object fragment
+
+    Args:
+        record: Record tuple (its extracted_data is not included)
+        summary: JSON text from ``summarize_extracted``
+    """
+    record_id, input_type, intent, _, timestamp, source_info = record
+    return (
+        '{"id":%d,"input_type":%s,"intent":%s,"timestamp":%s,"source_info":%s,%s' % (
+            record_id,
+            json.dumps(input_type),
+            json.dumps(intent),
+            json.dumps(timestamp),
+            json.dumps(source_info),
+            summary[1:]
+        )
+    ).encode("utf-8")
+
+class RecordRing:
+    """
+    Byte-budgeted ring of the most recent history records
+
+    Each record is kept together with its pre-encoded JSON fragments (the
+    full record and its summary projection). Records
+    are appended newest-last; once the approximate size of the ring exceeds
+    its budget the oldest records are evicted. Evicted records are still
+    available from the on-disk history table.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._records = deque()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def record_size(record: tuple, fragment: bytes) -> int:
+        """Approximate memory held by a record tuple and its fragment"""
+        return RECORD_OVERHEAD + len(fragment) + sum(len(field) for field in record[1:] if isinstance(field, str))
+
+    def append(self, record: tuple, fragment: bytes, summary_fragment: bytes = b"") -> None:
+        """Add a record, evicting the oldest ones to stay within budget"""
+        size = self.record_size(record, fragment) + len(summary_fragment)
+        self._records.append((record, fragment, size, summary_fragment))
+        self.size_bytes += size
+        while self.size_bytes > self.budget_bytes and self._records:
+            evicted_size = self._records.popleft()[2]
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+            self.evicted_bytes += evicted_size
+
+    def recent(self, limit: int) -> List[tuple]:
+        """Return up to ``limit`` records, newest first"""
+        return [entry[0] for entry in self._recent_entries(limit)]
+
+    def recent_fragments(self, limit: int) -> List[bytes]:
+        """Return up to ``limit`` encoded fragments, newest first"""
+        return [entry[1] for entry in self._recent_entries(limit)]
+
+    def _recent_entries(self, limit: int) -> List[tuple]:
+        result = []
+        for entry in reversed(self._records):
+            if len(result) >= limit:
+                break
+            result.append(entry)
+        return result
+
+    def oldest_id(self) -> Optional[int]:
+        """Id of the oldest resident record"""
+        return self._records[0][0][0] if self._records else None
+
+    def scan(self, matches: Callable[[tuple], bool], limit: int, before: Optional[int] = None, after: Optional[int] = None) -> List[tuple]:
+        """
+        Collect up to ``limit`` resident entries accepted by ``matches``
+
+        Entries are (record, fragment, size, summary_fragment) tuples, newest
+        first, or oldest first when ``after`` is given.
+
+        Args:
+            matches: Predicate on the record tuple
+            limit: Maximum number of entries
+            before: Only records with a smaller id
+            after: Only records with a larger id
+        """
+        result = []
+        if after is not None:
+            oldest = self.oldest_id()
+            skip = max(after + 1 - oldest, 0) if oldest is not None else 0
+            entries = itertools.islice(self._records, skip, None)
+        else:
+            entries = reversed(self._records)
+        for entry in entries:
+            record_id = entry[0][0]
+            if before is not None and record_id >= before:
+                continue
+            if after is not None and record_id <= after:
+                continue
+            if matches(entry[0]):
+                result.append(entry)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def get(self, record_id: int) -> Optional[tuple]:
+        """Look up a record by id if it is still resident"""
+        if not self._records:
+            return None
+        offset = record_id - self._records[0][0][0]
+        if 0 <= offset < len(self._records):
+            record = self._records[offset][0]
+            if record[0] == record_id:
+                return record
+        return None
+
+class DatabaseInUse(RuntimeError):
+    """Raised when another process holds the history database in an incompatible mode"""
+
+def lock_database(db_path: str, shared: bool):
+    """
+    Claim the history database for this process
+
+    A non-shared store assigns record ids itself, so a second process
+    writing the same file would collide on ids. A lock file next to the
+    database is held exclusively by a non-shared store and shared by
+    shared-mode stores, so opening a store in a mode that conflicts
+    with another process fails here instead of losing records later.
+
+    Returns:
+        The open lock file (held until closed), or None where locks are unavailable
+
+    Raises:
+        DatabaseInUse: If another process holds the database in a conflicting mode
+    """
+    if fcntl is None or db_path == ":memory:":
+        return None
+    lock_file = open(db_path + ".lock", "a")
+    try:
+        fcntl.flock(lock_file, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise DatabaseInUse(
+            f"{db_path} is in use by another process; leave MEMORY_SHARED unset in every process to share it"
+        )
+    return lock_file
+
+def shared_by_default() -> bool:
+    """
+    Whether stores open in shared mode unless told otherwise
+
+    Shared mode is on unless $MEMORY_SHARED turns it off: worker processes
+    started by ``uvicorn --workers N`` are not told how many siblings they
+    have, and a local-mode worker would lock the others out of the file.
+    """
+    return os.getenv("MEMORY_SHARED", "").strip().lower() not in ("0", "false", "no", "off")
+
 class MemoryStore:
     """
-    Simple memory storage for processed data
+    SQLite-backed storage for processed data
+
+    Writes are queued and group-committed by a background writer thread so
+    that ``store_data`` never waits on disk I/O. The most recent records are
+    also kept in a byte-budgeted in-memory ring; older records spill to the
+    database only and are read back from it on demand.
+
+    In shared mode several processes (e.g. ``uvicorn --workers N``) use the
+    same database as one history. Record ids are then assigned by SQLite
+    inside each write transaction, so committed ids never have gaps, and
+    every process tails the table into its ring: on each read and every
+    ``sync_interval`` seconds it checks ``PRAGMA data_version`` and loads
+    the rows committed since. Listeners hear about records stored by any
+    process.
     """
-    
-    def __init__(self):
-        self.data = []
-        
-    def store_data(self, input_type: str, intent: str, extracted_data: Dict[str, Any], source_info: str) -> None:
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        batch_size: int = 256,
+        memory_budget: Optional[int] = None,
+        shared: Optional[bool] = None,
+        sync_interval: Optional[float] = None
+    ):
+        """
+        Open (or create) the history database
+
+        Args:
+            db_path: Path to the SQLite file (defaults to $MEMORY_DB_PATH or memory.db)
+            batch_size: Maximum number of records written per transaction
+            memory_budget: Bytes of history kept in memory (defaults to $MEMORY_BUDGET_BYTES or 8 MiB)
+            shared: Share the history with other processes using the same file
+                (defaults to on unless $MEMORY_SHARED turns it off)
+            sync_interval: Seconds between checks for records stored by other
+                processes in shared mode (defaults to $MEMORY_SYNC_INTERVAL or 0.25)
+
+        Raises:
+            DatabaseInUse: If another process uses the file and either of them is not in shared mode
+        """
+        self.db_path = db_path or os.getenv("MEMORY_DB_PATH", "memory.db")
+        self.batch_size = batch_size
+        if memory_budget is None:
+            memory_budget = int(os.getenv("MEMORY_BUDGET_BYTES", 8 * 1024 * 1024))
+        self.shared = shared_by_default() if shared is None else shared
+        if sync_interval is None:
+            sync_interval = float(os.getenv("MEMORY_SYNC_INTERVAL", 0.25))
+        self.sync_interval = sync_interval
+        self._lock_file = lock_database(self.db_path, self.shared)
+
+        self._read_lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._ring = RecordRing(memory_budget)
+        self._memory_reads = 0
+        self._disk_reads = 0
+        self._searches = 0
+        self._payload_cache = {}
+        self._listeners: List[Callable[[List[Tuple[tuple, bytes]]], None]] = []
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(history)")}
+        if "summary" not in columns:
+            # Databases from before summaries were stored; their rows are summarized on read
+            self._conn.execute("ALTER TABLE history ADD COLUMN summary TEXT")
+        self._conn.commit()
+        ensure_search_index(self._conn)
+        ensure_rollups(self._conn)
+
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()
+        self._last_id = row[0]
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._synced_records = 0
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="memory-writer", daemon=True)
+        self._writer.start()
+        self._stop_sync = threading.Event()
+        if self.shared:
+            self._syncer = threading.Thread(target=self._sync_loop, name="memory-sync", daemon=True)
+            self._syncer.start()
+        if backfill_pending(self._conn) or rollup_backfill_pending(self._conn):
+            threading.Thread(target=self._backfill, name="memory-backfill", daemon=True).start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for concurrent readers and a single writer"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def store_data(
+        self,
+        input_type: str,
+        intent: str,
+        extracted_data: Dict[str, Any],
+        source_info: str,
+        size_bytes: Optional[int] = None,
+        urgency: Optional[str] = None
+    ) -> None:
         """
         Store processed data with metadata
-        
+
         Args:
             input_type: Type of input (JSON, EMAIL, etc.)
             intent: Detected intent of the input
             extracted_data: Processed data
             source_info: Source information (filename, etc.)
+            size_bytes: Size of the original document, for the mean size in rollups
+            urgency: Urgency for rollups (defaults to the one in the result's summary)
         """
-        record = {
-            "id": len(self.data) + 1,
+        self.store_many([{
             "input_type": input_type,
             "intent": intent,
-            "extracted_data": json.dumps(extracted_data),
-            "timestamp": datetime.now().isoformat(),
-            "source_info": source_info
-        }
-        self.data.append(record)
-    
+            "extracted_data": extracted_data,
+            "source_info": source_info,
+            "size_bytes": size_bytes,
+            "urgency": urgency
+        }])
+
+    def store_many(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Store several processed documents as one bulk write
+
+        Args:
+            entries: Dicts with input_type, intent, extracted_data and source_info
+                keys, and optionally size_bytes and urgency (see ``store_data``)
+        """
+        if not entries:
+            return
+        prepared = []
+        for entry in entries:
+            stamp = datetime.now()
+            prepared.append((
+                (
+                    entry["input_type"],
+                    entry["intent"],
+                    json.dumps(entry["extracted_data"]),
+                    stamp.isoformat(),
+                    entry["source_info"]
+                ),
+                json.dumps(summarize_extracted(entry["extracted_data"])),
+                search_columns(entry["extracted_data"], entry["source_info"]),
+                (
+                    stamp.timestamp(),
+                    entry["input_type"],
+                    entry["intent"],
+                    (entry.get("urgency") or document_urgency(entry["extracted_data"])).upper(),
+                    entry.get("size_bytes")
+                )
+            ))
+        # Rows are the history columns, then the search columns, then the rollup item
+        if self.shared:
+            # Ids are assigned when the writer commits; the rows reach the ring and listeners through _sync
+            self._queue.put([fields + (summary,) + search + (rollup,) for fields, summary, search, rollup in prepared])
+            return
+
+        with self._id_lock:
+            rows = []
+            added = []
+            for fields, summary, search, rollup in prepared:
+                self._last_id += 1
+                record = (self._last_id,) + fields
+                summary_fragment = render_summary_fragment(record, summary)
+                self._ring.append(record, render_fragment(record), summary_fragment)
+                rows.append(record + (summary,) + search + (rollup,))
+                added.append((record, summary_fragment))
+            self._payload_cache.clear()
+            self._queue.put(rows)
+
+        for listener in list(self._listeners):
+            try:
+                listener(added)
+            except Exception:
+                logger.exception("History listener failed")
+
+    @property
+    def last_id(self) -> int:
+        """Id of the newest stored record"""
+        self._refresh()
+        return self._last_id
+
+    def _refresh(self) -> None:
+        """In shared mode, commit this process's pending records and load everyone's new ones"""
+        if self.shared:
+            self.flush()
+            self._sync()
+
+    def _sync(self) -> None:
+        """Append records committed since the last sync to the ring and notify listeners"""
+        added = []
+        with self._read_lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return
+            self._data_version = version
+            while True:
+                rows = self._conn.execute(
+                    "SELECT id, input_type, intent, extracted_data, timestamp, source_info, summary "
+                    "FROM history WHERE id > ? ORDER BY id LIMIT ?",
+                    (self._last_id, self.batch_size)
+                ).fetchall()
+                with self._id_lock:
+                    for row in rows:
+                        record = row[:6]
+                        summary = row[6] or json.dumps(summarize_extracted(json.loads(row[3])))
+                        summary_fragment = render_summary_fragment(record, summary)
+                        self._ring.append(record, render_fragment(record), summary_fragment)
+                        self._last_id = record[0]
+                        added.append((record, summary_fragment))
+                    self._synced_records += len(rows)
+                    self._payload_cache.clear()
+                if len(rows) < self.batch_size:
+                    break
+        if not added:
+            return
+
+        for listener in list(self._listeners):
+            try:
+                listener(added)
+            except Exception:
+                logger.exception("History listener failed")
+
+    def _sync_loop(self) -> None:
+        """Pick up records stored by other processes so listeners hear about them"""
+        while not self._stop_sync.wait(self.sync_interval):
+            try:
+                self._sync()
+            except sqlite3.Error:
+                logger.exception("Failed to read new history records")
+
+    def add_listener(self, listener: Callable[[List[Tuple[tuple, bytes]]], None]) -> None:
+        """
+        Call ``listener`` after every store with the new (record, summary fragment) pairs
+
+        Listeners run on the storing thread and must not block.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[Tuple[tuple, bytes]]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def query_fragments(
+        self,
+        limit: int = 20,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        input_type: Optional[str] = None,
+        intent: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        summary: bool = False
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Page through history with optional filters
+
+        Served from the in-memory ring when it holds the whole answer,
+        otherwise from the database.
+
+        Args:
+            limit: Maximum number of records
+            before: Cursor; only records with a smaller id (newest first)
+            after: Delta mode; only records with a larger id (oldest first)
+            input_type: Only this input type
+            intent: Only this intent
+            start: Only records timestamped at or after this ISO time
+            end: Only records timestamped before this ISO time
+            summary: Encode the summary projection instead of full records
+
+        Returns:
+            List of (record id, encoded JSON object) pairs
+        """
+        def matches(record: tuple) -> bool:
+            return (
+                (input_type is None or record[1] == input_type)
+                and (intent is None or record[2] == intent)
+                and (start is None or record[4] >= start)
+                and (end is None or record[4] < end)
+            )
+
+        self._refresh()
+        with self._id_lock:
+            oldest = self._ring.oldest_id()
+            complete = len(self._ring) == self._last_id
+            # With a cursor below the ring, or deltas older than it, the ring cannot answer
+            usable = complete or (
+                oldest is not None
+                and (before is None or before > oldest)
+                and (after is None or after + 1 >= oldest)
+            )
+            if usable:
+                entries = self._ring.scan(matches, limit, before, after)
+                if complete or after is not None or len(entries) >= limit:
+                    self._memory_reads += 1
+                    return [(entry[0][0], entry[3] if summary else entry[1]) for entry in entries]
+
+        return self._query_database(limit, before, after, input_type, intent, start, end, summary)
+
+    def _query_database(self, limit, before, after, input_type, intent, start, end, summary) -> List[Tuple[int, bytes]]:
+        """Run a ``query_fragments`` query against the database"""
+        clauses, params = [], []
+        for clause, value in (
+            ("id < ?", before),
+            ("id > ?", after),
+            ("input_type = ?", input_type),
+            ("intent = ?", intent),
+            ("timestamp >= ?", start),
+            ("timestamp < ?", end)
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        order = "ASC" if after is not None else "DESC"
+        # The full payload is only read for summary listings of rows stored without a summary
+        payload = "CASE WHEN summary IS NULL THEN extracted_data END" if summary else "extracted_data"
+
+        self.flush()
+        with self._read_lock:
+            self._disk_reads += 1
+            rows = self._conn.execute(
+                f"SELECT id, input_type, intent, {payload}, timestamp, source_info, summary "
+                f"FROM history {where}ORDER BY id {order} LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        fragments = []
+        for row in rows:
+            record = row[:6]
+            if summary:
+                stored = row[6] or json.dumps(summarize_extracted(json.loads(row[3])))
+                fragments.append((row[0], render_summary_fragment(record, stored)))
+            else:
+                fragments.append((row[0], render_fragment(record)))
+        return fragments
+
     def get_recent_data(self, limit: int = 20) -> List[tuple]:
         """
         Get recent processing history
-        
+
         Args:
             limit: Maximum number of records to return
-            
+
         Returns:
             List of tuples containing record data
         """
-        return [(
-            record["id"],
-            record["input_type"],
-            record["intent"],
-            record["extracted_data"],
-            record["timestamp"],
-            record["source_info"]
-        ) for record in reversed(self.data[-limit:])]
\ No newline at end of file
+        self._refresh()
+        with self._id_lock:
+            if self._resident(limit):
+                self._memory_reads += 1
+                return self._ring.recent(limit)
+
+        return self._read_recent(limit)
+
+    def get_recent_payload(self, limit: int = 20) -> bytes:
+        """
+        Get recent processing history as an encoded ``{"history": [...]}`` body
+
+        The rendered body is cached until the next record is stored.
+
+        Args:
+            limit: Maximum number of records to include
+
+        Returns:
+            UTF-8 encoded JSON document
+        """
+        self._refresh()
+        with self._id_lock:
+            cached = self._payload_cache.get(limit)
+            if cached is not None:
+                return cached
+            version = self._last_id
+            if self._resident(limit):
+                self._memory_reads += 1
+                fragments = self._ring.recent_fragments(limit)
+            else:
+                fragments = None
+
+        if fragments is None:
+            fragments = [render_fragment(record) for record in self._read_recent(limit)]
+
+        payload = b'{"history":[' + b",".join(fragments) + b"]}"
+        with self._id_lock:
+            if self._last_id == version:
+                self._payload_cache[limit] = payload
+        return payload
+
+    def _resident(self, limit: int) -> bool:
+        """Whether the newest ``limit`` records can be served from memory"""
+        return limit <= len(self._ring) or len(self._ring) == self._last_id
+
+    def _read_recent(self, limit: int) -> List[tuple]:
+        """Read the newest records from the database"""
+        self.flush()
+        with self._read_lock:
+            self._disk_reads += 1
+            return self._conn.execute(
+                "SELECT id, input_type, intent, extracted_data, timestamp, source_info "
+                "FROM history ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        input_type: Optional[str] = None,
+        intent: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Tuple[List[Tuple[int, bytes]], bool]:
+        """
+        Full-text search over processed documents, best matches first
+
+        Matches are ranked by BM25 with subjects weighted highest; see
+        ``build_match`` for the query syntax. Only the newest RANK_WINDOW
+        matches are ranked, so terms found in nearly every document stay
+        fast; the second return value says when older matches were left out.
+
+        Args:
+            query: Search terms
+            limit: Maximum number of results
+            offset: Results to skip, for further pages
+            input_type: Only this input type
+            intent: Only this intent
+            start: Only records timestamped at or after this ISO time
+            end: Only records timestamped before this ISO time
+
+        Returns:
+            Tuple of the (record id, summary projection with a "score" field)
+            pairs and whether there were more than RANK_WINDOW matches
+
+        Raises:
+            ValueError: If the query has no searchable words
+        """
+        clauses, params = ["history_fts MATCH ?"], [build_match(query)]
+        for clause, value in (
+            ("h.input_type = ?", input_type),
+            ("h.intent = ?", intent),
+            ("h.timestamp >= ?", start),
+            ("h.timestamp < ?", end)
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        self.flush()
+        with self._read_lock:
+            self._searches += 1
+            # Walking the matches past the window is cheap next to ranking them
+            truncated = self._conn.execute(
+                f"SELECT 1 FROM history_fts JOIN history h ON h.id = history_fts.rowid WHERE {' AND '.join(clauses)} "
+                "ORDER BY history_fts.rowid DESC LIMIT 1 OFFSET ?",
+                params + [RANK_WINDOW]
+            ).fetchone() is not None
+            rows = self._conn.execute(
+                "SELECT h.id, h.input_type, h.intent, CASE WHEN h.summary IS NULL THEN h.extracted_data END, "
+                "h.timestamp, h.source_info, h.summary, matches.rank FROM ("
+                "SELECT history_fts.rowid AS id, history_fts.rank AS rank "
+                f"FROM history_fts JOIN history h ON h.id = history_fts.rowid WHERE {' AND '.join(clauses)} "
+                "ORDER BY history_fts.rowid DESC LIMIT ?"
+                ") matches JOIN history h ON h.id = matches.id ORDER BY matches.rank LIMIT ? OFFSET ?",
+                params + [RANK_WINDOW, limit, offset]
+            ).fetchall()
+
+        results = []
+        for row in rows:
+            stored = row[6] or json.dumps(summarize_extracted(json.loads(row[3])))
+            fragment = render_summary_fragment(row[:6], stored)
+            # BM25 ranks are negative, lower is better; report them as a positive score
+            results.append((row[0], fragment[:-1] + b',"score":%.4f}' % -row[7]))
+        return results, truncated
+
+    def rollups(
+        self,
+        resolution: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        group_by: Tuple[str, ...] = (),
+        input_type: Optional[str] = None,
+        intent: Optional[str] = None,
+        urgency: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Documents per time bucket from the incrementally maintained rollups
+
+        See ``query_rollups``; the cost is independent of the history size.
+
+        Args:
+            resolution: "minute", "hour" or "day" (chosen from the range when None)
+            start: ISO timestamp, inclusive (defaults to 24 hours before end)
+            end: ISO timestamp, exclusive (defaults to now)
+            group_by: Dimensions to break buckets down by (input_type, intent, urgency)
+            input_type: Only this input type
+            intent: Only this intent
+            urgency: Only this urgency
+
+        Returns:
+            Dict with the resolution, range, totals and buckets
+
+        Raises:
+            ValueError: For an unknown resolution or dimension, or a malformed timestamp
+        """
+        self.flush()
+        with self._read_lock:
+            return query_rollups(
+                self._conn, resolution, start, end, group_by,
+                {"input_type": input_type, "intent": intent, "urgency": urgency}
+            )
+
+    def _backfill(self) -> None:
+        """Index and count history stored before search and rollups existed, a batch per transaction"""
+        conn = self._connect()
+        try:
+            while backfill_step(conn, self.batch_size * 4):
+                pass
+            while rollup_backfill_step(conn, self.batch_size * 16):
+                pass
+        except sqlite3.Error:
+            logger.exception("Failed to index existing history")
+        finally:
+            conn.close()
+
+    def get_record(self, record_id: int) -> Optional[tuple]:
+        """
+        Get a single record, reading it back from disk if it was evicted
+
+        Args:
+            record_id: Id of the record to fetch
+
+        Returns:
+            Record tuple, or None if it does not exist
+        """
+        self._refresh()
+        with self._id_lock:
+            record = self._ring.get(record_id)
+            if record is not None:
+                self._memory_reads += 1
+                return record
+
+        self.flush()
+        with self._read_lock:
+            self._disk_reads += 1
+            return self._conn.execute(
+                "SELECT id, input_type, intent, extracted_data, timestamp, source_info "
+                "FROM history WHERE id = ?",
+                (record_id,)
+            ).fetchone()
+
+    def stats(self, refresh: bool = True) -> Dict[str, int]:
+        """
+        Report memory-tier sizing counters
+
+        Args:
+            refresh: In shared mode, commit and load new records first; without
+                it the counters are read from memory only and never block
+
+        Returns:
+            Dict with budget, resident size/records, eviction and read counters
+        """
+        if refresh:
+            self._refresh()
+        with self._id_lock:
+            return {
+                "shared": self.shared,
+                "synced_records": self._synced_records,
+                "budget_bytes": self._ring.budget_bytes,
+                "resident_bytes": self._ring.size_bytes,
+                "resident_records": len(self._ring),
+                "total_records": self._last_id,
+                "evictions": self._ring.evictions,
+                "spilled_bytes": self._ring.evicted_bytes,
+                "pending_writes": self._queue.qsize(),
+                "memory_reads": self._memory_reads,
+                "disk_reads": self._disk_reads,
+                "searches": self._searches
+            }
+
+    def flush(self) -> None:
+        """Block until every queued record has been committed"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending writes and stop the writer and sync threads"""
+        if not self._writer.is_alive():
+            return
+        self._stop_sync.set()
+        if self.shared:
+            self._syncer.join()
+        self._queue.put(_STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._conn.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+
+    def _write_loop(self) -> None:
+        """Drain the write queue, committing everything available as one batch"""
+        conn = self._connect()
+        # Hour in which expired rollup buckets were last deleted
+        pruned_hour = None
+        try:
+            while True:
+                batch = [self._queue.get()]
+                queued = 0 if batch[0] is _STOP else len(batch[0])
+                while queued < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                    if item is not _STOP:
+                        queued += len(item)
+
+                stop = _STOP in batch
+                rows = [row for item in batch if item is not _STOP for row in item]
+                try:
+                    if rows and self.shared:
+                        # SQLite assigns the ids; the write lock held until commit keeps them gap-free across processes
+                        with conn:
+                            indexed = []
+                            for row in rows:
+                                cursor = conn.execute(
+                                    "INSERT INTO history (input_type, intent, extracted_data, timestamp, source_info, summary) "
+                                    "VALUES (?, ?, ?, ?, ?, ?)",
+                                    row[:6]
+                                )
+                                indexed.append((cursor.lastrowid,) + row[6:11])
+                            conn.executemany(INSERT_SEARCH, indexed)
+                            pruned_hour = self._count(conn, rows, pruned_hour)
+                    elif rows:
+                        with conn:
+                            conn.executemany(
+                                "INSERT INTO history (id, input_type, intent, extracted_data, timestamp, source_info, summary) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                [row[:7] for row in rows]
+                            )
+                            conn.executemany(INSERT_SEARCH, [(row[0],) + row[7:12] for row in rows])
+                            pruned_hour = self._count(conn, rows, pruned_hour)
+                except sqlite3.Error:
+                    logger.exception("Failed to persist %d history records", len(rows))
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, rows: List[tuple], pruned_hour: Optional[int]) -> int:
+        """
+        Add a batch to the rollups, in the transaction that stores it
+
+        Each batch costs one upsert per touched bucket and tier rather than
+        per document. Expired buckets are deleted once an hour.
+
+        Returns:
+            The hour expired buckets were last deleted in
+        """
+        items = [row[-1] for row in rows]
+        conn.executemany(UPSERT_ROLLUP, rollup_increments(items))
+        now = max(item[0] for item in items)
+        if pruned_hour != int(now // 3600):
+            prune_rollups(conn, now)
+        return int(now // 3600)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    LRU + TTL cache of pipeline results keyed by content hash
+
+    Keys combine the document's SHA-256 digest, the filename hints the
+    classifier looks at, and a pipeline version. Bumping the version (or
+    calling ``invalidate``) drops results produced by older agent logic.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, version: str = "1"):
+        """
+        Configure the cache
+
+        Args:
+            max_entries: Maximum number of cached results
+            ttl_seconds: Seconds a result stays valid
+            version: Pipeline version folded into every key
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, digest: str, hints: Tuple = ()) -> Tuple:
+        """Build a cache key for a document digest and its filename hints"""
+        return (self.version, digest, hints)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Key from ``key()``
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, value: Any) -> None:
+        """Cache a result, evicting the least recently used entries when full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, version: Optional[str] = None) -> int:
+        """
+        Drop every cached result
+
+        Args:
+            version: Optional new pipeline version to key future entries with
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            if version is not None:
+                self.version = version
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Report size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
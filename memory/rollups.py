@@ -0,0 +1,268 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+# One row per (tier, bucket, input type, intent, urgency); the primary key
+# orders rows by tier and time, so a dashboard range is one index range scan.
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_rollups (
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    input_type TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    urgency TEXT NOT NULL,
+    documents INTEGER NOT NULL,
+    sized_documents INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    PRIMARY KEY (resolution, bucket, input_type, intent, urgency)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_rollups_backfill (
+    next_id INTEGER NOT NULL,
+    last_id INTEGER NOT NULL
+);
+"""
+
+# (name, bucket width in seconds, seconds kept or None for forever), finest first.
+# Every document is counted in all tiers; expired fine buckets are dropped,
+# leaving the coarser tiers as the downsampled history.
+TIERS = (
+    ("minute", 60, 2 * 86400),
+    ("hour", 3600, 90 * 86400),
+    ("day", 86400, None)
+)
+RESOLUTIONS = {name: seconds for name, seconds, _ in TIERS}
+
+DIMENSIONS = ("input_type", "intent", "urgency")
+
+# Urgency of documents whose agent does not report one
+NO_URGENCY = "NONE"
+
+# Most buckets an automatically chosen resolution may produce for a range
+AUTO_BUCKETS = 1440
+
+# Buckets are aligned to unix time, so hour and day buckets start on UTC
+# boundaries; history timestamps (and naive start/end values) are local time
+BUCKET_TIMEZONE = "UTC"
+
+UPSERT_ROLLUP = (
+    "INSERT INTO history_rollups "
+    "(resolution, bucket, input_type, intent, urgency, documents, sized_documents, size_bytes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (resolution, bucket, input_type, intent, urgency) DO UPDATE SET "
+    "documents = documents + excluded.documents, "
+    "sized_documents = sized_documents + excluded.sized_documents, "
+    "size_bytes = size_bytes + excluded.size_bytes"
+)
+
+def document_urgency(extracted_data: Any) -> str:
+    """The urgency an agent reported in its summary block, or NO_URGENCY"""
+    if isinstance(extracted_data, dict) and isinstance(extracted_data.get("summary"), dict):
+        urgency = extracted_data["summary"].get("urgency")
+        if urgency:
+            return str(urgency).upper()
+    return NO_URGENCY
+
+def rollup_increments(items: Iterable[Tuple[float, str, str, str, Optional[int]]]) -> List[tuple]:
+    """
+    Collapse stored documents into one increment per tier bucket and dimensions
+
+    Args:
+        items: (unix time, input type, intent, urgency, size in bytes or None) per document
+
+    Returns:
+        Parameter tuples for UPSERT_ROLLUP
+    """
+    # Counted once per document in the finest tier; coarser tiers add up those counts
+    finest = TIERS[0][1]
+    fine: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for stamp, input_type, intent, urgency, size in items:
+        count = fine[(int(stamp // finest) * finest, input_type, intent, urgency)]
+        count[0] += 1
+        if size is not None:
+            count[1] += 1
+            count[2] += size
+
+    increments = [(finest,) + key + tuple(count) for key, count in fine.items()]
+    for _, seconds, _ in TIERS[1:]:
+        coarse: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0, 0])
+        for (bucket, *dimensions), count in fine.items():
+            total = coarse[(bucket // seconds * seconds, *dimensions)]
+            for index in range(3):
+                total[index] += count[index]
+        increments.extend((seconds,) + key + tuple(count) for key, count in coarse.items())
+    return increments
+
+def prune_rollups(conn: sqlite3.Connection, now: float) -> None:
+    """Delete the buckets of each tier that are older than its retention"""
+    for _, seconds, retention in TIERS:
+        if retention is not None:
+            conn.execute("DELETE FROM history_rollups WHERE resolution = ? AND bucket < ?", (seconds, now - retention))
+
+def ensure_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Create the rollup table if it does not exist yet
+
+    Creating it over an existing history records which ids still have to
+    be counted; ``rollup_backfill_step`` works through them. Runs in one write
+    transaction, so processes sharing the database create it once.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_rollups'").fetchone()
+        if not exists:
+            for statement in ROLLUP_SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+            if last_id:
+                conn.execute("INSERT INTO history_rollups_backfill (next_id, last_id) VALUES (1, ?)", (last_id,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def rollup_backfill_pending(conn: sqlite3.Connection) -> bool:
+    """Whether history from before the rollups existed is still being counted"""
+    return conn.execute("SELECT 1 FROM history_rollups_backfill WHERE next_id <= last_id").fetchone() is not None
+
+def rollup_backfill_step(conn: sqlite3.Connection, batch_size: int) -> int:
+    """
+    Count the next batch of records stored before the rollups existed
+
+    Their sizes were never recorded, so they count as documents but not
+    towards the mean size.
+
+    Returns:
+        Number of ids covered (0 once the backfill is complete)
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        state = conn.execute("SELECT next_id, last_id FROM history_rollups_backfill").fetchone()
+        if state is None or state[0] > state[1]:
+            conn.execute("COMMIT")
+            return 0
+        next_id, last_id = state
+        upper = min(next_id + batch_size - 1, last_id)
+        rows = conn.execute(
+            "SELECT timestamp, input_type, intent, json_extract(extracted_data, '$.summary.urgency') "
+            "FROM history WHERE id BETWEEN ? AND ?",
+            (next_id, upper)
+        ).fetchall()
+        conn.executemany(UPSERT_ROLLUP, rollup_increments(
+            (datetime.fromisoformat(row[0]).timestamp(), row[1], row[2], str(row[3]).upper() if row[3] else NO_URGENCY, None)
+            for row in rows
+        ))
+        conn.execute("UPDATE history_rollups_backfill SET next_id = ?", (upper + 1,))
+        prune_rollups(conn, time.time())
+        conn.execute("COMMIT")
+        return upper - next_id + 1
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def _unix_time(value: Optional[str], default: float) -> float:
+    """An ISO timestamp as unix time; naive timestamps are local time, like history timestamps"""
+    if value is None:
+        return default
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+
+def _iso(stamp: float) -> str:
+    """Unix time as an ISO timestamp in BUCKET_TIMEZONE"""
+    return datetime.fromtimestamp(stamp, timezone.utc).isoformat()
+
+def choose_resolution(start: float, end: float, now: float) -> str:
+    """The finest tier that still holds ``start`` and covers the range in at most AUTO_BUCKETS buckets"""
+    for name, seconds, retention in TIERS:
+        if (retention is None or start >= now - retention) and (end - start) / seconds <= AUTO_BUCKETS:
+            return name
+    return TIERS[-1][0]
+
+def query_rollups(
+    conn: sqlite3.Connection,
+    resolution: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    group_by: Iterable[str] = (),
+    filters: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Document counts and mean sizes per time bucket
+
+    Reads only the rollup rows in the range, so the cost depends on the
+    number of buckets and groups, not on the size of the history.
+
+    Args:
+        conn: Connection to the history database
+        resolution: "minute", "hour" or "day" (chosen from the range when None)
+        start: ISO timestamp, inclusive (defaults to 24 hours before ``end``)
+        end: ISO timestamp, exclusive (defaults to now)
+        group_by: Dimensions (DIMENSIONS) to break each bucket down by
+        filters: Exact values for dimensions
+
+    Returns:
+        Dict with the resolution, range, bucket timezone, totals and the
+        non-empty buckets, oldest first. Times are reported in UTC;
+        ``sized_documents`` counts the documents behind the mean sizes
+
+    Raises:
+        ValueError: For an unknown resolution or dimension, or a malformed timestamp
+    """
+    now = time.time()
+    end_time = _unix_time(end, now)
+    start_time = _unix_time(start, end_time - 86400)
+    if resolution is None:
+        resolution = choose_resolution(start_time, end_time, now)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution} (expected one of {', '.join(RESOLUTIONS)})")
+    group_by = list(dict.fromkeys(group_by))
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    for name in group_by + list(filters):
+        if name not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {name} (expected one of {', '.join(DIMENSIONS)})")
+
+    seconds = RESOLUTIONS[resolution]
+    # Buckets overlapping the range: the one holding start through the last one starting before end
+    clauses = ["resolution = ?", "bucket >= ?", "bucket < ?"]
+    params: List[Any] = [seconds, int(start_time // seconds) * seconds, end_time]
+    for name, value in filters.items():
+        clauses.append(f"{name} = ?")
+        params.append(value)
+    columns = "".join(f", {name}" for name in group_by)
+    rows = conn.execute(
+        f"SELECT bucket{columns}, SUM(documents), SUM(sized_documents), SUM(size_bytes) "
+        f"FROM history_rollups WHERE {' AND '.join(clauses)} "
+        f"GROUP BY bucket{columns} ORDER BY bucket{columns}",
+        params
+    ).fetchall()
+
+    buckets = []
+    documents = sized = size_bytes = 0
+    for row in rows:
+        bucket_documents, bucket_sized, bucket_bytes = row[-3:]
+        entry = {"start": _iso(row[0])}
+        entry.update(zip(group_by, row[1:-3]))
+        entry["documents"] = bucket_documents
+        entry["sized_documents"] = bucket_sized
+        entry["mean_size_bytes"] = round(bucket_bytes / bucket_sized, 1) if bucket_sized else None
+        buckets.append(entry)
+        documents += bucket_documents
+        sized += bucket_sized
+        size_bytes += bucket_bytes
+    return {
+        "resolution": resolution,
+        "start": _iso(start_time),
+        "end": _iso(end_time),
+        "timezone": BUCKET_TIMEZONE,
+        "group_by": group_by,
+        "totals": {
+            "documents": documents,
+            "sized_documents": sized,
+            "mean_size_bytes": round(size_bytes / sized, 1) if sized else None
+        },
+        "buckets": buckets
+    }
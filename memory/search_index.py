@@ -0,0 +1,191 @@
+from typing import Any, Iterator, List, Optional, Tuple
+import json
+import re
+import sqlite3
+
+# Contentless: the index keeps only terms and rowids (= history ids); results are read back from history.
+# The prefix indexes make 2- and 3-character prefix queries index lookups instead of term scans.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    source, subject, body, requests, fields,
+    content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TABLE IF NOT EXISTS history_fts_backfill (
+    next_id INTEGER NOT NULL,
+    last_id INTEGER NOT NULL
+);
+"""
+
+SEARCH_COLUMNS = ("source", "subject", "body", "requests", "fields")
+
+# BM25 weight per column, in SEARCH_COLUMNS order
+COLUMN_WEIGHTS = (2.0, 4.0, 1.0, 2.0, 1.5)
+
+# Values the agents use for "nothing found", which should not match searches
+PLACEHOLDERS = {"No Subject", "Unknown", "No specific items listed", "No contact information found"}
+
+# Matches ranked per search, newest first: BM25 has to score every match
+# before it can order them, so a term found in most of a large history is
+# ranked over its newest matches only (~0.1 s instead of seconds at 1M records)
+RANK_WINDOW = 20000
+
+# Text indexed per column, so a huge list or preview cannot bloat the index
+MAX_COLUMN_CHARS = 4096
+
+QUERY_TOKEN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+WORD = re.compile(r"\w+")
+
+def _strings(value: Any) -> Iterator[str]:
+    """Every string and number in a nested value, dict keys included"""
+    if isinstance(value, str):
+        if value not in PLACEHOLDERS:
+            yield value
+    elif isinstance(value, bool) or value is None:
+        return
+    elif isinstance(value, (int, float)):
+        yield str(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+def _column(*values: Any) -> str:
+    parts: List[str] = []
+    size = 0
+    for value in values:
+        for text in _strings(value):
+            parts.append(text)
+            size += len(text) + 1
+            if size >= MAX_COLUMN_CHARS:
+                return " ".join(parts)[:MAX_COLUMN_CHARS]
+    return " ".join(parts)
+
+def search_columns(extracted_data: Any, source_info: Optional[str]) -> Tuple[str, str, str, str, str]:
+    """
+    The searchable text of a processed document
+
+    Args:
+        extracted_data: Agent result
+        source_info: Filename or source description
+
+    Returns:
+        Text for each of SEARCH_COLUMNS: source (filename, sender), subject
+        (subject, document type, intent, PDF title), body (previews),
+        requests (key requests, contacts, line items) and fields (JSON keys,
+        metrics, column names)
+    """
+    if not isinstance(extracted_data, dict):
+        return (source_info or "", "", "", "", "")
+    summary = extracted_data.get("summary") if isinstance(extracted_data.get("summary"), dict) else {}
+    details = extracted_data.get("details") if isinstance(extracted_data.get("details"), dict) else {}
+    structure = extracted_data.get("structure") if isinstance(extracted_data.get("structure"), dict) else {}
+    columns = extracted_data.get("columns") if isinstance(extracted_data.get("columns"), dict) else {}
+    return (
+        _column(source_info, summary.get("sender")),
+        _column(details.get("subject"), summary.get("document_type"), summary.get("intent"), (details.get("document_info") or {}).get("Title")),
+        _column(details.get("body_preview"), details.get("text_preview"), details.get("content_preview"), extracted_data.get("error")),
+        _column(details.get("key_requests"), details.get("contact_info"), details.get("line_items")),
+        _column(structure.get("key_fields"), extracted_data.get("metrics"), {name: list(column.get("fields") or {}) for name, column in columns.items() if isinstance(column, dict)})
+    )
+
+def build_match(query: str) -> str:
+    """
+    Translate a search box query into an FTS5 MATCH expression
+
+    Terms are ANDed; ``"quoted words"`` match as a phrase, a trailing ``*``
+    matches by prefix, ``OR`` between terms matches either, and
+    ``column:term`` restricts a term to one of SEARCH_COLUMNS. Punctuation
+    splits words, so ``john.doe@company.com`` finds the address as a phrase.
+
+    Args:
+        query: User input
+
+    Returns:
+        MATCH expression
+
+    Raises:
+        ValueError: If the query has no searchable words
+    """
+    parts = []
+    for match in QUERY_TOKEN.finditer(query):
+        column, quoted, bare = match.groups()
+        text = quoted if quoted is not None else bare
+        if quoted is None and text == "OR" and parts and parts[-1] != "OR":
+            parts.append("OR")
+            continue
+        prefix = quoted is None and text.endswith("*")
+        words = WORD.findall(text.lower())
+        if not words:
+            continue
+        phrase = '"' + " ".join(words) + '"' + ("*" if prefix else "")
+        if column and column.lower() in SEARCH_COLUMNS:
+            phrase = f"{column.lower()} : {phrase}"
+        parts.append(phrase)
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    if not parts:
+        raise ValueError("Search query has no searchable words")
+    return " ".join(parts)
+
+def ensure_search_index(conn: sqlite3.Connection) -> None:
+    """
+    Create the search index if it does not exist yet
+
+    Creating it over an existing history records which ids still have to
+    be indexed; ``backfill_step`` works through them. The check and the
+    creation run in one write transaction, so processes sharing the
+    database create it once.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone()
+        if not exists:
+            for statement in SEARCH_SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+            conn.execute("INSERT INTO history_fts (history_fts, rank) VALUES ('rank', ?)", (f"bm25({weights})",))
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+            if last_id:
+                conn.execute("INSERT INTO history_fts_backfill (next_id, last_id) VALUES (1, ?)", (last_id,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def backfill_pending(conn: sqlite3.Connection) -> bool:
+    """Whether history from before the index existed is still being indexed"""
+    return conn.execute("SELECT 1 FROM history_fts_backfill WHERE next_id <= last_id").fetchone() is not None
+
+def backfill_step(conn: sqlite3.Connection, batch_size: int) -> int:
+    """
+    Index the next batch of records stored before the index existed
+
+    Returns:
+        Number of ids covered (0 once the backfill is complete)
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        state = conn.execute("SELECT next_id, last_id FROM history_fts_backfill").fetchone()
+        if state is None or state[0] > state[1]:
+            conn.execute("COMMIT")
+            return 0
+        next_id, last_id = state
+        upper = min(next_id + batch_size - 1, last_id)
+        rows = conn.execute(
+            "SELECT id, extracted_data, source_info FROM history WHERE id BETWEEN ? AND ?",
+            (next_id, upper)
+        ).fetchall()
+        conn.executemany(
+            f"INSERT INTO history_fts (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            [(row[0],) + search_columns(json.loads(row[1]), row[2]) for row in rows]
+        )
+        conn.execute("UPDATE history_fts_backfill SET next_id = ?", (upper + 1,))
+        conn.execute("COMMIT")
+        return upper - next_id + 1
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
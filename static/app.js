@@ -0,0 +1,301 @@
+function formatResults(data) {
+    if (data.status === "error") {
+        return "❌ Error: " + data.message;
+    }
+
+    let output = [];
+
+    if (data.summary) {
+        output.push(data.summary.status);
+        output.push("Document Type: " + data.summary.document_type);
+        if (data.classification && data.classification.intent) {
+            output.push("Intent: " + data.classification.intent);
+        }
+        if (data.summary.timestamp) {
+            output.push("Processed: " + data.summary.timestamp);
+        }
+    }
+
+    if (data.details) {
+        if (data.details.subject) {
+            output.push("\nSubject: " + data.details.subject);
+        }
+        if (data.details.key_requests && data.details.key_requests.length > 0) {
+            output.push("\nKey Requests:");
+            data.details.key_requests.forEach(req => {
+                output.push("  • " + req);
+            });
+        }
+        if (data.details.contact_info && data.details.contact_info.length > 0) {
+            output.push("\nContact Information:");
+            data.details.contact_info.forEach(contact => {
+                output.push("  • " + contact);
+            });
+        }
+    }
+
+    if (data.metrics) {
+        output.push("\nMetrics:");
+        Object.entries(data.metrics).forEach(([key, value]) => {
+            output.push("  • " + key + ": " + value);
+        });
+    }
+
+    if (data.suggested_action) {
+        output.push("\n" + data.suggested_action);
+    }
+
+    return output.join("\n");
+}
+
+function scrollToResults() {
+    const resultsBox = document.getElementById("resultsBox");
+    resultsBox.scrollIntoView({ behavior: "smooth" });
+}
+
+const HISTORY_PAGE = 20;
+// Summary records shown in the sidebar, newest first
+let historyItems = [];
+let historyLastId = 0;
+let historyCursor = null;
+let historyEvents = null;
+// Full results, fetched when an item is first expanded
+const historyDetails = {};
+const SEARCH_DELAY_MS = 250;
+let searchTimer = null;
+let searchSequence = 0;
+
+function getHistoryTitle(item) {
+    if (item.input_type.toLowerCase() === 'email') {
+        if (item.subject) {
+            return `📧 ${item.subject}`;
+        }
+        return '📧 Email Document';
+    } else if (item.input_type.toLowerCase() === 'pdf') {
+        return `📄 ${item.source_info}`;
+    } else if (item.input_type.toLowerCase() === 'json') {
+        return '🔧 JSON Document';
+    }
+    return `📝 ${item.source_info}`;
+}
+
+function historyItemHtml(item, scope = "summary") {
+    const title = getHistoryTitle(item);
+    const formattedTime = new Date(item.timestamp).toLocaleString();
+
+    return `
+        <div class="history-item" onclick="toggleSummary('${item.id}', '${scope}')">
+            <div class="title">${title}</div>
+            <div class="time">${formattedTime}</div>
+            <div id="${scope}-${item.id}" class="summary" style="display: none"></div>
+        </div>
+    `;
+}
+
+function showEmptyHistory() {
+    if (historyItems.length === 0) {
+        document.getElementById("historyBox").innerHTML = "<p>No processing history yet</p>";
+    }
+}
+
+// Add new records (oldest first) to the top of the list
+function prependHistory(items) {
+    const historyBox = document.getElementById("historyBox");
+    items.forEach(item => {
+        if (item.id <= historyLastId) {
+            return;
+        }
+        if (historyItems.length === 0) {
+            historyBox.innerHTML = "";
+        }
+        historyLastId = item.id;
+        historyItems.unshift(item);
+        historyBox.insertAdjacentHTML("afterbegin", historyItemHtml(item));
+    });
+}
+
+// Add older records (newest first) to the bottom of the list
+function appendHistory(items) {
+    const historyBox = document.getElementById("historyBox");
+    if (historyItems.length === 0 && items.length > 0) {
+        historyBox.innerHTML = "";
+        historyLastId = items[0].id;
+    }
+    items.forEach(item => {
+        historyItems.push(item);
+        historyBox.insertAdjacentHTML("beforeend", historyItemHtml(item));
+    });
+}
+
+async function fetchHistoryPage(query) {
+    const response = await fetch(`/history?fields=summary&${query}`);
+    return response.json();
+}
+
+async function loadHistory() {
+    try {
+        const data = await fetchHistoryPage(`limit=${HISTORY_PAGE}`);
+        appendHistory(data.history);
+        historyCursor = data.next_cursor;
+        document.getElementById("historyMore").style.display = historyCursor ? "block" : "none";
+        showEmptyHistory();
+        subscribeHistory();
+    } catch (error) {
+        console.error("Error loading history:", error);
+        document.getElementById("historyBox").innerHTML = "<p>❌ Error loading history</p>";
+    }
+}
+
+async function loadMoreHistory() {
+    if (!historyCursor) {
+        return;
+    }
+    const data = await fetchHistoryPage(`limit=${HISTORY_PAGE}&cursor=${historyCursor}`);
+    appendHistory(data.history);
+    historyCursor = data.next_cursor;
+    document.getElementById("historyMore").style.display = historyCursor ? "block" : "none";
+}
+
+// New records are pushed as they are stored; the browser resumes after the last event id on reconnect
+function subscribeHistory() {
+    if (!window.EventSource) {
+        return;
+    }
+    historyEvents = new EventSource(`/history/events?since=${historyLastId}`);
+    historyEvents.addEventListener("record", event => prependHistory([JSON.parse(event.data)]));
+}
+
+// Fetch records added since the newest one shown, when no event stream is delivering them
+async function updateHistory() {
+    if (historyEvents && historyEvents.readyState !== EventSource.CLOSED) {
+        return;
+    }
+    try {
+        const data = await fetchHistoryPage(`since=${historyLastId}&limit=100`);
+        prependHistory(data.history);
+    } catch (error) {
+        console.error("Error loading history:", error);
+    }
+}
+
+async function toggleSummary(itemId, scope = "summary") {
+    const summaryElement = document.getElementById(`${scope}-${itemId}`);
+    const allSummaries = document.querySelectorAll('.summary');
+
+    // Hide all other summaries
+    allSummaries.forEach(summary => {
+        if (summary.id !== `${scope}-${itemId}`) {
+            summary.style.display = 'none';
+        }
+    });
+
+    if (!summaryElement) {
+        return;
+    }
+    if (summaryElement.style.display !== 'none') {
+        summaryElement.style.display = 'none';
+        return;
+    }
+    summaryElement.style.display = 'block';
+    if (!(itemId in historyDetails)) {
+        summaryElement.textContent = "Loading...";
+        try {
+            const response = await fetch(`/history/${itemId}`);
+            const record = await response.json();
+            historyDetails[itemId] = record.extracted_data;
+        } catch (error) {
+            summaryElement.textContent = "❌ Error loading result";
+            return;
+        }
+    }
+    summaryElement.textContent = formatResults(historyDetails[itemId]);
+}
+
+// Search as the user types; an empty box shows the history list again
+function searchHistory() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, SEARCH_DELAY_MS);
+}
+
+async function runSearch() {
+    const query = document.getElementById("historySearch").value.trim();
+    const searchBox = document.getElementById("searchBox");
+    const searching = query.length > 0;
+    searchBox.style.display = searching ? "block" : "none";
+    document.getElementById("historyBox").style.display = searching ? "none" : "block";
+    document.getElementById("historyMore").style.display = !searching && historyCursor ? "block" : "none";
+    if (!searching) {
+        return;
+    }
+
+    // Responses can arrive out of order; only the latest query's results are shown
+    const sequence = ++searchSequence;
+    try {
+        const response = await fetch(`/search?limit=${HISTORY_PAGE}&q=${encodeURIComponent(query)}`);
+        const data = await response.json();
+        if (sequence !== searchSequence) {
+            return;
+        }
+        if (data.status === "error") {
+            searchBox.innerHTML = `<p>${data.message}</p>`;
+        } else if (data.results.length === 0) {
+            searchBox.innerHTML = "<p>No matching documents</p>";
+        } else {
+            const note = data.truncated
+                ? `<p class="search-note">Ranked among the newest ${data.ranked_window.toLocaleString()} matches; refine the search to include older documents</p>`
+                : "";
+            searchBox.innerHTML = note + data.results.map(item => historyItemHtml(item, "search")).join("");
+        }
+    } catch (error) {
+        console.error("Error searching history:", error);
+        searchBox.innerHTML = "<p>❌ Error searching history</p>";
+    }
+}
+
+async function handleFormSubmit(event, formId, endpoint) {
+    event.preventDefault();
+
+    const form = document.getElementById(formId);
+    const loading = document.getElementById("loading");
+    const resultsBox = document.getElementById("resultsBox");
+    const resultsContent = document.getElementById("resultsContent");
+    const scrollButton = document.getElementById("scrollToResults");
+
+    loading.style.display = "block";
+    resultsBox.style.display = "none";
+    scrollButton.style.display = "none";
+
+    try {
+        const formData = new FormData(form);
+        const response = await fetch(endpoint, {
+            method: "POST",
+            body: formData
+        });
+
+        const data = await response.json();
+
+        loading.style.display = "none";
+        resultsBox.style.display = "block";
+        resultsBox.className = "results-box " + (data.status === "error" ? "error" : "success");
+        resultsContent.textContent = formatResults(data);
+        scrollButton.style.display = "block";
+        scrollToResults();
+
+        // Update history after processing
+        updateHistory();
+    } catch (error) {
+        loading.style.display = "none";
+        resultsBox.style.display = "block";
+        resultsBox.className = "results-box error";
+        resultsContent.textContent = "❌ Error: " + error.message;
+        scrollButton.style.display = "block";
+        scrollToResults();
+    }
+}
+
+// Add event listeners
+document.getElementById("uploadForm").addEventListener("submit", (e) => handleFormSubmit(e, "uploadForm", "/process-file"));
+document.getElementById("textForm").addEventListener("submit", (e) => handleFormSubmit(e, "textForm", "/process-text"));
+
+// Load initial history
+loadHistory();
@@ -0,0 +1,20 @@
+import importlib
+import os
+import pytest
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The app, imported once with its history, job spool and limits pointed at a temp directory"""
+    directory = tmp_path_factory.mktemp("app")
+    os.environ["MEMORY_DB_PATH"] = str(directory / "history.db")
+    os.environ["JOB_SPOOL_DIR"] = str(directory / "job-spool")
+    os.environ["MAX_UPLOAD_BYTES"] = "4096"
+    main = importlib.import_module("main")
+    yield main
+    main.memory.close()
+
+@pytest.fixture(scope="session")
+def client(app_module):
+    from fastapi.testclient import TestClient
+    with TestClient(app_module.app) as client:
+        yield client
@@ -0,0 +1,38 @@
+import zlib
+from typing import List, Sequence
+
+def text_stream(*lines: str) -> bytes:
+    """A content stream showing each line on its own text line"""
+    shown = b" T* ".join(b"(%s) Tj" % line.encode("latin-1") for line in lines)
+    return b"BT /F1 12 Tf 14 TL " + shown + b" ET"
+
+def build_pdf(pages: Sequence[Sequence[bytes]]) -> bytes:
+    """
+    Build a PDF with a classic xref table
+
+    Args:
+        pages: For each page, its content streams (Flate-compressed here)
+    """
+    objects: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for streams in pages:
+        page_num = len(objects) + 1
+        content_nums = list(range(page_num + 1, page_num + 1 + len(streams)))
+        contents = b"[%s]" % b" ".join(b"%d 0 R" % num for num in content_nums)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 3 0 R >> >> /Contents %s >>" % contents)
+        for stream in streams:
+            data = zlib.compress(stream)
+            objects.append(b"<< /Length %d /Filter /FlateDecode >>stream\n" % len(data) + data + b"\nendstream")
+        kids.append(b"%d 0 R" % page_num)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
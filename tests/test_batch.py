@@ -0,0 +1,49 @@
+import json
+import time
+from utils.executor import PipelineExecutor
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_ndjson_batch_streams_one_line_per_document(client):
+    body = "\n".join([
+        json.dumps("From: a@example.com\nSubject: Quote\n\nPlease send a quote for batch test one"),
+        json.dumps({"content": '{"invoice": "B-1", "total": 5}', "source": "inline.json"}),
+        "",
+    ])
+    response = client.post("/process-batch", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    lines = sorted(_lines(response), key=lambda line: line["index"])
+    assert [line["status"] for line in lines] == ["success", "success"]
+    assert [line["classification"]["format"] for line in lines] == ["EMAIL", "JSON"]
+    assert lines[1]["source"] == "inline.json"
+
+def test_multipart_batch(client):
+    files = [("files", ("a.txt", b"plain batch text a")), ("files", ("b.json", b'{"order": "B-2"}'))]
+    lines = _lines(client.post("/process-batch", files=files))
+    assert sorted(line["source"] for line in lines) == ["a.txt", "b.json"]
+    assert all(line["status"] == "success" for line in lines)
+
+def test_batch_rejects_bad_lines(client):
+    response = client.post("/process-batch", content="[1, 2]\n", headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 400
+
+def test_large_batch_waits_for_pool_capacity(client, app_module, monkeypatch):
+    # One worker, no queue and a short timeout: every item beyond the cap would be rejected
+    executor = PipelineExecutor({"TEXT": 1}, queue_size=0, queue_timeout=0.01)
+    monkeypatch.setattr(app_module, "executor", executor)
+    run_pipeline_timed = app_module.run_pipeline_timed
+
+    def slow_pipeline(*args):
+        time.sleep(0.03)
+        return run_pipeline_timed(*args)
+
+    monkeypatch.setattr(app_module, "run_pipeline_timed", slow_pipeline)
+    try:
+        body = "\n".join(json.dumps(f"backpressure document number {index}") for index in range(8))
+        lines = _lines(client.post("/process-batch", content=body, headers={"content-type": "application/x-ndjson"}))
+        assert len(lines) == 8
+        assert all(line["status"] == "success" for line in lines), [line for line in lines if line["status"] != "success"][:1]
+        assert executor.stats()["TEXT"]["rejected"] == 0
+    finally:
+        executor.shutdown()
@@ -0,0 +1,75 @@
+import gzip
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from utils.compression import CompressionMiddleware, choose_encoding
+
+BIG = "line of text\n" * 500
+
+def _client():
+    async def big(request):
+        return PlainTextResponse(BIG)
+
+    async def small(request):
+        return PlainTextResponse("short")
+
+    async def stream(request):
+        async def lines():
+            for index in range(3):
+                yield f"{index}\n" * 400
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def events(request):
+        return StreamingResponse(iter(["data: x\n\n" * 200]), media_type="text/event-stream")
+
+    async def encoded(request):
+        return PlainTextResponse(gzip.compress(BIG.encode()), headers={"Content-Encoding": "gzip"})
+
+    app = Starlette(routes=[
+        Route("/big", big), Route("/small", small), Route("/stream", stream),
+        Route("/events", events), Route("/encoded", encoded)
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+def _get(client, path, accept="gzip"):
+    # Ask for the raw bytes so the check sees what went over the wire
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_choose_encoding_honours_quality():
+    assert choose_encoding("gzip;q=0.5, identity") == "gzip"
+    assert choose_encoding("gzip;q=0") == "identity"
+    assert choose_encoding("*") in ("br", "gzip")
+
+def test_large_body_is_gzipped():
+    response, raw = _get(_client(), "/big")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert gzip.decompress(raw).decode() == BIG
+
+def test_small_body_and_identity_pass_through():
+    client = _client()
+    response, raw = _get(client, "/small")
+    assert "content-encoding" not in response.headers
+    assert raw == b"short"
+    response, raw = _get(client, "/big", accept="identity")
+    assert "content-encoding" not in response.headers
+    assert raw.decode() == BIG
+
+def test_streamed_body_is_compressed_chunk_by_chunk():
+    response, raw = _get(_client(), "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode() == "".join(f"{index}\n" * 400 for index in range(3))
+
+def test_event_streams_and_encoded_bodies_are_left_alone():
+    client = _client()
+    response, raw = _get(client, "/events")
+    assert "content-encoding" not in response.headers
+    assert raw.startswith(b"data: x")
+    response, raw = _get(client, "/encoded")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == BIG
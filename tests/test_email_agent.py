@@ -0,0 +1,37 @@
+from agents.classifier import find_header_end
+from agents.email_agent import PREVIEW_CHARS, EmailAgent
+
+EMAIL = (
+    "From: Dana <dana@example.com>\n"
+    "Subject: Quarterly order\n"
+    "  for the north office\n"
+    "\n"
+    "Note: this body line has a colon but is not a header.\n"
+    "- 20 chairs\n"
+    "  • 4 desks\n"
+    "Call 555-123-4567 or write to orders@example.com.\n"
+)
+
+def test_header_block_ends_at_first_blank_line():
+    header_end = find_header_end(EMAIL)
+    assert EMAIL[header_end:].startswith("\nNote:")
+    assert find_header_end("\n\nFrom: a\nplain body line\n") == len("\n\nFrom: a\n")
+
+def test_extracts_headers_items_and_contacts():
+    result = EmailAgent().extract_email_data(EMAIL)
+    assert result["summary"]["sender"] == "Dana <dana@example.com>"
+    details = result["details"]
+    # The folded subject is unfolded; the body's "Note:" line is not read as a header
+    assert details["subject"] == "Quarterly order for the north office"
+    assert details["key_requests"] == ["20 chairs", "4 desks"]
+    assert details["contact_info"] == ["555-123-4567", "dana@example.com", "orders@example.com"]
+    assert details["body_preview"].startswith("Note: this body line")
+
+def test_work_is_capped_by_what_is_returned():
+    body = "".join(f"- item {index} call 555-000-{index:04d}\n" for index in range(500))
+    content = "From: bulk@example.com\nSubject: Bulk\n\n" + body + "x" * 100000
+    result = EmailAgent().extract_email_data(content, max_contacts=3, max_items=5)
+    details = result["details"]
+    assert details["contact_info"] == ["555-000-0000", "555-000-0001", "555-000-0002"]
+    assert len(details["key_requests"]) == 5
+    assert len(details["body_preview"]) == PREVIEW_CHARS + len("...")
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import pytest
+from utils.executor import ExecutorSaturated, PipelineExecutor, parse_workers
+
+def test_parse_workers():
+    assert parse_workers("pdf=2, JSON=4,bogus") == {"PDF": 2, "JSON": 4}
+
+def test_submit_returns_result_and_counts():
+    async def run():
+        executor = PipelineExecutor({"TEXT": 2})
+        try:
+            assert await executor.submit("text", sum, [1, 2, 3]) == 6
+            with pytest.raises(ZeroDivisionError):
+                await executor.submit("TEXT", divmod, 1, 0)
+            await asyncio.sleep(0)
+            return executor.stats()["TEXT"]
+        finally:
+            executor.shutdown()
+
+    stats = asyncio.run(run())
+    assert (stats["submitted"], stats["completed"], stats["failed"], stats["in_flight"]) == (2, 1, 1, 0)
+    assert stats["mode"] == "thread"
+
+def test_full_queue_rejects_after_timeout():
+    release = threading.Event()
+
+    async def run():
+        executor = PipelineExecutor({"TEXT": 1}, queue_size=1, queue_timeout=0.05)
+        try:
+            running = [asyncio.ensure_future(executor.submit("TEXT", release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            with pytest.raises(ExecutorSaturated):
+                await executor.submit("TEXT", release.wait)
+            release.set()
+            assert await asyncio.gather(*running) == [True, True]
+            return executor.stats()["TEXT"]
+        finally:
+            release.set()
+            executor.shutdown()
+
+    stats = asyncio.run(run())
+    assert (stats["rejected"], stats["completed"]) == (1, 2)
+
+def test_cancelled_caller_keeps_slot_until_job_ends():
+    release = threading.Event()
+
+    async def run():
+        executor = PipelineExecutor({"TEXT": 1}, queue_size=0, queue_timeout=0.05)
+        try:
+            task = asyncio.ensure_future(executor.submit("TEXT", release.wait))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.sleep(0.01)
+            # The job still runs, so it still holds the only slot
+            assert executor.stats()["TEXT"]["in_flight"] == 1
+            with pytest.raises(ExecutorSaturated):
+                await executor.submit("TEXT", release.wait)
+            release.set()
+            for _ in range(100):
+                if executor.stats()["TEXT"]["in_flight"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert await executor.submit("TEXT", len, "abc") == 3
+            return executor.stats()["TEXT"]
+        finally:
+            release.set()
+            executor.shutdown()
+
+    stats = asyncio.run(run())
+    assert stats["in_flight"] == 0
+    assert stats["completed"] == 2
+
+def test_process_group_copies_views_for_workers():
+    async def run():
+        executor = PipelineExecutor({"MAILBOX": 1}, process_groups=["mailbox"])
+        try:
+            return await executor.submit("MAILBOX", bytes.upper, memoryview(b"abc")), executor.stats()["MAILBOX"]["mode"]
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(run()) == (b"ABC", "process")
@@ -0,0 +1,38 @@
+def _store_two(client, app_module, name):
+    # Repeated documents are answered from the cache and not stored again, so each test sends its own
+    before = app_module.memory.last_id
+    for number in ("one", "two"):
+        client.post("/process-text", data={"content": f"History note {number} from {name}"})
+    return before
+
+def test_history_delta_and_pages(client, app_module):
+    before = _store_two(client, app_module, "test_history_delta_and_pages")
+    delta = client.get("/history", params={"since": before, "limit": 1}).json()
+    assert [record["id"] for record in delta["history"]] == [before + 1]
+    assert (delta["last_id"], delta["has_more"]) == (before + 1, True)
+    delta = client.get("/history", params={"since": before + 1}).json()
+    assert [record["id"] for record in delta["history"]] == [before + 2]
+    assert delta["has_more"] is False
+
+    page = client.get("/history", params={"limit": 1}).json()
+    assert page["history"][0]["id"] == before + 2
+    older = client.get("/history", params={"limit": 1, "cursor": page["next_cursor"]}).json()
+    assert older["history"][0]["id"] == before + 1
+
+def test_history_summary_filter_and_etag(client, app_module):
+    before = _store_two(client, app_module, "test_history_summary_filter_and_etag")
+    response = client.get("/history", params={"since": before, "fields": "summary", "input_type": "text"})
+    records = response.json()["history"]
+    assert len(records) == 2 and all("extracted_data" not in record for record in records)
+    assert client.get("/history", params={"since": before, "input_type": "json"}).json()["history"] == []
+    assert client.get("/history", params={"fields": "everything"}).status_code == 400
+
+    etag = response.headers["etag"]
+    again = client.get("/history", params={"since": before, "fields": "summary", "input_type": "text"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+def test_history_record_lookup(client, app_module):
+    before = _store_two(client, app_module, "test_history_record_lookup")
+    record = client.get(f"/history/{before + 1}").json()
+    assert record["id"] == before + 1 and "extracted_data" in record
+    assert client.get("/history/999999").status_code == 404
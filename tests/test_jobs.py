@@ -0,0 +1,128 @@
+import asyncio
+import os
+from memory.job_store import JobStore
+from utils.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, Job, JobQueue
+
+class Busy(Exception):
+    pass
+
+async def _wait(queue, job):
+    # Subscribe before the job can run; its event is sent once it is fully recorded
+    subscriber = queue.subscribe()
+    try:
+        while (await asyncio.wait_for(subscriber.get(), 5)) is not job:
+            pass
+    finally:
+        queue.unsubscribe(subscriber)
+    return job
+
+def test_jobs_succeed_and_fail():
+    async def handler(job, source):
+        if source == "boom":
+            raise ValueError("bad document")
+        return {"length": len(source)}
+
+    async def run():
+        queue = JobQueue(handler, workers=2)
+        await queue.start()
+        try:
+            good = await _wait(queue, await queue.submit("text", "hello"))
+            bad = await _wait(queue, await queue.submit("text", "boom"))
+        finally:
+            await queue.stop()
+        assert good.as_dict()["result"] == {"length": 5}
+        assert bad.as_dict()["error"] == "bad document"
+        stats = queue.stats()
+        assert (stats["succeeded"], stats["failed"]) == (1, 1)
+
+    asyncio.run(run())
+
+def test_saturated_jobs_retry_then_give_up():
+    attempts = []
+
+    async def handler(job, source):
+        attempts.append(source)
+        if source == "always busy" or len(attempts) < 3:
+            raise Busy("pool is full")
+        return {"ok": True}
+
+    async def run():
+        queue = JobQueue(handler, workers=1, retry_on=(Busy,), retry_delay=0, max_retries=4)
+        try:
+            recovered = await _wait(queue, await queue.submit("text", "busy twice"))
+            assert recovered.status == SUCCEEDED
+            stuck = await _wait(queue, await queue.submit("text", "always busy"))
+        finally:
+            await queue.stop()
+        assert stuck.status == FAILED
+        assert stuck.error == "Gave up after 4 retries: pool is full"
+        assert attempts.count("always busy") == 5
+        assert queue.stats()["retries"] == 2 + 4
+
+    asyncio.run(run())
+
+def test_persisted_jobs_resume_after_restart(tmp_path):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    store = JobStore(str(tmp_path / "jobs.db"))
+    # A job that was running when the previous process stopped, and one whose document is gone
+    interrupted = Job("a" * 32, "text", payload_path=str(spool / ("a" * 32)))
+    interrupted.status = RUNNING
+    (spool / ("a" * 32)).write_text("resumed text")
+    lost = Job("b" * 32, "text", payload_path=str(spool / "missing"))
+    store.save(interrupted.row())
+    store.save(lost.row())
+
+    async def handler(job, source):
+        return {"text": source}
+
+    async def run():
+        queue = JobQueue(handler, store=store, spool_dir=str(spool))
+        subscriber = queue.subscribe()
+        await queue.start()
+        try:
+            job = await asyncio.wait_for(subscriber.get(), 5)
+        finally:
+            await queue.stop()
+        assert job.id == "a" * 32 and job.result == {"text": "resumed text"}
+        assert queue.stats()["recovered"] == 1
+        assert (await queue.get("b" * 32)).status == FAILED
+
+    try:
+        asyncio.run(run())
+        rows = {row[0]: row for row in (store.get("a" * 32), store.get("b" * 32))}
+        assert Job.from_row(rows["a" * 32]).status == SUCCEEDED
+        assert Job.from_row(rows["b" * 32]).error == "Document was lost before the job ran"
+        assert not os.path.exists(spool / ("a" * 32))
+        assert store.unfinished() == []
+    finally:
+        store.close()
+
+def test_submitted_jobs_are_written_through(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    release = None
+
+    async def handler(job, source):
+        await release.wait()
+        return {}
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        queue = JobQueue(handler, workers=1, store=store, spool_dir=str(tmp_path / "spool"))
+        first = await queue.submit("text", "one")
+        second = await queue.submit("text", "two")
+        await asyncio.sleep(0.05)
+        statuses = {row[0]: row[3] for row in store.unfinished()}
+        assert statuses == {first.id: RUNNING, second.id: QUEUED}
+        with open(second.payload_path) as f:
+            assert f.read() == "two"
+        release.set()
+        await _wait(queue, second)
+        await queue.stop()
+
+    try:
+        asyncio.run(run())
+        assert store.unfinished() == []
+    finally:
+        store.close()
@@ -0,0 +1,26 @@
+import pytest
+import agents.json_columns as json_columns
+from agents.json_columns import RecordColumns, fits_float
+
+def test_columns_keep_integers_beyond_float_range_out_of_aggregates():
+    huge = 10 ** 400
+    assert not fits_float(huge)
+    columns = RecordColumns()
+    for value in (1, huge, 2):
+        columns.add({"amount": value})
+    amount = columns.aggregates()["fields"]["amount"]
+    assert (amount["count"], amount["sum"], amount["min"], amount["max"]) == (2, 3, 1, 2)
+    assert amount["out_of_range"] == 1
+
+def test_columns_cap_distinct_counts(monkeypatch):
+    monkeypatch.setattr(json_columns, "MAX_DISTINCT", 5)
+    monkeypatch.setattr(json_columns, "BATCH_SIZE", 4)
+    columns = RecordColumns()
+    for index in range(20):
+        columns.add({"id": index, "name": f"n{index}"})
+    fields = columns.aggregates()["fields"]
+    # Sets stop growing once a batch takes them to the cap, so the count is a lower bound
+    for name in ("id", "name"):
+        assert 5 <= fields[name]["distinct"] < 20
+        assert fields[name]["distinct_capped"]
+    assert fields["id"]["count"] == 20
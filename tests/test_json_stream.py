@@ -0,0 +1,96 @@
+import json
+import pytest
+import agents.json_stream as json_stream
+import agents.pipeline as pipeline
+from agents.json_columns import RecordColumns
+from agents.json_stream import CHUNK_CHARS, JSONSummary, summarize_json
+
+DOCUMENT = {
+    "invoice_id": "INV-1",
+    "total": 20.5,
+    "customer": {"name": "Ada"},
+    "items": [
+        {"sku": "A", "quantity": 2, "price": 5.25},
+        {"sku": "B", "quantity": 1, "price": 10},
+        "not a record",
+    ],
+}
+
+@pytest.mark.parametrize("encode", [json.dumps, lambda value: json.dumps(value).encode("utf-8")])
+def test_summarize_json_streams_object(encode):
+    summary = summarize_json(encode(DOCUMENT))
+    assert summary.data_type == "dict"
+    assert summary.length == 4
+    # Only metric keys and scalars are decoded; other containers are skipped
+    assert summary.value == {"invoice_id": None, "total": 20.5, "customer": None, "items": None}
+    items = summary.columns["$.items"]
+    assert (items.records, items.skipped) == (2, 1)
+    assert items.line_total() == 20.5
+
+def test_summarize_json_matches_parsed_value():
+    streamed = summarize_json(json.dumps(DOCUMENT)).columns["$.items"].aggregates()
+    parsed = JSONSummary.from_value(DOCUMENT).columns["$.items"].aggregates()
+    assert streamed == parsed
+    assert streamed["fields"]["quantity"] == {"type": "numeric", "count": 2, "sum": 3, "min": 1, "max": 2, "distinct": 2}
+    assert streamed["fields"]["sku"] == {"type": "categorical", "count": 2, "distinct": 2}
+
+def test_summarize_json_reads_ndjson():
+    summary = summarize_json(b'{"amount": 1}\n{"amount": 2.5}\n{"amount": 3}\n')
+    assert summary.ndjson
+    assert summary.length == 3
+    assert summary.columns["$"].aggregates()["fields"]["amount"]["sum"] == 6.5
+
+def test_ndjson_first_line_is_a_whole_record(monkeypatch):
+    added = []
+
+    class Recording(RecordColumns):
+        def add(self, record):
+            added.append(record)
+            super().add(record)
+
+    monkeypatch.setattr(json_stream, "RecordColumns", Recording)
+    lines = [
+        {"id": 1, "customer": {"name": "Ada"}, "tags": ["a", "b"], "amount": 4},
+        {"id": 2, "customer": {"name": "Bo"}, "tags": [], "amount": 6},
+    ]
+    source = "\n".join(json.dumps(line) for line in lines) + "\n"
+    summary = summarize_json(source.encode("utf-8"))
+    assert summary.ndjson and summary.length == 2
+    # The first line's containers are skipped while it looks like a single
+    # object, but it reaches the columns whole once it turns out to be NDJSON
+    assert [record for record in added if isinstance(record, dict)] == lines
+
+@pytest.mark.parametrize("source", [b'{"a": 1', b'[1, 2] x', b'{"a": 1} {"b": 2}'])
+def test_summarize_json_rejects_invalid_documents(source):
+    with pytest.raises(json.JSONDecodeError):
+        summarize_json(source)
+
+def test_summarize_json_rejects_invalid_utf8():
+    with pytest.raises(UnicodeDecodeError):
+        summarize_json(b'{"a": "\xff"}')
+
+def test_pipeline_streams_large_json(monkeypatch):
+    monkeypatch.setattr(pipeline, "JSON_STREAM_MIN_BYTES", 16)
+    raw = json.dumps(DOCUMENT).encode("utf-8")
+    assert pipeline.streams_json(raw, "doc.json")
+    classification, extracted, timings = pipeline.run_pipeline_timed("", "doc.json", raw)
+    assert classification["format"] == "JSON"
+    assert extracted["summary"]["status"] == "✅ PROCESSED SUCCESSFULLY"
+    assert extracted["columns"]["$.items"]["records"] == 2
+    assert "classify" not in timings
+
+def test_pipeline_reports_streamed_json_that_is_not_utf8(monkeypatch):
+    monkeypatch.setattr(pipeline, "JSON_STREAM_MIN_BYTES", 16)
+    classification, extracted, _ = pipeline.run_pipeline_timed("", "doc.json", b'{"name": "\xff\xfe", "total": 1}')
+    assert classification["format"] == "JSON"
+    assert extracted["status"] == "❌ PROCESSING FAILED"
+
+def test_pipeline_classifies_invalid_streamed_json_as_text(monkeypatch):
+    monkeypatch.setattr(pipeline, "JSON_STREAM_MIN_BYTES", 16)
+    _, _, timings = pipeline.run_pipeline_timed("", "doc.txt", b"{ not json, just braces }")
+    assert "classify" in timings
+    # Invalid UTF-8 past the first chunk is only seen by the text fallback, which replaces it
+    raw = b"{ not json " + b"a" * CHUNK_CHARS + b"\xff }"
+    classification, extracted, _ = pipeline.run_pipeline_timed("", "doc.txt", raw)
+    assert classification["format"] == "TEXT"
+    assert extracted["details"]["content_preview"].startswith("{ not json")
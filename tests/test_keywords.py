@@ -0,0 +1,19 @@
+from agents.keywords import EMAIL_INTENT_RULES, MATCHER, KeywordMatcher
+
+def test_scan_finds_every_keyword_in_one_pass():
+    hits = MATCHER.scan("from: buyer\nsubject: rfq\n\nplease send a quote asap. our invoice is due.")
+    assert {"from:", "subject:", "rfq", "quote", "asap", "invoice", "due"} <= hits.found
+    assert "urgent" not in hits
+    assert hits.first_rule(EMAIL_INTENT_RULES) == "REQUEST FOR QUOTE"
+    assert hits.first_rule([("X", ("nothing",))], "default") == "default"
+
+def test_scan_finds_overlapping_and_contained_keywords():
+    matcher = KeywordMatcher(["bill", "billing", "ingot", "got"])
+    assert matcher.scan("xbillingotx").found == {"bill", "billing", "ingot", "got"}
+    assert matcher.scan("billin").found == {"bill"}
+    assert not matcher.scan("").found
+
+def test_scan_matches_substrings_like_the_rules_expect():
+    # Keywords match inside longer words, as plain substring checks did
+    assert MATCHER.scan("reordering").any(["order"])
+    assert MATCHER.scan("to:x").any(["to:"])
@@ -0,0 +1,47 @@
+import json
+from agents.mailbox import iter_messages, message_text
+
+MBOX = (
+    b"From alice@example.com Mon May  6 10:00:00 2024\n"
+    b"From: Alice <alice@example.com>\n"
+    b"Subject: =?utf-8?q?Caf=C3=A9_order?=\n"
+    b"\n"
+    b"Please ship the order.\n"
+    b">From the warehouse, with love\n"
+    b">>From a quoted reply\n"
+    b"\n"
+    b"From bob@example.com Mon May  6 11:00:00 2024\n"
+    b"From: bob@example.com\n"
+    b"Subject: Meeting\n"
+    b"Content-Type: text/html\n"
+    b"\n"
+    b"<p>See you <b>tomorrow</b></p>\n"
+)
+
+def test_iter_messages_splits_and_unquotes_mbox():
+    first, second = iter_messages(MBOX)
+    assert first.startswith(b"From: Alice")
+    # One level of mbox quoting is removed from each quoted line
+    assert b"\nFrom the warehouse, with love\n>From a quoted reply\n" in first
+    assert second.startswith(b"From: bob@example.com")
+
+def test_single_message_is_left_as_is():
+    eml = b"Subject: Hi\n\n>From a quoted line\n"
+    assert list(iter_messages(eml)) == [eml]
+    assert list(iter_messages(b"")) == []
+
+def test_message_text_decodes_headers_and_html():
+    first, second = iter_messages(MBOX)
+    text, headers = message_text(first)
+    assert headers == {"From": "Alice <alice@example.com>", "Subject": "Café order"}
+    assert text.startswith("From: Alice <alice@example.com>\nSubject: Café order\n\nPlease ship")
+    text, _ = message_text(second)
+    assert "<p>" not in text and "tomorrow" in text
+
+def test_process_mailbox_streams_progress(client):
+    response = client.post("/process-mailbox", files={"file": ("export.mbox", MBOX)})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["status"] == "complete"
+    assert (lines[-1]["messages"], lines[-1]["failed"]) == (2, 0)
+    assert sum(line["messages"] for line in lines[:-1]) == 2
@@ -0,0 +1,135 @@
+import json
+import pytest
+import memory.memory_store as memory_store
+from memory.memory_store import DatabaseInUse, MemoryStore, RecordRing, render_fragment
+
+@pytest.fixture
+def store(tmp_path):
+    store = MemoryStore(str(tmp_path / "history.db"), shared=False)
+    yield store
+    store.close()
+
+def _store_subjects(store, subjects):
+    for index, subject in enumerate(subjects):
+        store.store_data("EMAIL", "communication", {"details": {"subject": subject}}, f"mail-{index}.eml")
+    store.flush()
+
+def test_history_survives_reopening(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = MemoryStore(path, shared=False)
+    _store_subjects(store, ["first", "second"])
+    store.close()
+
+    store = MemoryStore(path, shared=False)
+    try:
+        assert store.last_id == 2
+        record = store.get_record(1)
+        assert record[1:3] == ("EMAIL", "communication")
+        assert json.loads(record[3]) == {"details": {"subject": "first"}}
+        assert record[5] == "mail-0.eml"
+        # New records continue the id sequence
+        _store_subjects(store, ["third"])
+        assert store.last_id == 3
+    finally:
+        store.close()
+
+def _record(record_id, text="x" * 100):
+    return (record_id, "EMAIL", "communication", text, "2024-05-01T10:00:00", "source.eml")
+
+def test_record_ring_evicts_oldest_over_budget():
+    one = RecordRing.record_size(_record(0), b"f" * 50)
+    ring = RecordRing(budget_bytes=one * 3)
+    for record_id in range(1, 6):
+        ring.append(_record(record_id), b"f" * 50)
+
+    assert len(ring) == 3
+    assert ring.oldest_id() == 3
+    assert [record[0] for record in ring.recent(10)] == [5, 4, 3]
+    assert ring.evictions == 2
+    assert ring.evicted_bytes == one * 2
+    assert ring.size_bytes == one * 3
+
+def test_record_ring_drops_a_record_larger_than_its_budget():
+    ring = RecordRing(budget_bytes=10)
+    ring.append(_record(1), b"f" * 50)
+    assert len(ring) == 0
+    assert ring.size_bytes == 0
+    assert ring.oldest_id() is None
+
+def test_evicted_records_are_read_back_from_disk(tmp_path):
+    store = MemoryStore(str(tmp_path / "history.db"), memory_budget=1, shared=False)
+    try:
+        _store_subjects(store, ["evicted"])
+        assert store.stats()["resident_records"] == 0
+        assert json.loads(store.get_record(1)[3]) == {"details": {"subject": "evicted"}}
+        assert store.stats()["disk_reads"] == 1
+    finally:
+        store.close()
+
+def test_render_fragment_splices_stored_json():
+    record = (7, "JSON", "data_processing", '{"total": 1, "name": "\\u00e9"}', "2024-05-01T10:00:00", 'say "hi".json')
+    assert json.loads(render_fragment(record)) == {
+        "id": 7,
+        "input_type": "JSON",
+        "intent": "data_processing",
+        "extracted_data": {"total": 1, "name": "\u00e9"},
+        "timestamp": "2024-05-01T10:00:00",
+        "source_info": 'say "hi".json'
+    }
+
+def test_default_stores_share_one_history(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEMORY_SHARED", raising=False)
+    path = str(tmp_path / "history.db")
+    first = MemoryStore(path)
+    second = MemoryStore(path)
+    try:
+        assert first.shared and second.shared
+        _store_subjects(first, ["from first"])
+        _store_subjects(second, ["from second"])
+        # Ids come from SQLite, so neither store reuses the other's
+        assert [row[0] for row in first.get_recent_data(10)] == [2, 1]
+        assert [row[0] for row in second.get_recent_data(10)] == [2, 1]
+        assert json.loads(first.get_record(2)[3]) == {"details": {"subject": "from second"}}
+    finally:
+        first.close()
+        second.close()
+
+def test_local_store_locks_out_others(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEMORY_SHARED", "0")
+    path = str(tmp_path / "history.db")
+    store = MemoryStore(path)
+    try:
+        assert not store.shared
+        with pytest.raises(DatabaseInUse):
+            MemoryStore(path, shared=True)
+    finally:
+        store.close()
+
+def test_query_fragments_filters_and_pages(store):
+    _store_subjects(store, ["a", "b", "c"])
+    store.store_data("JSON", "data_processing", {"total": 1}, "doc.json")
+    store.flush()
+
+    assert [record_id for record_id, _ in store.query_fragments(limit=2)] == [4, 3]
+    assert [record_id for record_id, _ in store.query_fragments(limit=2, before=3)] == [2, 1]
+    assert [record_id for record_id, _ in store.query_fragments(input_type="JSON")] == [4]
+    fragment = json.loads(store.query_fragments(limit=1)[0][1])
+    assert (fragment["id"], fragment["source_info"]) == (4, "doc.json")
+
+def test_search_ranks_and_filters(store):
+    _store_subjects(store, ["stapler order", "invoice overdue", "stapler quote"])
+    results, truncated = store.search("stapler")
+    assert len(results) == 2
+    assert not truncated
+    assert store.search("subject:invoice")[0][0][0] == 2
+    assert store.search("stapler", input_type="JSON")[0] == []
+
+def test_search_reports_matches_beyond_the_rank_window(store, monkeypatch):
+    monkeypatch.setattr(memory_store, "RANK_WINDOW", 3)
+    _store_subjects(store, [f"rfq {index}" for index in range(5)])
+    results, truncated = store.search("rfq")
+    # Only the newest RANK_WINDOW matches are ranked
+    assert sorted(record_id for record_id, _ in results) == [3, 4, 5]
+    assert truncated
+    assert store.search("rfq", start="2000-01-01")[1]
+    assert not store.search('"rfq 4"')[1]
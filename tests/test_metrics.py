@@ -0,0 +1,39 @@
+from utils.metrics import MetricsRegistry, StageTimer
+
+def test_render_exposition_format():
+    registry = MetricsRegistry()
+    documents = registry.counter("docs", 'Documents "seen"', ("source",))
+    documents.inc('up"load')
+    documents.inc('up"load', amount=2)
+    latency = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1))
+    latency.observe(0.5, "read")
+    latency.observe(2, "read")
+    registry.gauge("in_flight", "In flight", lambda: {("pdf",): 3}, ("group",))
+    lines = registry.render().decode().splitlines()
+    # Counter HELP/TYPE lines use the name of the _total samples
+    assert lines[:3] == ['# HELP docs_total Documents "seen"', "# TYPE docs_total counter", 'docs_total{source="up\\"load"} 3']
+    assert 'latency_seconds_bucket{stage="read",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{stage="read",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="read",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{stage="read"} 2' in lines
+    assert 'in_flight{group="pdf"} 3' in lines
+
+def test_stage_timer_labels_stages_when_observed():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stages", ("stage", "format"))
+    timer = StageTimer()
+    with timer.stage("read"):
+        pass
+    timer.add("extract", 0.25)
+    timer.add("extract", 0.25)
+    timer.observe(histogram, "PDF")
+    text = registry.render().decode()
+    assert 'stage_seconds_count{stage="read",format="PDF"} 1' in text
+    assert 'stage_seconds_sum{stage="extract",format="PDF"} 0.5' in text
+
+def test_metrics_endpoint_counts_processed_documents(client):
+    client.post("/process-text", data={"content": "Counted by the metrics test"})
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'intake_documents_total{source="text",' in response.text
+    assert "# TYPE intake_stage_seconds histogram" in response.text
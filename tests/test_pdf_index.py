@@ -0,0 +1,48 @@
+import mmap
+import agents.pdf_text as pdf_text
+from agents.pdf_index import PDFDocument, PDFRef
+from agents.pdf_text import extract_text, shutdown_page_pool
+from tests.pdf_samples import build_pdf, text_stream
+
+def _pages(count):
+    return [[text_stream(f"page {index}")] for index in range(count)]
+
+def test_index_resolves_pages_through_the_xref():
+    doc = PDFDocument(build_pdf(_pages(3)))
+    assert doc.version == "1.4"
+    assert not doc.repaired
+    assert doc.page_count == 3
+    refs = list(doc.iter_page_refs())
+    assert all(isinstance(ref, PDFRef) for ref in refs)
+    assert doc.resolve(refs[0])["Type"] == "Page"
+
+def test_broken_xref_offsets_are_rebuilt():
+    data = build_pdf(_pages(2))
+    # Point startxref at garbage so the index has to be rebuilt by scanning
+    head, _, tail = data.rpartition(b"startxref\n")
+    doc = PDFDocument(head + b"startxref\n" + b"12" + tail[tail.index(b"\n"):])
+    assert doc.repaired
+    assert extract_text(doc, doc.page_count) == ["page 0", "page 1"]
+
+def test_document_reads_from_a_memory_map(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(build_pdf(_pages(2)))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        doc = PDFDocument(buffer)
+        assert extract_text(doc, doc.page_count, str(path)) == ["page 0", "page 1"]
+
+def test_parallel_extraction_matches_serial(tmp_path, monkeypatch):
+    data = build_pdf(_pages(20))
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(data)
+    doc = PDFDocument(data)
+    expected = [f"page {index}" for index in range(20)]
+    monkeypatch.setattr(pdf_text, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_text, "PAGE_WORKERS", 2)
+    try:
+        assert extract_text(doc, doc.page_count) == expected
+        assert extract_text(doc, doc.page_count, str(path)) == expected
+        assert pdf_text._page_pool is not None
+    finally:
+        shutdown_page_pool()
+    assert pdf_text._page_pool is None
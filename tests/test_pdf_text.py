@@ -0,0 +1,44 @@
+import zlib
+import pytest
+import agents.pdf_text as pdf_text
+from agents.pdf_agent import PDFAgent
+from agents.pdf_index import PDFDocument, PDFError, decode_filter
+from agents.pdf_text import extract_page_text, extract_text
+from tests.pdf_samples import build_pdf, text_stream
+
+def test_page_text_follows_text_lines():
+    doc = PDFDocument(build_pdf([[text_stream("Hello", "World")], [text_stream("Second page")]]))
+    assert extract_text(doc, doc.page_count) == ["Hello\nWorld", "Second page"]
+
+def test_invoice_fields_are_captured():
+    invoice = text_stream(
+        "Invoice Number: INV-1042", "Date: 2024-05-01",
+        "1. Widgets - $40.00", "2. Gadgets - $60.00",
+        "Subtotal: $100.00", "Tax: $8.00", "Total: $108.00"
+    )
+    result = PDFAgent().process_pdf(build_pdf([[invoice]]))
+    assert result["summary"]["document_type"] == "PDF (INVOICE)"
+    metrics = result["metrics"]
+    assert metrics["Invoice Number"] == "INV-1042"
+    assert metrics["Total"] == "$108.00"
+    assert metrics["Line Items"] == 2
+    assert metrics["Tax"] == "$8.00"
+    assert result["details"]["line_items"] == [
+        {"description": "Widgets", "amount": 40.0}, {"description": "Gadgets", "amount": 60.0}
+    ]
+
+def test_flate_output_is_capped():
+    bomb = zlib.compress(b"\0" * 5000)
+    with pytest.raises(PDFError):
+        decode_filter("FlateDecode", bomb, {}, limit=1000)
+    assert len(decode_filter("FlateDecode", bomb, {}, limit=5000)) == 5000
+
+def test_page_budget_covers_all_content_streams(monkeypatch):
+    # Each stream fits the budget on its own; together they do not
+    filler = b"% " + b"x" * 3000 + b"\n"
+    doc = PDFDocument(build_pdf([[filler, filler, text_stream("hidden")], [text_stream("kept")]]))
+    monkeypatch.setattr(pdf_text, "MAX_PAGE_BYTES", 5000)
+    pages = list(doc.iter_page_refs())
+    with pytest.raises(PDFError):
+        extract_page_text(doc, pages[0])
+    assert extract_text(doc, doc.page_count) == ["", "kept"]
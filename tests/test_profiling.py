@@ -0,0 +1,25 @@
+PROFILED = {"X-Profile": "1"}
+
+def test_profiling_is_off_by_default(client):
+    response = client.post("/process-text", data={"content": "Please profile this note"}, headers=PROFILED)
+    assert response.status_code == 200
+    assert "profile_id" not in response.json()
+    assert "x-profile-id" not in response.headers
+    assert client.get("/debug/profiles").status_code == 404
+    assert client.get("/debug/profiles/0123/download").status_code == 404
+
+def test_profiled_run_is_stored_when_enabled(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "PROFILING", True)
+    response = client.post("/process-text", data={"content": "Profile this other note"}, headers=PROFILED)
+    profile_id = response.json()["profile_id"]
+    assert response.headers["x-profile-id"] == profile_id
+
+    listed = client.get("/debug/profiles").json()["profiles"]
+    assert profile_id in [profile["profile_id"] for profile in listed]
+    profile = client.get(f"/debug/profiles/{profile_id}").json()
+    assert profile["functions"]
+    assert "pstats" not in profile
+    download = client.get(f"/debug/profiles/{profile_id}/download")
+    assert download.headers["content-type"] == "application/octet-stream"
+    assert download.content
+    assert client.get("/debug/profiles/unknown").status_code == 404
@@ -0,0 +1,42 @@
+import memory.result_cache as result_cache_module
+from memory.result_cache import ResultCache
+
+def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    first, second, third = (cache.key(digest) for digest in ("a", "b", "c"))
+    cache.put(first, 1)
+    cache.put(second, 2)
+    assert cache.get(first) == 1
+    cache.put(third, 3)
+    assert cache.get(second) is None
+    assert (cache.get(first), cache.get(third)) == (1, 3)
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, "monotonic", lambda: now[0])
+    cache = ResultCache(ttl_seconds=10)
+    key = cache.key("a")
+    cache.put(key, "result")
+    now[0] += 5
+    assert cache.get(key) == "result"
+    now[0] += 10
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+def test_keys_include_filename_hints_and_version():
+    cache = ResultCache(version="1")
+    cache.put(cache.key("a", ("pdf",)), "pdf result")
+    assert cache.get(cache.key("a", ())) is None
+    assert cache.invalidate(version="2") == 1
+    assert cache.key("a") == ("2", "a", ())
+
+def test_repeated_document_is_served_from_cache(client):
+    text = "Cache me: a note that is only ever sent by this test"
+    first = client.post("/process-text", data={"content": text})
+    second = client.post("/process-text", data={"content": text})
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert first.json()["details"] == second.json()["details"]
+    assert client.post("/cache/invalidate").status_code == 200
+    assert client.post("/process-text", data={"content": text}).headers["x-cache"] == "MISS"
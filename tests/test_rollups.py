@@ -0,0 +1,78 @@
+import sqlite3
+import pytest
+from memory.rollups import UPSERT_ROLLUP, ensure_rollups, query_rollups, rollup_increments
+
+def test_rollup_increments_sums_fine_buckets_into_coarse_tiers():
+    increments = rollup_increments([
+        (0, "EMAIL", "communication", "HIGH", 10),
+        (30, "EMAIL", "communication", "HIGH", None),
+        (3700, "EMAIL", "communication", "HIGH", 5),
+        (3700, "JSON", "data_processing", "NONE", 7),
+    ])
+    by_tier = {}
+    for resolution, bucket, input_type, intent, urgency, documents, sized, size_bytes in increments:
+        by_tier.setdefault(resolution, {})[(bucket, input_type)] = (documents, sized, size_bytes)
+
+    assert by_tier[60] == {
+        (0, "EMAIL"): (2, 1, 10),
+        (3660, "EMAIL"): (1, 1, 5),
+        (3660, "JSON"): (1, 1, 7),
+    }
+    assert by_tier[3600] == {
+        (0, "EMAIL"): (2, 1, 10),
+        (3600, "EMAIL"): (1, 1, 5),
+        (3600, "JSON"): (1, 1, 7),
+    }
+    assert by_tier[86400] == {(0, "EMAIL"): (3, 2, 15), (0, "JSON"): (1, 1, 7)}
+
+def _connection(items):
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.execute("CREATE TABLE history (id INTEGER PRIMARY KEY)")
+    ensure_rollups(conn)
+    conn.executemany(UPSERT_ROLLUP, rollup_increments(items))
+    return conn
+
+# 2024-05-01T10:00:00Z
+HOUR = 1714557600
+
+def test_query_rollups_buckets_and_totals():
+    conn = _connection([
+        (HOUR + 10, "EMAIL", "communication", "HIGH", 100),
+        (HOUR + 20, "EMAIL", "communication", "NORMAL", None),
+        (HOUR + 3600, "JSON", "data_processing", "NONE", 300),
+    ])
+    stats = query_rollups(conn, "hour", "2024-05-01T10:00:00+00:00", "2024-05-01T12:00:00+00:00")
+
+    assert stats["timezone"] == "UTC"
+    assert stats["totals"] == {"documents": 3, "sized_documents": 2, "mean_size_bytes": 200.0}
+    assert [(bucket["start"], bucket["documents"], bucket["mean_size_bytes"]) for bucket in stats["buckets"]] == [
+        ("2024-05-01T10:00:00+00:00", 2, 100.0),
+        ("2024-05-01T11:00:00+00:00", 1, 300.0),
+    ]
+
+def test_query_rollups_group_by_and_filters():
+    conn = _connection([
+        (HOUR + 10, "EMAIL", "communication", "HIGH", 100),
+        (HOUR + 20, "EMAIL", "communication", "NORMAL", 200),
+        (HOUR + 30, "JSON", "data_processing", "NONE", 300),
+    ])
+    window = ("2024-05-01T10:00:00+00:00", "2024-05-01T11:00:00+00:00")
+
+    grouped = query_rollups(conn, "hour", *window, group_by=["input_type"])
+    assert [(bucket["input_type"], bucket["documents"]) for bucket in grouped["buckets"]] == [("EMAIL", 2), ("JSON", 1)]
+
+    filtered = query_rollups(conn, "hour", *window, filters={"urgency": "HIGH"})
+    assert filtered["totals"]["documents"] == 1
+
+@pytest.mark.parametrize("kwargs", [{"resolution": "week"}, {"group_by": ["sender"]}, {"start": "yesterday"}])
+def test_query_rollups_rejects_unknown_names(kwargs):
+    with pytest.raises(ValueError):
+        query_rollups(_connection([]), **kwargs)
+
+def test_stats_endpoint_counts_processed_documents(client):
+    before = client.get("/stats", params={"resolution": "day"}).json()["totals"]["documents"]
+    client.post("/process-text", data={"content": "Rollup test: one more document for the stats"})
+    stats = client.get("/stats", params={"resolution": "day"}).json()
+    assert stats["timezone"] == "UTC"
+    assert stats["totals"]["documents"] == before + 1
+    assert client.get("/stats", params={"resolution": "week"}).status_code == 400
@@ -0,0 +1,29 @@
+import pytest
+from memory.search_index import build_match
+
+@pytest.mark.parametrize("query, expected", [
+    ("Hello", '"hello"'),
+    ("rfq john.doe", '"rfq" "john doe"'),
+    ('"quoted words"', '"quoted words"'),
+    ("stapl*", '"stapl"*'),
+    ("a OR b", '"a" OR "b"'),
+    ("subject:rfq", 'subject : "rfq"'),
+    # Unknown columns are searched everywhere
+    ("bogus:rfq", '"rfq"'),
+    # A leading or trailing OR is an ordinary word or dropped
+    ("OR a OR", '"or" "a"'),
+])
+def test_build_match(query, expected):
+    assert build_match(query) == expected
+
+@pytest.mark.parametrize("query", ["", "   ", "!!! ..."])
+def test_build_match_without_words(query):
+    with pytest.raises(ValueError):
+        build_match(query)
+
+def test_search_endpoint(client):
+    client.post("/process-text", data={"content": "Zanzibar shipment of staplers is delayed"})
+    data = client.get("/search", params={"q": "zanzibar"}).json()
+    assert [result["input_type"] for result in data["results"]] == ["TEXT"]
+    assert data["truncated"] is False and data["next_offset"] is None
+    assert client.get("/search", params={"q": "!!!"}).status_code == 400
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+from utils.startup import StartupReport, find_dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Format-specific code that a cold start must not pay for until a document needs it
+DEFERRED = [
+    "agents.pdf_agent", "agents.email_agent", "agents.json_agent", "agents.mailbox",
+    "cProfile", "tracemalloc", "multiprocessing"
+]
+
+def test_report_phases_and_ready_time():
+    report = StartupReport()
+    report.mark("imports")
+    report.mark_ready()
+    report.mark_ready()
+    data = report.as_dict({"pdf": 0.0125})
+    assert [phase["phase"] for phase in data["phases"]] == ["imports", "lifespan startup"]
+    assert data["ready_ms"] >= 0
+    assert data["lazy_init_ms"] == {"pdf": 12.5}
+
+def test_find_dotenv_searches_parent_directories(tmp_path):
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    (tmp_path / "a" / ".env").write_text("KEY=value\n")
+    assert find_dotenv(str(nested)) == str(tmp_path / "a" / ".env")
+
+def test_app_import_defers_format_specific_modules(tmp_path):
+    script = (
+        "import json, sys; import main; "
+        f"print(json.dumps([name for name in {DEFERRED!r} if name in sys.modules]))"
+    )
+    env = dict(os.environ, MEMORY_DB_PATH=str(tmp_path / "history.db"), JOB_SPOOL_DIR=str(tmp_path / "spool"))
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert json.loads(output.splitlines()[-1]) == []
+
+def test_startup_endpoint_lists_phases(client):
+    data = client.get("/debug/startup").json()
+    phases = [phase["phase"] for phase in data["phases"]]
+    assert phases[0] == "import fastapi" and phases[-1] == "lifespan startup"
+    assert data["ready_ms"] is not None
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import pytest
+from utils.upload import MalformedUpload, UploadTooLarge, content_length_exceeds, receive_uploads
+
+BOUNDARY = "testboundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+def _body(*parts):
+    body = b""
+    for field, filename, content in parts:
+        disposition = f'form-data; name="{field}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+def _receive(body, chunk_size=7, **kwargs):
+    async def stream():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+    options = {"field": "file", "max_bytes": 1024, "spool_bytes": 1024}
+    options.update(kwargs)
+    return asyncio.run(receive_uploads(CONTENT_TYPE, stream(), **options))
+
+async def _single(chunk):
+    yield chunk
+
+def test_receive_uploads_keeps_files_in_the_field():
+    uploads = _receive(_body(("note", None, b"ignored"), ("file", "a.txt", b"hello"), ("other", "b.txt", b"skip")))
+    try:
+        assert [upload.filename for upload in uploads] == ["a.txt"]
+        assert bytes(uploads[0].view()) == b"hello"
+        assert uploads[0].size == 5
+        assert uploads[0].sha256 == "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"
+    finally:
+        for upload in uploads:
+            upload.close()
+
+def test_receive_uploads_spools_large_files():
+    uploads = _receive(_body(("file", "big.bin", b"x" * 600)), spool_bytes=100)
+    path = uploads[0].path
+    assert path is not None and os.path.exists(path)
+    assert len(uploads[0].view()) == 600
+    uploads[0].close()
+    assert not os.path.exists(path)
+
+def test_receive_uploads_rejects_oversized_file_while_streaming():
+    with pytest.raises(UploadTooLarge):
+        _receive(_body(("file", "big.bin", b"x" * 2000)), max_bytes=1000)
+
+def test_receive_uploads_limits_file_count():
+    body = _body(("file", "a.txt", b"a"), ("file", "b.txt", b"b"))
+    assert len(_receive(body, max_files=2)) == 2
+    with pytest.raises(MalformedUpload):
+        _receive(body, max_files=1)
+
+def test_receive_uploads_rejects_malformed_bodies():
+    with pytest.raises(MalformedUpload):
+        asyncio.run(receive_uploads("application/json", _single(b"{}"), "file", 1024, 1024))
+    with pytest.raises(MalformedUpload):
+        _receive(b"--" + BOUNDARY.encode() + b"\r\nnot a header line\r\n\r\n")
+
+@pytest.mark.parametrize("headers, exceeds", [
+    ({"content-length": "2000"}, True),
+    ({"content-length": "1000"}, False),
+    ({"content-length": "bogus"}, False),
+    ({}, False),
+])
+def test_content_length_exceeds(headers, exceeds):
+    assert content_length_exceeds(headers, 1000) is exceeds
+
+def test_process_file_stores_upload(client):
+    response = client.post("/process-file", files={"file": ("note.txt", b"Hello, plain text")})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "success"
+    assert data["sha256"] == "9557dc2eb1e22adec0163b6828a4059d8cf68b89f81429575fadc81b1107de04"
+
+def test_process_file_rejects_oversized_upload(client):
+    response = client.post("/process-file", files={"file": ("big.txt", b"x" * 5000)})
+    assert response.status_code == 413
+    assert response.json()["status"] == "error"
+
+def test_process_file_requires_file_field(client):
+    response = client.post("/process-file", files={"other": ("note.txt", b"hi")})
+    assert response.status_code == 400
@@ -0,0 +1,193 @@
+from typing import Dict, Optional, Sequence
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
+# Preferred first when a client accepts several with the same quality
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Responses of these types are never compressed (event streams must not be buffered)
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into coding -> quality
+
+    Args:
+        header: Header value, e.g. "gzip, br;q=0.8"
+
+    Returns:
+        Dict of lower-cased codings to their q-value
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+def choose_encoding(header: str, available: Sequence[str] = ENCODINGS) -> str:
+    """
+    Pick the content coding for a response
+
+    Args:
+        header: The request's Accept-Encoding value
+        available: Codings the response can be sent in, in order of preference
+
+    Returns:
+        The accepted coding with the highest q-value, or "identity"
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_quality = "identity", 0.0
+    for coding in available:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress ``body`` once at the highest level, for content served many times"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return body
+
+class _GzipStream:
+    """Incremental gzip encoder with the same interface as brotli.Compressor"""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _Responder:
+    """
+    Send wrapper that compresses one response
+
+    Holds back ``http.response.start`` until the first body chunk shows
+    whether the response is worth compressing. Only the public ASGI
+    message format is relied on.
+    """
+
+    def __init__(self, send: Send, encoding: str, compressor, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.compressing = False
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send_start()
+            self.passthrough = True
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            if not more_body and len(body) < self.minimum_size:
+                await self._send_start()
+                self.passthrough = True
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            if not more_body:
+                body = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self._send_start()
+            self.compressing = True
+
+        # Flushing after every chunk keeps streamed NDJSON lines flowing
+        data = self.compressor.process(body)
+        data += self.compressor.flush() if more_body else self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_start(self) -> None:
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.send(message)
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least ``minimum_size`` bytes
+
+    Like Starlette's GZipMiddleware, but negotiates brotli as well when the
+    package is installed, and built on the plain ASGI interface only. Responses that already carry a Content-Encoding
+    (the precompressed UI assets) and event streams pass through untouched;
+    streamed bodies are flushed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        """
+        Configure the middleware
+
+        Args:
+            app: The wrapped ASGI app
+            minimum_size: Smallest body compressed; smaller ones are not worth it
+            gzip_level: zlib level for gzip responses
+            brotli_quality: Brotli quality for br responses
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+        elif encoding == "gzip":
+            compressor = _GzipStream(self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(send, encoding, compressor, self.minimum_size))
@@ -0,0 +1,212 @@
+from typing import Any, Callable, Dict, Iterable, Optional
+import asyncio
+import mmap
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+class ExecutorSaturated(Exception):
+    """Raised when a pool's queue stays full for longer than the queue timeout"""
+
+def parse_workers(spec: str) -> Dict[str, int]:
+    """
+    Parse a worker-count spec such as ``"PDF=2,JSON=4,TEXT=4"``
+
+    Args:
+        spec: Comma separated ``GROUP=COUNT`` pairs
+
+    Returns:
+        Dict mapping upper-cased group names to worker counts
+    """
+    workers = {}
+    for part in spec.split(","):
+        if "=" in part:
+            group, count = part.split("=", 1)
+            workers[group.strip().upper()] = int(count)
+    return workers
+
+def _timed_call(fn: Callable, args: tuple) -> tuple:
+    """Run ``fn`` in a worker, returning its result with wall-clock start/end times"""
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable, *args: Any) -> None:
+    """Schedule ``callback`` on ``loop`` from any thread, unless the loop is already closed"""
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        pass
+
+def _portable(arg: Any) -> Any:
+    """Copy zero-copy views into bytes so they can be sent to a worker process"""
+    if isinstance(arg, (memoryview, mmap.mmap)):
+        return bytes(arg)
+    return arg
+
+class PoolStats:
+    """
+    Counters for one worker pool
+    """
+
+    def __init__(self):
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.exec_total = 0.0
+        self.exec_max = 0.0
+
+    def record(self, queue_wait: float, exec_time: float) -> None:
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.exec_total += exec_time
+        self.exec_max = max(self.exec_max, exec_time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queue_wait_avg_ms": round(self.queue_wait_total / finished * 1000, 3) if finished else 0.0,
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 3),
+            "exec_avg_ms": round(self.exec_total / finished * 1000, 3) if finished else 0.0,
+            "exec_max_ms": round(self.exec_max * 1000, 3)
+        }
+
+class PipelineExecutor:
+    """
+    Runs blocking pipeline work off the event loop in per-format worker pools
+
+    Each format group gets its own thread or process pool and a bounded
+    number of queued jobs. When a group's queue is full, callers wait up to
+    ``queue_timeout`` seconds for a slot before ExecutorSaturated is raised.
+    A job keeps its slot until it finishes in the pool, so callers that
+    are cancelled while waiting cannot push a group past its bound.
+    """
+
+    def __init__(
+        self,
+        workers: Dict[str, int],
+        default_workers: int = 4,
+        process_groups: Iterable[str] = (),
+        queue_size: int = 64,
+        queue_timeout: float = 5.0
+    ):
+        """
+        Configure the executor
+
+        Args:
+            workers: Worker count per format group
+            default_workers: Worker count for groups not listed in ``workers``
+            process_groups: Groups that run in a process pool instead of threads
+            queue_size: Jobs allowed to wait per group on top of running ones
+            queue_timeout: Seconds to wait for a queue slot before rejecting
+        """
+        self.workers = {group.upper(): count for group, count in workers.items()}
+        self.default_workers = default_workers
+        self.process_groups = {group.upper() for group in process_groups}
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._pools: Dict[str, Executor] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, PoolStats] = {}
+
+    def _pool(self, group: str) -> Executor:
+        pool = self._pools.get(group)
+        if pool is None:
+            count = self.workers.get(group, self.default_workers)
+            if group in self.process_groups:
+                # multiprocessing is only imported once a process pool is needed
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=count)
+            else:
+                pool = ThreadPoolExecutor(max_workers=count, thread_name_prefix=f"pipeline-{group.lower()}")
+            self._pools[group] = pool
+            self._slots[group] = asyncio.Semaphore(count + self.queue_size)
+            self._stats[group] = PoolStats()
+        return pool
+
+    async def submit(self, group: str, fn: Callable, *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` in the pool for ``group``
+
+        Args:
+            group: Format group selecting the pool
+            fn: Picklable callable (module-level for process pools)
+            args: Arguments for ``fn``
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            ExecutorSaturated: If no queue slot frees up within the timeout
+        """
+        group = group.upper()
+        pool = self._pool(group)
+        slots = self._slots[group]
+        stats = self._stats[group]
+
+        submitted = time.time()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            stats.rejected += 1
+            raise ExecutorSaturated(f"{group} pipeline queue is full")
+
+        if group in self.process_groups:
+            args = tuple(_portable(arg) for arg in args)
+
+        stats.submitted += 1
+        stats.in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = pool.submit(_timed_call, fn, args)
+        except BaseException:
+            stats.in_flight -= 1
+            slots.release()
+            raise
+        # The slot is held until the job itself ends, even if the caller stops waiting for it
+        future.add_done_callback(lambda done: _call_soon(loop, self._finished, group, done, submitted))
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    def _finished(self, group: str, future: Future, submitted: float) -> None:
+        """Release a finished job's slot and record its timings (on the event loop)"""
+        stats = self._stats[group]
+        stats.in_flight -= 1
+        self._slots[group].release()
+        if future.cancelled() or future.exception() is not None:
+            stats.failed += 1
+            stats.record(0.0, time.time() - submitted)
+            return
+        _, started, finished = future.result()
+        stats.completed += 1
+        stats.record(max(started - submitted, 0.0), finished - started)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report per-group queue and execution metrics
+
+        Returns:
+            Dict keyed by format group
+        """
+        return {
+            group: {
+                "workers": self.workers.get(group, self.default_workers),
+                "mode": "process" if group in self.process_groups else "thread",
+                **stats.as_dict()
+            }
+            for group, stats in self._stats.items()
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down every pool"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools.clear()
@@ -0,0 +1,362 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from memory.job_store import JobStore
+from utils.upload import IngestedUpload, load_upload
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Latency samples kept for the percentiles in ``stats()``
+LATENCY_SAMPLES = 1024
+
+# Completion events buffered per subscriber before further events are dropped for it
+SUBSCRIBER_BUFFER = 256
+
+class JobQueueFull(Exception):
+    """Raised when the async job queue already holds its maximum number of jobs"""
+
+class Job:
+    """
+    One document submitted for asynchronous processing
+
+    Attributes:
+        id: Hex job id returned to the client
+        kind: "file" for uploads, "text" for direct text input
+        filename: Upload filename (None for text)
+        status: One of queued, running, succeeded or failed
+        submitted/started/finished: Epoch timestamps of each transition
+        payload_path: Saved copy of the document when jobs are persisted
+        result: Response body of the finished job
+        error: Failure message of a failed job
+        source: The in-memory document (an IngestedUpload or str) until it runs
+    """
+
+    def __init__(self, job_id: str, kind: str, filename: Optional[str] = None, source: Any = None, payload_path: Optional[str] = None):
+        self.id = job_id
+        self.kind = kind
+        self.filename = filename
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.payload_path = payload_path
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.source = source
+
+    def row(self) -> tuple:
+        """Job fields in ``memory.job_store.COLUMNS`` order"""
+        return (
+            self.id, self.kind, self.filename, self.status, self.submitted, self.started,
+            self.finished, self.payload_path,
+            json.dumps(self.result) if self.result is not None else None,
+            self.error
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        """Rebuild a job from a stored row"""
+        job = cls(row[0], row[1], row[2], payload_path=row[7])
+        job.status, job.submitted, job.started, job.finished = row[3], row[4], row[5], row[6]
+        job.result = json.loads(row[8]) if row[8] is not None else None
+        job.error = row[9]
+        return job
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Describe the job for the /jobs endpoints"""
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "status": self.status,
+            "submitted_at": datetime.fromtimestamp(self.submitted).isoformat(),
+            "queue_wait_ms": round((self.started - self.submitted) * 1000, 3) if self.started else None,
+            "run_ms": round((self.finished - self.started) * 1000, 3) if self.finished and self.started else None
+        }
+        if self.status == SUCCEEDED:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+class JobQueue:
+    """
+    In-process queue of documents processed in the background
+
+    A fixed number of worker tasks on the event loop take jobs in
+    submission order and run them through ``handler``. Finished jobs are
+    kept in memory up to ``retention`` and announced to every subscriber.
+    With a JobStore, each job's state and a copy of its document are
+    written to disk (from a worker thread, never on the event loop), so
+    jobs cut off by a restart are queued again.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Job, Any], Awaitable[Dict[str, Any]]],
+        workers: int = 4,
+        max_queued: int = 1000,
+        retention: int = 1000,
+        store: Optional[JobStore] = None,
+        spool_dir: Optional[str] = None,
+        spool_bytes: int = 1024 * 1024,
+        retry_on: Tuple[Type[BaseException], ...] = (),
+        retry_delay: float = 0.5,
+        max_retries: int = 20
+    ):
+        """
+        Configure the queue
+
+        Args:
+            handler: Coroutine function processing a job's document and returning its result
+            workers: Number of jobs processed concurrently
+            max_queued: Jobs allowed to wait before submissions are rejected
+            retention: Finished jobs kept for lookup (in memory and in the store)
+            store: Optional JobStore persisting jobs across restarts
+            spool_dir: Directory for saved documents (required with ``store``)
+            spool_bytes: Size above which reloaded uploads are spooled to a temp file
+            retry_on: Exceptions meaning "try again later" rather than failure
+            retry_delay: Seconds to wait before retrying such a job
+            max_retries: Retries after which such a job fails instead
+        """
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.store = store
+        self.spool_dir = spool_dir
+        self.spool_bytes = spool_bytes
+        self.retry_on = retry_on
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        if store is not None and spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._finished: deque = deque()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: List[asyncio.Queue] = []
+        self._queue_waits: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._run_times: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._counters = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "rejected": 0,
+            "recovered": 0,
+            "retries": 0,
+            "events_dropped": 0
+        }
+
+    async def start(self) -> None:
+        """Start the worker tasks, first re-queueing jobs left unfinished in the store"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        if self.store is not None:
+            for row in await asyncio.to_thread(self.store.unfinished):
+                job = Job.from_row(row)
+                if job.payload_path and os.path.exists(job.payload_path):
+                    job.status, job.started = QUEUED, None
+                    self._jobs[job.id] = job
+                    self._queue.put_nowait(job)
+                    self._counters["recovered"] += 1
+                else:
+                    job.status, job.finished = FAILED, time.time()
+                    job.error = "Document was lost before the job ran"
+                    await self._save(job)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks; persisted running jobs are re-queued on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def submit(self, kind: str, source: Any, filename: Optional[str] = None) -> Job:
+        """
+        Queue a document for processing
+
+        The queue takes ownership of ``source``; uploads are closed once the
+        job has run.
+
+        Args:
+            kind: "file" or "text"
+            source: IngestedUpload for files, str for text
+            filename: Upload filename
+
+        Returns:
+            The queued Job
+
+        Raises:
+            JobQueueFull: If ``max_queued`` jobs are already waiting
+        """
+        await self.start()
+        if self._queue.qsize() >= self.max_queued:
+            self._counters["rejected"] += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+
+        job = Job(os.urandom(16).hex(), kind, filename, source)
+        if self.store is not None:
+            job.payload_path = os.path.join(self.spool_dir, job.id)
+            await asyncio.to_thread(self._save_payload, job.payload_path, source)
+            await self._save(job)
+
+        self._jobs[job.id] = job
+        self._counters["submitted"] += 1
+        self._queue.put_nowait(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job in memory, then in the store"""
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            row = await asyncio.to_thread(self.store.get, job_id)
+            if row is not None:
+                job = Job.from_row(row)
+        return job
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register for finished jobs; each one is put on the returned queue"""
+        subscriber = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: asyncio.Queue) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report queue depth, counters and job latency
+
+        Returns:
+            Dict with depth, counters and avg/p50/p95 of queue wait, run
+            time and end-to-end latency over the last LATENCY_SAMPLES jobs
+        """
+        running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+        stats: Dict[str, Any] = {
+            "workers": self.workers,
+            "persistent": self.store is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": running,
+            "max_queued": self.max_queued,
+            "subscribers": len(self._subscribers),
+            **self._counters
+        }
+        for name, samples in (("queue_wait", self._queue_waits), ("run", self._run_times), ("latency", self._latencies)):
+            values = list(samples)
+            stats[f"{name}_avg_ms"] = round(sum(values) / len(values) * 1000, 3) if values else 0.0
+            stats[f"{name}_p50_ms"] = round(_percentile(values, 0.5) * 1000, 3)
+            stats[f"{name}_p95_ms"] = round(_percentile(values, 0.95) * 1000, 3)
+        return stats
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job %s crashed the job worker", job.id)
+
+    async def _run(self, job: Job) -> None:
+        job.status, job.started = RUNNING, time.time()
+        if self.store is not None:
+            await self._save(job)
+
+        source = job.source
+        try:
+            if source is None:
+                source = await asyncio.to_thread(self._load_payload, job)
+            retries = 0
+            while True:
+                try:
+                    job.result = await self.handler(job, source)
+                    job.status = SUCCEEDED
+                    break
+                except self.retry_on as e:
+                    if retries >= self.max_retries:
+                        job.status, job.error = FAILED, f"Gave up after {retries} retries: {e}"
+                        break
+                    retries += 1
+                    self._counters["retries"] += 1
+                    await asyncio.sleep(self.retry_delay)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+        finally:
+            if isinstance(source, IngestedUpload):
+                source.close()
+            job.source = None
+        await self._finish(job)
+
+    async def _save(self, job: Job) -> None:
+        await asyncio.to_thread(self.store.save, job.row())
+
+    async def _finish(self, job: Job) -> None:
+        job.finished = time.time()
+        self._counters[job.status] += 1
+        self._queue_waits.append(job.started - job.submitted)
+        self._run_times.append(job.finished - job.started)
+        self._latencies.append(job.finished - job.submitted)
+
+        if self.store is not None:
+            prune = (self._counters["succeeded"] + self._counters["failed"]) % 64 == 0
+            await asyncio.to_thread(self._persist_finished, job, prune)
+
+        self._finished.append(job.id)
+        while len(self._finished) > self.retention:
+            self._jobs.pop(self._finished.popleft(), None)
+
+        for subscriber in self._subscribers:
+            try:
+                subscriber.put_nowait(job)
+            except asyncio.QueueFull:
+                self._counters["events_dropped"] += 1
+
+    def _persist_finished(self, job: Job, prune: bool) -> None:
+        if job.payload_path:
+            try:
+                os.unlink(job.payload_path)
+            except OSError:
+                pass
+        self.store.save(job.row())
+        if prune:
+            self.store.prune(self.retention)
+
+    @staticmethod
+    def _save_payload(path: str, source: Any) -> None:
+        if isinstance(source, IngestedUpload):
+            source.save(path)
+        else:
+            with open(path, "w", encoding="utf-8", errors="surrogatepass", newline="") as f:
+                f.write(source)
+
+    def _load_payload(self, job: Job) -> Any:
+        if job.kind == "text":
+            with open(job.payload_path, encoding="utf-8", errors="surrogatepass", newline="") as f:
+                return f.read()
+        return load_upload(job.payload_path, job.filename or "", self.spool_bytes)
@@ -0,0 +1,216 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Frames kept per allocation, so allocations in library code can be charged to the agent line that caused them
+TRACE_FRAMES = 16
+
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+TOP_AGENT_ALLOCATIONS = 5
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents") + os.sep
+
+# tracemalloc is process-wide, so profiled runs in one process take turns
+_profile_lock = threading.Lock()
+
+# What the allocation figures cover, returned with every profile
+ALLOCATION_SCOPE = (
+    "Allocation sites are net growth: memory allocated during the run and still held at its end "
+    "(end snapshot compared with a start snapshot). Memory allocated and freed within the run only "
+    "shows in peak_bytes. tracemalloc traces the whole process, so other threads running at the "
+    "same time (e.g. concurrent requests in a thread pool) are included; profiled runs in a "
+    "process pool worker are isolated from the server's requests."
+)
+
+def profile_call(fn: Callable, *args: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run ``fn(*args)`` under cProfile and tracemalloc
+
+    Module-level so it can be submitted to a process pool; the profile
+    comes back with the result.
+
+    Args:
+        fn: Picklable callable to profile
+        args: Arguments for ``fn``
+
+    Returns:
+        Tuple of (fn's result, profile dict with timings, top functions,
+        allocation sites and the raw pstats data)
+    """
+    # Imported on first use so processes that never profile do not load the profilers
+    import cProfile
+    import marshal
+    import tracemalloc
+
+    with _profile_lock:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        start = _filtered(tracemalloc.take_snapshot())
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            peak = tracemalloc.get_traced_memory()[1]
+            end = _filtered(tracemalloc.take_snapshot())
+            if not tracing:
+                tracemalloc.stop()
+
+    profiler.create_stats()
+    # Serialize first: pstats.Stats takes the stats out of the profiler
+    raw_stats = marshal.dumps(profiler.stats)
+    profile = {
+        "wall_ms": round(wall * 1000, 3),
+        "cpu_ms": round(cpu * 1000, 3),
+        "peak_bytes": max(peak - baseline, 0),
+        "functions": _top_functions(profiler),
+        "pstats": raw_stats
+    }
+    profile.update(_allocation_sites(start, end))
+    profile["allocation_scope"] = ALLOCATION_SCOPE
+    return result, profile
+
+def _top_functions(profiler: "cProfile.Profile") -> List[Dict[str, Any]]:
+    """The functions with the highest cumulative time"""
+    import io
+    import pstats
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3)
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+def _filtered(snapshot: "tracemalloc.Snapshot") -> "tracemalloc.Snapshot":
+    """Leave out the profiler's own allocations"""
+    import tracemalloc
+
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>")
+    ))
+
+def _allocation_sites(start: "tracemalloc.Snapshot", end: "tracemalloc.Snapshot") -> Dict[str, Any]:
+    """
+    Summarize the memory the run added, by comparing snapshots from before and after it
+
+    Sites are the innermost line of each allocation; for the per-agent
+    view each allocation is charged to the innermost frame inside the
+    agents package, so memory allocated by json, re or pdf helpers is
+    charged to the agent line that called them.
+    """
+    by_line = [diff for diff in end.compare_to(start, "lineno") if diff.size_diff > 0]
+    by_line.sort(key=lambda diff: diff.size_diff, reverse=True)
+    sites = [
+        {"site": f"{diff.traceback[-1].filename}:{diff.traceback[-1].lineno}", "size_bytes": diff.size_diff, "count": diff.count_diff}
+        for diff in by_line[:TOP_ALLOCATIONS]
+    ]
+
+    by_agent: Dict[str, Dict[str, List[int]]] = {}
+    for diff in end.compare_to(start, "traceback"):
+        if diff.size_diff <= 0:
+            continue
+        for frame in reversed(diff.traceback):
+            if frame.filename.startswith(AGENTS_DIR):
+                agent = os.path.splitext(frame.filename[len(AGENTS_DIR):])[0]
+                site = by_agent.setdefault(agent, {}).setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                site[0] += diff.size_diff
+                site[1] += diff.count_diff
+                break
+    agents = {}
+    for agent, agent_sites in by_agent.items():
+        ranked = sorted(agent_sites.items(), key=lambda item: item[1][0], reverse=True)
+        agents[agent] = {
+            "size_bytes": sum(size for size, _ in agent_sites.values()),
+            "sites": [
+                {"site": site, "size_bytes": size, "count": count}
+                for site, (size, count) in ranked[:TOP_AGENT_ALLOCATIONS]
+            ]
+        }
+
+    return {
+        "allocated_bytes": sum(diff.size_diff for diff in by_line),
+        "allocations": sites,
+        "allocations_by_agent": agents
+    }
+
+class ProfileStore:
+    """
+    Bounded in-memory store of captured profiles
+
+    Holds the newest ``max_profiles`` profiles; older ones are dropped as
+    new ones arrive.
+    """
+
+    def __init__(self, max_profiles: int = 50, sample_rate: float = 0.0):
+        """
+        Configure the store
+
+        Args:
+            max_profiles: Profiles kept before the oldest is dropped
+            sample_rate: Fraction of requests profiled without being asked
+        """
+        self.max_profiles = max_profiles
+        self.sample_rate = sample_rate
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        """Whether the current request falls in the profiling sample"""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @staticmethod
+    def new_id() -> str:
+        return os.urandom(16).hex()
+
+    def put(self, profile_id: str, profile: Dict[str, Any], **meta: Any) -> None:
+        """
+        Store a profile from ``profile_call`` with descriptive metadata
+
+        Args:
+            profile_id: Request id the profile is stored under
+            profile: Profile dict
+            meta: Extra summary fields (filename, format, intent, ...)
+        """
+        entry = {
+            "profile_id": profile_id,
+            "created_at": datetime.now().isoformat(),
+            **meta,
+            **profile
+        }
+        with self._lock:
+            self._profiles[profile_id] = entry
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored profiles, newest first"""
+        summary_keys = ("profile_id", "created_at", "filename", "format", "intent", "wall_ms", "cpu_ms", "peak_bytes", "allocated_bytes")
+        with self._lock:
+            entries = list(self._profiles.values())
+        return [{key: entry.get(key) for key in summary_keys} for entry in reversed(entries)]
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+import os
+import time
+
+class StartupReport:
+    """
+    Breakdown of where a process's startup time went
+
+    Created first thing when the app module loads; ``mark`` closes the
+    phase that has been running since the previous mark, so imports and
+    component initialization can be timed without wrapping them.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Dict[str, Any]] = []
+        self.ready: Optional[float] = None
+
+    def mark(self, phase: str) -> None:
+        """Record the time since the previous mark as ``phase``"""
+        now = time.perf_counter()
+        self.phases.append({"phase": phase, "ms": round((now - self._last) * 1000, 3)})
+        self._last = now
+
+    def mark_ready(self) -> None:
+        """Record that the app is about to serve its first request"""
+        if self.ready is None:
+            self.mark("lifespan startup")
+            self.ready = self._last
+
+    def as_dict(self, lazy: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Describe the startup
+
+        Args:
+            lazy: Seconds spent on components initialized on first use
+
+        Returns:
+            Dict with each phase, the total until ready and the lazy initializations
+        """
+        return {
+            "phases": list(self.phases),
+            "ready_ms": round((self.ready - self.started) * 1000, 3) if self.ready is not None else None,
+            "lazy_init_ms": {name: round(seconds * 1000, 3) for name, seconds in (lazy or {}).items()}
+        }
+
+def find_dotenv(start: str) -> Optional[str]:
+    """
+    Find the .env file python-dotenv would load, without importing it
+
+    Args:
+        start: Directory to search from, moving up to the filesystem root
+
+    Returns:
+        Path of the nearest .env file, or None
+    """
+    directory = os.path.abspath(start)
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
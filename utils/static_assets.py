@@ -0,0 +1,137 @@
+from typing import Dict, Optional
+import hashlib
+import os
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from utils.compression import choose_encoding, compress
+
+# Versioned asset URLs change whenever their content does, so they never need revalidating
+IMMUTABLE = "public, max-age=31536000, immutable"
+# The page itself is revalidated on every load (a 304 while its ETag matches)
+REVALIDATE = "no-cache"
+
+# Types of the UI's own files; anything else goes through mimetypes, which reads the system type maps
+MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".ico": "image/x-icon"
+}
+
+class StaticAsset:
+    """
+    One file held in memory together with its precompressed variants
+
+    Attributes:
+        body: Uncompressed content
+        media_type: Content-Type header value
+        etag: Strong ETag derived from the content
+    """
+
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.etag = f'"{self.digest[:32]}"'
+        # Coding -> compressed body (None when it is not smaller), filled on first request
+        self._encoded: Dict[str, Optional[bytes]] = {}
+
+    def encoded(self, encoding: str) -> Optional[bytes]:
+        """
+        The body compressed with ``encoding``
+
+        Each variant is compressed once, when first asked for, so a cold
+        start serving only the API does not pay for it.
+
+        Returns:
+            The compressed body, or None if compression does not make it smaller
+        """
+        if encoding not in self._encoded:
+            data = compress(self.body, encoding)
+            self._encoded[encoding] = data if len(data) < len(self.body) else None
+        return self._encoded[encoding]
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        """
+        Serve the asset in the best encoding the client accepts
+
+        Args:
+            request: Incoming request (Accept-Encoding, If-None-Match)
+            cache_control: Cache-Control header value
+
+        Returns:
+            200 with the (possibly compressed) body, or 304 if the client's copy is current
+        """
+        headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or self.etag in [tag.strip() for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        data = self.encoded(encoding) if encoding != "identity" else None
+        if data is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(data, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+class StaticAssets:
+    """
+    The UI's files, loaded once at startup and each compressed once
+
+    Every file except the page is published under a content-hashed name
+    (``app.css`` -> ``app.<hash>.css``) and references to ``/static/<name>``
+    in the page are rewritten to match, so the assets can be cached forever
+    and a deploy is picked up on the next page load.
+    """
+
+    def __init__(self, directory: str, index: str = "index.html", prefix: str = "/static/"):
+        """
+        Load the assets
+
+        Args:
+            directory: Directory holding the page and its assets
+            index: File name of the page
+            prefix: URL path the assets are served under
+        """
+        self.prefix = prefix
+        self._assets: Dict[str, StaticAsset] = {}
+        page = b""
+        urls: Dict[str, str] = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                body = f.read()
+            if name == index:
+                page = body
+                continue
+            asset = StaticAsset(body, self._media_type(name))
+            stem, ext = os.path.splitext(name)
+            versioned = f"{stem}.{asset.digest[:12]}{ext}"
+            self._assets[versioned] = asset
+            urls[prefix + name] = prefix + versioned
+
+        for url, versioned_url in urls.items():
+            page = page.replace(f'"{url}"'.encode(), f'"{versioned_url}"'.encode())
+        self.index = StaticAsset(page, MEDIA_TYPES[".html"])
+
+    @staticmethod
+    def _media_type(name: str) -> str:
+        media_type = MEDIA_TYPES.get(os.path.splitext(name)[1].lower())
+        if media_type is not None:
+            return media_type
+        import mimetypes
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        return media_type
+
+    def get(self, versioned_name: str) -> Optional[StaticAsset]:
+        """Look up an asset by its versioned file name"""
+        return self._assets.get(versioned_name)
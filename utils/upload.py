@@ -0,0 +1,248 @@
+from typing import AsyncIterator, Dict, List, Optional, Union
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import time
+
+CHUNK_SIZE = 64 * 1024
+
+# Allowance for multipart boundaries and part headers when checking Content-Length against a file size limit
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum body size"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds maximum size of {max_bytes:,} bytes")
+        self.max_bytes = max_bytes
+
+class MalformedUpload(ValueError):
+    """Raised when a multipart body cannot be parsed or lacks the expected file field"""
+
+class IngestedUpload:
+    """
+    An upload that has been streamed into memory or a spooled temp file
+
+    Small uploads stay in an in-memory buffer; anything above the spool
+    threshold is written to a named temporary file and exposed through a
+    read-only memory map, so agents can work on it without another copy.
+    """
+
+    def __init__(self, filename: str, spool_bytes: int):
+        self.filename = filename
+        self.size = 0
+        self.path = None
+        # Seconds spent receiving the content
+        self.read_seconds = 0.0
+        self._spool_bytes = spool_bytes
+        self._hash = hashlib.sha256()
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._mmap = None
+
+    @property
+    def sha256(self) -> str:
+        """Hex digest of the full upload"""
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, rolling over to a temp file past the spool threshold"""
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > self._spool_bytes:
+            self._file = tempfile.NamedTemporaryFile(prefix="intake-", delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def view(self) -> Union[memoryview, mmap.mmap]:
+        """
+        Get zero-copy read access to the upload
+
+        Returns:
+            A memoryview for in-memory uploads, or a read-only mmap for spooled ones
+        """
+        if self._file is None:
+            return self._buffer.getbuffer()
+        if self._mmap is None:
+            self._file.flush()
+            if self.size == 0:
+                return memoryview(b"")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def text(self, encoding: str = "utf-8") -> str:
+        """
+        Decode the upload as text
+
+        Raises:
+            UnicodeDecodeError: If the content is not valid in ``encoding``
+        """
+        return str(self.view(), encoding)
+
+    def save(self, path: str) -> None:
+        """Write a copy of the upload to ``path``"""
+        with open(path, "wb") as f:
+            f.write(self.view())
+
+    def close(self) -> None:
+        """Release the memory map and remove any spooled temp file"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            os.unlink(self.path)
+            self._file = None
+        self._buffer = None
+
+    def __enter__(self) -> "IngestedUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def content_length_exceeds(headers, max_bytes: int) -> bool:
+    """Whether a declared Content-Length already rules out a body of at most ``max_bytes``"""
+    try:
+        return int(headers.get("content-length", "")) > max_bytes
+    except ValueError:
+        return False
+
+async def receive_uploads(
+    content_type: str,
+    stream: AsyncIterator[bytes],
+    field: str,
+    max_bytes: int,
+    spool_bytes: int,
+    max_files: Optional[int] = None
+) -> List[IngestedUpload]:
+    """
+    Parse a multipart/form-data body as it arrives, keeping the files in one field
+
+    Unlike ``request.form()``, which spools the whole body before the
+    handler sees it, every chunk goes straight into an IngestedUpload:
+    the size limit and the SHA-256 digest apply while the body is still
+    being received, so an oversized upload is rejected without first
+    being written out in full, and each file is stored once. Parts in
+    other fields are discarded as they arrive.
+
+    Args:
+        content_type: The request's Content-Type header (carries the boundary)
+        stream: The request body, e.g. ``request.stream()``
+        field: Form field whose files are kept
+        max_bytes: Maximum size of each file
+        spool_bytes: Size above which a file is spooled to disk
+        max_files: Maximum number of files in ``field``
+
+    Returns:
+        The files in ``field``, in the order they were sent
+
+    Raises:
+        UploadTooLarge: If a file is larger than ``max_bytes``
+        MalformedUpload: If the body is not valid multipart/form-data, or holds more than ``max_files`` files
+    """
+    # Imported on first use, like Starlette does, so startup does not pay for it
+    from python_multipart.multipart import MultipartParser, parse_options_header
+
+    media_type, params = parse_options_header(content_type)
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MalformedUpload("Expected a multipart/form-data body")
+
+    uploads: List[IngestedUpload] = []
+    headers: Dict[bytes, bytes] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    current: Optional[IngestedUpload] = None
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        nonlocal current
+        _, options = parse_options_header(headers.get(b"content-disposition"))
+        current = None
+        if options.get(b"name", b"").decode("utf-8", "replace") != field or b"filename" not in options:
+            return
+        if max_files is not None and len(uploads) >= max_files:
+            raise MalformedUpload(f"Batch exceeds {max_files} documents")
+        current = IngestedUpload(options[b"filename"].decode("utf-8", "replace"), spool_bytes)
+        uploads.append(current)
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if current is None:
+            return
+        if current.size + (end - start) > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        current.write(data[start:end])
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data
+    })
+    started = time.perf_counter()
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+        parser.finalize()
+    except (UploadTooLarge, MalformedUpload):
+        for upload in uploads:
+            upload.close()
+        raise
+    except Exception as e:
+        for upload in uploads:
+            upload.close()
+        raise MalformedUpload(f"Invalid multipart body: {e}")
+    except BaseException:
+        for upload in uploads:
+            upload.close()
+        raise
+    elapsed = time.perf_counter() - started
+    for upload in uploads:
+        upload.read_seconds = elapsed
+    return uploads
+
+def load_upload(path: str, filename: str, spool_bytes: int) -> IngestedUpload:
+    """
+    Read an upload saved with ``IngestedUpload.save`` back in fixed-size chunks
+
+    Args:
+        path: File written by ``save``
+        filename: Original filename of the upload
+        spool_bytes: Size above which the content is spooled to a temp file
+
+    Returns:
+        IngestedUpload holding the content, size and SHA-256 digest
+    """
+    ingested = IngestedUpload(filename, spool_bytes)
+    started = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                ingested.write(chunk)
+    except BaseException:
+        ingested.close()
+        raise
+    ingested.read_seconds = time.perf_counter() - started
+    return ingested